@@ -0,0 +1,579 @@
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from busca import normalizar, TAMANHO_NGRAMA
+from metricas import medir
+from validacao import converter_data
+
+# Define o nome do banco de dados
+DB_NAME = "DBcliente.db"
+
+# Quantidade de comandos preparados mantidos em cache por conexão
+CACHE_COMANDOS = 128
+
+# Pragmas aplicados em toda conexão aberta pelo gerenciador
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # Leitores não bloqueiam o escritor
+    "PRAGMA synchronous=NORMAL",  # Em WAL, só sincroniza o disco nos checkpoints
+    "PRAGMA cache_size=-16000",  # ~16 MB de cache de páginas
+    "PRAGMA mmap_size=268435456",  # Até 256 MB do arquivo mapeados em memória
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# ---- Comandos SQL (texto fixo para reaproveitar o cache de comandos preparados) ----
+SQL_CRIAR_TABELA = "CREATE TABLE IF NOT EXISTS Cliente (cpf TEXT PRIMARY KEY, nome TEXT, telefone TEXT, gmail TEXT, data TEXT)"
+SQL_SELECIONAR_TODOS = "SELECT cpf, nome, telefone, gmail, data FROM Cliente"
+SQL_SELECIONAR_TODOS_BUSCA = "SELECT cpf, nome, telefone, gmail, data, nome_busca FROM Cliente"
+SQL_INSERIR = ("INSERT INTO Cliente (cpf, nome, telefone, gmail, data, data_iso, aniversario, nome_busca) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+SQL_EXCLUIR = "DELETE FROM Cliente WHERE cpf=?"
+SQL_ATUALIZAR = ("UPDATE Cliente SET nome=?, telefone=?, gmail=?, data=?, data_iso=?, aniversario=?, "
+                 "nome_busca=? WHERE cpf=?")
+SQL_CONTAR = "SELECT COUNT(*) FROM Cliente"
+SQL_OBTER = "SELECT cpf, nome, telefone, gmail, data FROM Cliente WHERE cpf=?"
+# Busca sem FTS5: trecho do nome sem acentos, com os curingas do termo escapados. Um LIKE
+# com "%" no início não tem como procurar pelo índice: o SQLite percorre idx_cliente_nome_busca
+# inteiro (a tabela não é lida, o índice já tem o cpf) e só pode parar antes pelo LIMIT, já que
+# o índice está na ordem pedida. O custo cresce com o cadastro; a busca rápida é a do FTS5.
+SQL_BUSCAR_NOME = ("SELECT cpf FROM Cliente WHERE nome_busca LIKE ? ESCAPE '\\' "
+                   "ORDER BY nome_busca, cpf LIMIT ?")
+# Termos curtos casam com o início do nome (como na memória, veja busca.casa_nome): a faixa
+# [prefixo, prefixo + U+10FFFF) é uma procura em idx_cliente_nome_busca, sem varredura
+SQL_BUSCAR_PREFIXO = ("SELECT cpf FROM Cliente WHERE nome_busca >= ? AND nome_busca < ? "
+                      "ORDER BY nome_busca, cpf LIMIT ?")
+
+# Comandos aceitos por gravar_grupo
+COMANDO_INSERIR = "inserir"
+COMANDO_EXCLUIR = "excluir"
+
+# Limite de parâmetros por consulta IN (abaixo do limite padrão do SQLite)
+TAMANHO_CONSULTA_IN = 500
+
+# ---- Paginação por chave (keyset) em ordem alfabética ----
+# O índice cobre a ordenação (nome sem diferenciar maiúsculas, cpf para desempate),
+# então cada página é uma busca O(log n) seguida da leitura das linhas da página.
+SQL_CRIAR_INDICE_NOME = "CREATE INDEX IF NOT EXISTS idx_cliente_nome ON Cliente(nome COLLATE NOCASE, cpf)"
+SQL_PRIMEIRA_PAGINA = ("SELECT cpf, nome, telefone, gmail, data FROM Cliente "
+                       "ORDER BY nome COLLATE NOCASE, cpf LIMIT ?")
+# Escrito sem comparação de tuplas, que o SQLite não consegue atender pelo índice
+SQL_PROXIMA_PAGINA = ("SELECT cpf, nome, telefone, gmail, data FROM Cliente "
+                      "WHERE nome COLLATE NOCASE >= ? AND (nome COLLATE NOCASE > ? OR cpf > ?) "
+                      "ORDER BY nome COLLATE NOCASE, cpf LIMIT ?")
+TAMANHO_PAGINA = 100
+
+# ---- Datas de nascimento normalizadas ----
+# data guarda o texto digitado (dd/mm/aaaa); data_iso (aaaa-mm-dd) ordena como data e
+# aniversario (mês * 100 + dia) atende "aniversariantes do mês" pelo índice.
+# Datas inexistentes no calendário ficam com as duas colunas nulas.
+VERSAO_ESQUEMA = 4
+COLUNAS_DATAS = (("data_iso", "TEXT"), ("aniversario", "INTEGER"))
+SQL_INDICES_DATAS = (
+    "CREATE INDEX IF NOT EXISTS idx_cliente_data_iso ON Cliente(data_iso)",
+    "CREATE INDEX IF NOT EXISTS idx_cliente_aniversario ON Cliente(aniversario)",
+)
+SQL_LOTE_DATAS = "SELECT rowid, data FROM Cliente WHERE rowid > ? ORDER BY rowid LIMIT ?"
+SQL_ATUALIZAR_DATAS = "UPDATE Cliente SET data_iso=?, aniversario=? WHERE rowid=?"
+SQL_POR_PERIODO = ("SELECT cpf, nome, telefone, gmail, data FROM Cliente "
+                   "WHERE data_iso BETWEEN ? AND ? ORDER BY data_iso")
+SQL_ANIVERSARIANTES = ("SELECT cpf, nome, telefone, gmail, data FROM Cliente "
+                       "WHERE aniversario BETWEEN ? AND ? ORDER BY aniversario, nome COLLATE NOCASE")
+TAMANHO_LOTE_MIGRACAO = 5000
+
+# ---- Nome para busca ----
+# nome_busca guarda o nome já normalizado por busca.normalizar (sem acentos, em minúsculas):
+# "Conceição" -> "conceicao". É gravado junto com o cadastro, então nem a carga nem as
+# buscas precisam normalizar linha por linha.
+SQL_INDICE_NOME_BUSCA = "CREATE INDEX IF NOT EXISTS idx_cliente_nome_busca ON Cliente(nome_busca, cpf)"
+SQL_LOTE_NOMES = "SELECT rowid, nome FROM Cliente WHERE rowid > ? ORDER BY rowid LIMIT ?"
+SQL_ATUALIZAR_NOME_BUSCA = "UPDATE Cliente SET nome_busca=? WHERE rowid=?"
+
+# Linhas lidas por fetchmany nas leituras em fluxo
+TAMANHO_BLOCO_LEITURA = 5000
+
+# ---- Busca textual (FTS5) ----
+# Índice invertido espelhando nome, gmail e telefone da tabela Cliente. É uma tabela de
+# conteúdo externo: guarda só o índice e lê os textos da própria Cliente pelo rowid.
+SQL_CRIAR_FTS = ("CREATE VIRTUAL TABLE ClienteBusca USING fts5(nome, gmail, telefone, "
+                 "content='Cliente', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')")
+SQL_RECONSTRUIR_FTS = "INSERT INTO ClienteBusca(ClienteBusca) VALUES('rebuild')"
+SQL_GATILHOS_FTS = (
+    "CREATE TRIGGER IF NOT EXISTS ClienteBusca_ai AFTER INSERT ON Cliente BEGIN "
+    "INSERT INTO ClienteBusca(rowid, nome, gmail, telefone) VALUES (new.rowid, new.nome, new.gmail, new.telefone); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS ClienteBusca_ad AFTER DELETE ON Cliente BEGIN "
+    "INSERT INTO ClienteBusca(ClienteBusca, rowid, nome, gmail, telefone) "
+    "VALUES ('delete', old.rowid, old.nome, old.gmail, old.telefone); "
+    "END",
+    # Só dispara quando muda uma coluna indexada (não nas colunas de data, por exemplo)
+    "CREATE TRIGGER IF NOT EXISTS ClienteBusca_au AFTER UPDATE OF nome, gmail, telefone ON Cliente BEGIN "
+    "INSERT INTO ClienteBusca(ClienteBusca, rowid, nome, gmail, telefone) "
+    "VALUES ('delete', old.rowid, old.nome, old.gmail, old.telefone); "
+    "INSERT INTO ClienteBusca(rowid, nome, gmail, telefone) VALUES (new.rowid, new.nome, new.gmail, new.telefone); "
+    "END",
+)
+# ---- Contador de alterações ----
+# Conta, por gatilhos, as linhas incluídas, excluídas ou alteradas na Cliente, para quem
+# guarda uma cópia dos cadastros fora do banco (o instantâneo) saber se ela ficou velha.
+# Ao contrário do PRAGMA data_version, que só vale dentro de uma conexão, o contador
+# fica gravado no banco; a identidade, sorteada na criação, distingue bancos diferentes.
+SQL_CRIAR_ALTERACOES = ("CREATE TABLE IF NOT EXISTS Alteracoes (id INTEGER PRIMARY KEY CHECK (id = 1), "
+                        "identidade BLOB NOT NULL, contador INTEGER NOT NULL)")
+SQL_INICIAR_ALTERACOES = "INSERT OR IGNORE INTO Alteracoes (id, identidade, contador) VALUES (1, randomblob(16), 0)"
+SQL_LER_ALTERACOES = "SELECT identidade, contador FROM Alteracoes WHERE id = 1"
+# Uma cópia do banco recebe identidade própria (veja copia.py): restaurada, não herda a do original
+SQL_NOVA_IDENTIDADE = "UPDATE Alteracoes SET identidade = randomblob(16) WHERE id = 1"
+# Conferido junto com o contador: é tirado das próprias linhas, não de um valor que a cópia carrega
+SQL_RESUMIR_CLIENTES = "SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM Cliente"
+SQL_GATILHOS_ALTERACOES = (
+    "CREATE TRIGGER IF NOT EXISTS Alteracoes_ai AFTER INSERT ON Cliente BEGIN "
+    "UPDATE Alteracoes SET contador = contador + 1 WHERE id = 1; END",
+    "CREATE TRIGGER IF NOT EXISTS Alteracoes_ad AFTER DELETE ON Cliente BEGIN "
+    "UPDATE Alteracoes SET contador = contador + 1 WHERE id = 1; END",
+    # As colunas de data derivadas (data_iso, aniversario) não contam: não vão para o instantâneo
+    "CREATE TRIGGER IF NOT EXISTS Alteracoes_au AFTER UPDATE OF cpf, nome, telefone, gmail, data ON Cliente BEGIN "
+    "UPDATE Alteracoes SET contador = contador + 1 WHERE id = 1; END",
+)
+
+# ---- Inclusão em massa ----
+# Gatilhos de inclusão suspensos por inclusao_em_massa(): indexar no FTS5 linha a linha,
+# dentro do executemany, custava mais que a própria inclusão
+GATILHOS_INCLUSAO = ("ClienteBusca_ai", "Alteracoes_ai")
+SQL_LER_GATILHOS = "SELECT name, sql FROM sqlite_master WHERE type='trigger' AND name IN (?, ?)"
+SQL_MAIOR_ROWID = "SELECT COALESCE(MAX(rowid), 0) FROM Cliente"
+SQL_CONTAR_NOVOS = "SELECT COUNT(*) FROM Cliente WHERE rowid > ?"
+SQL_INDEXAR_NOVOS_FTS = ("INSERT INTO ClienteBusca(rowid, nome, gmail, telefone) "
+                         "SELECT rowid, nome, gmail, telefone FROM Cliente WHERE rowid > ?")
+SQL_SOMAR_ALTERACOES = "UPDATE Alteracoes SET contador = contador + ? WHERE id = 1"
+
+# Pesos do bm25 por coluna: o nome conta mais que o e-mail, que conta mais que o telefone
+SQL_BUSCAR_FTS = ("SELECT c.cpf FROM ClienteBusca JOIN Cliente c ON c.rowid = ClienteBusca.rowid "
+                  "WHERE ClienteBusca MATCH ? ORDER BY bm25(ClienteBusca, 10.0, 2.0, 1.0) LIMIT ?")
+
+# A cada quantas instruções da VM do SQLite a busca textual confere se foi cancelada
+PASSO_CANCELAMENTO_SQL = 10000
+
+# Mesma separação de busca.palavras_sem_acento, para a consulta e o cache verem as mesmas palavras
+_RE_PALAVRA = re.compile(r"[^\W_]+")
+
+
+def abrir_conexao(caminho):
+    """Abre uma conexão SQLite já configurada com os pragmas de desempenho."""
+    conn = sqlite3.connect(caminho, check_same_thread=False, cached_statements=CACHE_COMANDOS)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class GerenciadorConexoes:
+    """Mantém uma conexão de escrita persistente e um pequeno pool de conexões de leitura."""
+
+    def __init__(self, caminho=DB_NAME, leitores=2, busca_textual=True):
+        self.caminho = caminho
+        self._escritor = abrir_conexao(caminho)
+        self._trava_escrita = threading.RLock()
+        self._profundidade = 0
+        self._leitores = queue.LifoQueue()
+        self._max_leitores = leitores
+        self._leitores_abertos = 0
+        self._trava_pool = threading.Lock()
+
+        with self.escrita() as conn:
+            conn.execute(SQL_CRIAR_TABELA)
+            conn.execute(SQL_CRIAR_INDICE_NOME)
+            # Fica False se o SQLite não tiver FTS5 ou se a busca textual for desligada
+            self.busca_textual = busca_textual and configurar_busca_textual(conn)
+            configurar_contador_alteracoes(conn)
+        migrar_esquema(self)
+
+    @contextmanager
+    def escrita(self):
+        """Empresta a conexão de escrita; confirma ao sair ou desfaz em caso de erro.
+
+        Blocos aninhados participam da mesma transação e só o mais externo faz o commit.
+        Se o próprio commit falhar (disco cheio, erro de E/S), a transação é desfeita:
+        senão o próximo bloco continuaria nela e gravaria o que já foi dado como perdido.
+        """
+        with self._trava_escrita:
+            self._profundidade += 1
+            try:
+                yield self._escritor
+            except BaseException:
+                if self._profundidade == 1:
+                    self._escritor.rollback()
+                raise
+            else:
+                if self._profundidade == 1:
+                    try:
+                        self._escritor.commit()
+                    except BaseException:
+                        self._escritor.rollback()
+                        raise
+            finally:
+                self._profundidade -= 1
+
+    @contextmanager
+    def leitura(self):
+        """Empresta uma conexão do pool de leitura (para uso em threads de fundo)."""
+        conn = self._pegar_leitor()
+        try:
+            yield conn
+        finally:
+            self._leitores.put(conn)
+
+    def _pegar_leitor(self):
+        """Reaproveita um leitor livre ou abre um novo enquanto houver vaga no pool."""
+        try:
+            return self._leitores.get_nowait()
+        except queue.Empty:
+            pass
+        with self._trava_pool:
+            if self._leitores_abertos < self._max_leitores:
+                self._leitores_abertos += 1
+                return abrir_conexao(self.caminho)
+        return self._leitores.get()
+
+    def fechar(self):
+        """Fecha todas as conexões abertas pelo gerenciador."""
+        while True:
+            try:
+                self._leitores.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._trava_escrita:
+            self._escritor.close()
+
+
+# ---- Operações sobre a tabela Cliente ----
+
+def colunas_data(data):
+    """Calcula (data_iso, aniversario) a partir da data dd/mm/aaaa; (None, None) se for inválida."""
+    convertida = converter_data(data)
+    if convertida is None:
+        return None, None
+    return convertida.isoformat(), convertida.month * 100 + convertida.day
+
+
+def linha_cliente(cadastro):
+    """Monta a tupla de parâmetros de SQL_INSERIR para um cadastro."""
+    return (cadastro['cpf'], cadastro['nome'], cadastro['telefone'], cadastro['gmail'], cadastro['data'],
+            *colunas_data(cadastro['data']), normalizar(cadastro['nome']))
+
+
+def migrar_esquema(gerenciador):
+    """Atualiza a tabela Cliente para VERSAO_ESQUEMA, registrada em PRAGMA user_version.
+
+    Versão 1: colunas data_iso e aniversario, com índices.
+    Versão 2: colunas preenchidas para as linhas antigas.
+    Versão 3: coluna nome_busca, com índice, preenchida para as linhas antigas.
+    Versão 4: gatilho de UPDATE da busca textual só nas colunas indexadas (o antigo
+    disparava em qualquer coluna, inclusive nas de data).
+    Os preenchimentos são feitos em lotes com commit próprio para não segurar a
+    conexão de escrita por muito tempo. Se um deles for interrompido, recomeça do
+    início na próxima abertura (são idempotentes).
+    """
+    with gerenciador.escrita() as conn:
+        versao = conn.execute("PRAGMA user_version").fetchone()[0]
+        existentes = {row[1] for row in conn.execute("PRAGMA table_info(Cliente)")}
+        if versao < 1:
+            for coluna, tipo in COLUNAS_DATAS:
+                if coluna not in existentes:
+                    conn.execute(f"ALTER TABLE Cliente ADD COLUMN {coluna} {tipo}")
+            for comando in SQL_INDICES_DATAS:
+                conn.execute(comando)
+            conn.execute("PRAGMA user_version=1")
+        if versao < 3:
+            if "nome_busca" not in existentes:
+                conn.execute("ALTER TABLE Cliente ADD COLUMN nome_busca TEXT")
+            conn.execute(SQL_INDICE_NOME_BUSCA)
+    if versao < 2:
+        _preencher_em_lotes(gerenciador, SQL_LOTE_DATAS, SQL_ATUALIZAR_DATAS, colunas_data, 2)
+    if versao < 3:
+        _preencher_em_lotes(gerenciador, SQL_LOTE_NOMES, SQL_ATUALIZAR_NOME_BUSCA,
+                            lambda nome: (normalizar(nome),), 3)
+    if versao < 4:
+        with gerenciador.escrita() as conn:
+            conn.execute("BEGIN")  # Troca o gatilho numa só transação
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type='trigger' AND name='ClienteBusca_au'").fetchone():
+                conn.execute("DROP TRIGGER ClienteBusca_au")
+                conn.execute(SQL_GATILHOS_FTS[2])
+            conn.execute("PRAGMA user_version=4")
+
+
+def _preencher_em_lotes(gerenciador, sql_lote, sql_atualizar, calcular, versao):
+    """Preenche colunas derivadas de todas as linhas, lote a lote, e registra a versão no fim.
+
+    sql_lote lê (rowid, valor) a partir de um rowid; calcular(valor) devolve os
+    parâmetros de sql_atualizar, que recebe o rowid por último.
+    """
+    ultimo = 0
+    while True:
+        with gerenciador.escrita() as conn:
+            linhas = conn.execute(sql_lote, (ultimo, TAMANHO_LOTE_MIGRACAO)).fetchall()
+            if not linhas:
+                conn.execute(f"PRAGMA user_version={versao}")
+                return
+            conn.executemany(sql_atualizar, ((*calcular(valor), rowid) for rowid, valor in linhas))
+        ultimo = linhas[-1][0]
+
+
+@medir("banco.inserir_cliente")
+def inserir_cliente(gerenciador, cadastro):
+    """Insere um novo cliente. Levanta sqlite3.IntegrityError se o CPF já existir."""
+    with gerenciador.escrita() as conn:
+        conn.execute(SQL_INSERIR, linha_cliente(cadastro))
+
+
+@medir("banco.atualizar_cliente")
+def atualizar_cliente(gerenciador, cadastro):
+    """Atualiza os dados de um cliente existente, identificado pelo CPF."""
+    with gerenciador.escrita() as conn:
+        conn.execute(SQL_ATUALIZAR, linha_cliente(cadastro)[1:] + (cadastro['cpf'],))
+
+
+@medir("banco.excluir_cliente")
+def excluir_cliente(gerenciador, cpf):
+    """Exclui um cliente pelo CPF."""
+    with gerenciador.escrita() as conn:
+        conn.execute(SQL_EXCLUIR, (cpf,))
+
+
+@medir("banco.gravar_grupo")
+def gravar_grupo(gerenciador, comandos):
+    """Grava uma sequência de comandos (tipo, valor) numa única transação (group commit).
+
+    tipo é COMANDO_INSERIR (valor = cadastro) ou COMANDO_EXCLUIR (valor = cpf). Cada
+    comando roda num SAVEPOINT: um CPF duplicado desfaz só o próprio comando, não o
+    grupo inteiro. Retorna, para cada comando, (erro, linhas alteradas), com erro None
+    em caso de sucesso; se o commit falhar, todos recebem o erro do commit.
+    """
+    resultados = [(None, 0)] * len(comandos)
+    try:
+        with gerenciador.escrita() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            for i, (tipo, valor) in enumerate(comandos):
+                conn.execute("SAVEPOINT comando")
+                try:
+                    if tipo == COMANDO_INSERIR:
+                        cursor = conn.execute(SQL_INSERIR, linha_cliente(valor))
+                    else:
+                        cursor = conn.execute(SQL_EXCLUIR, (valor,))
+                    resultados[i] = (None, cursor.rowcount)
+                except sqlite3.Error as erro:
+                    conn.execute("ROLLBACK TO comando")
+                    resultados[i] = (erro, 0)
+                conn.execute("RELEASE comando")
+    except sqlite3.Error as erro:
+        # O commit falhou: nenhum comando do grupo foi gravado
+        return [(erro_comando or erro, 0) for erro_comando, _ in resultados]
+    return resultados
+
+
+def obter_cliente(conn, cpf):
+    """Retorna o cliente com o CPF informado como dicionário, ou None."""
+    row = conn.execute(SQL_OBTER, (cpf,)).fetchone()
+    if row is None:
+        return None
+    return {"cpf": row[0], "nome": row[1], "telefone": row[2], "gmail": row[3], "data": row[4]}
+
+
+def clientes_por_cpf(conn, cpfs):
+    """Retorna os clientes dos CPFs informados como dicionários, na mesma ordem (ignora os inexistentes)."""
+    por_cpf = {}
+    for inicio in range(0, len(cpfs), TAMANHO_CONSULTA_IN):
+        parte = cpfs[inicio:inicio + TAMANHO_CONSULTA_IN]
+        marcadores = ",".join("?" * len(parte))
+        for row in conn.execute(f"SELECT cpf, nome, telefone, gmail, data FROM Cliente WHERE cpf IN ({marcadores})",
+                                parte):
+            por_cpf[row[0]] = {"cpf": row[0], "nome": row[1], "telefone": row[2], "gmail": row[3], "data": row[4]}
+    return [por_cpf[cpf] for cpf in cpfs if cpf in por_cpf]
+
+
+@medir("banco.pagina_clientes")
+def pagina_clientes(conn, depois=None, limite=TAMANHO_PAGINA):
+    """Retorna uma página de clientes em ordem alfabética, como lista de dicionários.
+
+    depois é o marcador devolvido pela página anterior (None para a primeira).
+    Retorna (cadastros, marcador da próxima página), com marcador None no fim da lista.
+    """
+    if depois is None:
+        linhas = conn.execute(SQL_PRIMEIRA_PAGINA, (limite,)).fetchall()
+    else:
+        nome, cpf = depois
+        linhas = conn.execute(SQL_PROXIMA_PAGINA, (nome, nome, cpf, limite)).fetchall()
+    pagina = [{"cpf": row[0], "nome": row[1], "telefone": row[2], "gmail": row[3], "data": row[4]} for row in linhas]
+    proxima = (linhas[-1][1], linhas[-1][0]) if len(linhas) == limite else None
+    return pagina, proxima
+
+
+@medir("banco.clientes_por_periodo")
+def clientes_por_periodo(conn, inicio, fim):
+    """Retorna os clientes nascidos entre duas datas (datetime.date, inclusive), do mais velho ao mais novo."""
+    linhas = conn.execute(SQL_POR_PERIODO, (inicio.isoformat(), fim.isoformat())).fetchall()
+    return [{"cpf": row[0], "nome": row[1], "telefone": row[2], "gmail": row[3], "data": row[4]} for row in linhas]
+
+
+@medir("banco.aniversariantes")
+def aniversariantes(conn, mes, dia=None):
+    """Retorna os clientes que fazem aniversário no mês (ou no dia do mês) informado."""
+    inicio, fim = (mes * 100 + dia, mes * 100 + dia) if dia else (mes * 100 + 1, mes * 100 + 31)
+    linhas = conn.execute(SQL_ANIVERSARIANTES, (inicio, fim)).fetchall()
+    return [{"cpf": row[0], "nome": row[1], "telefone": row[2], "gmail": row[3], "data": row[4]} for row in linhas]
+
+
+def contar_clientes(conn):
+    """Retorna o número de clientes cadastrados."""
+    return conn.execute(SQL_CONTAR).fetchone()[0]
+
+
+def iterar_clientes(conn, tamanho_bloco=TAMANHO_BLOCO_LEITURA, com_nome_busca=False):
+    """Percorre a tabela Cliente em blocos de tuplas, sem materializar a tabela inteira.
+
+    Usa um único cursor com fetchmany, então todos os blocos vêm do mesmo instantâneo
+    do banco (no modo WAL a leitura não bloqueia as gravações). Com com_nome_busca,
+    cada tupla traz nome_busca como sexto campo.
+    """
+    cursor = conn.execute(SQL_SELECIONAR_TODOS_BUSCA if com_nome_busca else SQL_SELECIONAR_TODOS)
+    try:
+        while bloco := cursor.fetchmany(tamanho_bloco):
+            yield bloco
+    finally:
+        cursor.close()
+
+
+@contextmanager
+def inclusao_em_massa(conn):
+    """Suspende os gatilhos de inclusão da Cliente durante um bloco que só inclui linhas.
+
+    Use dentro de gerenciador.escrita(). Ao sair, as linhas novas (rowid acima do maior
+    de antes) são indexadas no FTS5 com um único INSERT ... SELECT e o contador de
+    alterações recebe a quantidade delas de uma vez, como os gatilhos teriam feito linha
+    a linha. Como tudo roda na mesma transação, outras conexões nunca veem a tabela sem
+    os gatilhos; se o bloco falhar, o rollback da escrita os traz de volta.
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN")  # O DROP TRIGGER fora de uma transação seria gravado na hora
+    gatilhos = dict(conn.execute(SQL_LER_GATILHOS, GATILHOS_INCLUSAO).fetchall())
+    ultimo = conn.execute(SQL_MAIOR_ROWID).fetchone()[0]
+    for nome in gatilhos:
+        conn.execute(f"DROP TRIGGER {nome}")
+    yield conn
+    if "ClienteBusca_ai" in gatilhos:
+        conn.execute(SQL_INDEXAR_NOVOS_FTS, (ultimo,))
+    if "Alteracoes_ai" in gatilhos:
+        conn.execute(SQL_SOMAR_ALTERACOES, (conn.execute(SQL_CONTAR_NOVOS, (ultimo,)).fetchone()[0],))
+    for sql in gatilhos.values():
+        conn.execute(sql)
+
+
+def configurar_contador_alteracoes(conn):
+    """Cria (se preciso) a tabela Alteracoes e os gatilhos que contam as mudanças na Cliente."""
+    conn.execute(SQL_CRIAR_ALTERACOES)
+    conn.execute(SQL_INICIAR_ALTERACOES)
+    for gatilho in SQL_GATILHOS_ALTERACOES:
+        conn.execute(gatilho)
+
+
+def ler_alteracoes(conn):
+    """Retorna (identidade, contador) do banco; o contador cresce a cada linha alterada na Cliente."""
+    identidade, contador = conn.execute(SQL_LER_ALTERACOES).fetchone()
+    return bytes(identidade), contador
+
+
+def resumir_clientes(conn):
+    """Retorna (quantidade de linhas, maior rowid) da Cliente."""
+    return conn.execute(SQL_RESUMIR_CLIENTES).fetchone()
+
+
+def renovar_identidade(conn):
+    """Sorteia uma identidade nova para o banco, se ele tiver a tabela Alteracoes.
+
+    Usada nas cópias: uma cópia restaurada com a identidade do original chegaria, depois
+    do mesmo número de gravações, ao mesmo (identidade, contador) de um instantâneo dele.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='Alteracoes'").fetchone():
+        with conn:
+            conn.execute(SQL_NOVA_IDENTIDADE)
+
+
+@contextmanager
+def transacao_leitura(conn):
+    """Abre uma transação de leitura: todas as consultas do bloco veem o mesmo estado do banco.
+
+    No modo WAL ela não bloqueia as gravações, que seguem para os próximos leitores.
+    """
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+
+
+def configurar_busca_textual(conn):
+    """Cria (se preciso) a tabela FTS5 e os gatilhos que a mantêm em dia com Cliente.
+
+    Na primeira vez, indexa os clientes já existentes. Retorna False se este SQLite
+    não tiver o módulo FTS5.
+    """
+    existe = conn.execute("SELECT 1 FROM sqlite_master WHERE name='ClienteBusca'").fetchone()
+    if not existe:
+        try:
+            conn.execute(SQL_CRIAR_FTS)
+        except sqlite3.OperationalError:
+            return False
+        conn.execute(SQL_RECONSTRUIR_FTS)
+    for gatilho in SQL_GATILHOS_FTS:
+        conn.execute(gatilho)
+    return True
+
+
+def montar_consulta_fts(termo):
+    """Converte o texto digitado numa consulta FTS5 de prefixos: "mat san" -> '"mat"* "san"*'.
+
+    Retorna None se o termo não tiver nenhuma palavra.
+    """
+    palavras = _RE_PALAVRA.findall(termo)
+    if not palavras:
+        return None
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+@medir("banco.buscar_nome")
+def buscar_nome(conn, termo, limite=-1):
+    """Busca sem FTS5: retorna, em ordem alfabética, os CPFs cujo nome atende ao termo (-1 = sem limite).
+
+    Compara pela coluna nome_busca, então não diferencia acentos nem maiúsculas. Termos
+    com menos de TAMANHO_NGRAMA letras casam com o início do nome, por uma procura no
+    índice de nome_busca; os demais, com qualquer trecho, por uma varredura dele (veja
+    SQL_BUSCAR_NOME).
+    """
+    chave = normalizar(termo.strip())
+    if len(chave) < TAMANHO_NGRAMA:
+        return [row[0] for row in conn.execute(SQL_BUSCAR_PREFIXO, (chave, chave + "\U0010ffff", limite))]
+    padrao = re.sub(r"([\\%_])", r"\\\1", chave)
+    return [row[0] for row in conn.execute(SQL_BUSCAR_NOME, (f"%{padrao}%", limite))]
+
+
+@medir("banco.buscar_texto")
+def buscar_texto(conn, termo, cancelado=None, limite=-1):
+    """Busca clientes pelo índice FTS5 e retorna os CPFs do mais ao menos relevante.
+
+    Cada palavra do termo casa com o início de alguma palavra do nome, do gmail ou do
+    telefone, e todas precisam casar. Se cancelado() passar a retornar True durante a
+    consulta, ela é interrompida e levanta sqlite3.OperationalError. limite corta o
+    resultado nos mais relevantes (-1 = sem limite).
+    """
+    consulta = montar_consulta_fts(termo)
+    if consulta is None:
+        return []
+    if cancelado is not None:
+        conn.set_progress_handler(cancelado, PASSO_CANCELAMENTO_SQL)
+    try:
+        return [row[0] for row in conn.execute(SQL_BUSCAR_FTS, (consulta, limite))]
+    finally:
+        if cancelado is not None:
+            conn.set_progress_handler(None, 0)
@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from banco import (SQL_INSERIR, GerenciadorConexoes, inclusao_em_massa, ler_alteracoes, linha_cliente,
+                   pagina_clientes, resumir_clientes)
+from exportacao import exportar
+from instantaneo import ler_instantaneo
+from repositorio import RepositorioClientes
+
+TAMANHOS_PADRAO = (1_000, 100_000, 1_000_000)
+OPERACOES_UNITARIAS = 200  # Inclusões e exclusões individuais medidas por tamanho
+TERMO_DIGITADO = "maria silva"  # Digitado letra a letra na medição da busca
+
+PRIMEIROS_NOMES = ("Ana", "Bruno", "Carlos", "Daniela", "Eduardo", "Fernanda", "Gabriel", "Helena", "Igor",
+                   "Joana", "José", "Júlia", "Lucas", "Maria", "Matheus", "Otávio", "Paula", "Rafael",
+                   "Sebastião", "Tânia", "Vinícius")
+SOBRENOMES = ("Silva", "Santos", "Oliveira", "Souza", "Pereira", "Lima", "Costa", "Almeida", "Ferreira",
+              "Rocha", "Barbosa", "Ribeiro", "Martins", "Carvalho", "Gonçalves", "Araújo", "Conceição")
+DOMINIOS = ("gmail.com", "hotmail.com", "outlook.com", "yahoo.com.br")
+
+
+# ---- Geração de dados sintéticos ----
+
+def gerar_cpf(aleatorio):
+    """Gera um CPF válido (com os dois dígitos verificadores corretos)."""
+    digitos = [aleatorio.randrange(10) for _ in range(9)]
+    for peso_inicial in (10, 11):
+        resto = sum(d * p for d, p in zip(digitos, range(peso_inicial, 1, -1))) % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    return "".join(map(str, digitos))
+
+
+def gerar_clientes(quantidade, semente=0):
+    """Gera cadastros sintéticos válidos, no formato gravado pelo formulário, com CPFs únicos."""
+    aleatorio = random.Random(semente)
+    vistos = set()
+    inicio = date(1940, 1, 1)
+    while len(vistos) < quantidade:
+        cpf = gerar_cpf(aleatorio)
+        if cpf in vistos or len(set(cpf)) == 1:
+            continue
+        vistos.add(cpf)
+        primeiro = aleatorio.choice(PRIMEIROS_NOMES)
+        nome = f"{primeiro} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+        nascimento = inicio + timedelta(days=aleatorio.randrange(30_000))
+        yield {
+            "cpf": cpf,
+            "nome": nome,
+            "telefone": f"{aleatorio.randrange(11, 100)}9{aleatorio.randrange(10 ** 8):08d}",
+            "gmail": f"{primeiro.lower()}{len(vistos)}@{aleatorio.choice(DOMINIOS)}",
+            "data": nascimento.strftime("%d/%m/%Y"),
+        }
+
+
+def popular_banco(caminho, clientes, tamanho_lote=10_000):
+    """Cria um banco com os clientes informados, gravando em lotes como a importação."""
+    gerenciador = GerenciadorConexoes(caminho)
+    lote = []
+    for cliente in clientes:
+        lote.append(linha_cliente(cliente))
+        if len(lote) == tamanho_lote:
+            with gerenciador.escrita() as conn, inclusao_em_massa(conn):
+                conn.executemany(SQL_INSERIR, lote)
+            lote = []
+    if lote:
+        with gerenciador.escrita() as conn, inclusao_em_massa(conn):
+            conn.executemany(SQL_INSERIR, lote)
+    gerenciador.fechar()
+
+
+# ---- Medições ----
+
+def resumo_tempos(tempos):
+    """Resume uma lista de tempos (em segundos) em milissegundos."""
+    ordenados = sorted(tempos)
+    return {
+        "n": len(tempos),
+        "media_ms": round(statistics.fmean(tempos) * 1000, 4),
+        "mediana_ms": round(statistics.median(tempos) * 1000, 4),
+        "p99_ms": round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.99))] * 1000, 4),
+        "max_ms": round(ordenados[-1] * 1000, 4),
+    }
+
+
+def cronometrar(funcao, *args):
+    """Executa a função uma vez e retorna (segundos, resultado)."""
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def medir_memoria(gerenciador, tamanho):
+    """Mede a memória ocupada por um repositório recém-carregado (registros e índice de nomes).
+
+    Usa tracemalloc numa carga separada, para não distorcer o tempo medido em carregar_s.
+    """
+    tracemalloc.start()
+    try:
+        repositorio = RepositorioClientes(gerenciador)
+        repositorio.carregar()
+        total, _ = tracemalloc.get_traced_memory()
+        repositorio.indice = None  # Solta o índice para separar as duas parcelas
+        so_registros, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "total_mb": round(total / 2 ** 20, 2),
+        "bytes_por_cliente": round(total / max(tamanho, 1)),
+        "registros_bytes_por_cliente": round(so_registros / max(tamanho, 1)),
+        "indice_bytes_por_cliente": round((total - so_registros) / max(tamanho, 1)),
+    }
+
+
+def medir_sem_cache(repositorio, buscar, termo):
+    """Tempo de uma busca com o cache de buscas do repositório limpo antes."""
+    repositorio.cache.limpar()
+    return cronometrar(buscar, termo)[0]
+
+
+def medir_tamanho(tamanho, pasta, semente=0):
+    """Roda todas as medições para um registro com a quantidade de clientes informada."""
+    caminho = os.path.join(pasta, f"bench_{tamanho}.db")
+    resultado = {"tamanho": tamanho}
+
+    segundos, _ = cronometrar(popular_banco, caminho, gerar_clientes(tamanho, semente))
+    resultado["popular_s"] = round(segundos, 3)
+
+    segundos, gerenciador = cronometrar(GerenciadorConexoes, caminho)
+    resultado["abrir_banco_s"] = round(segundos, 4)
+    repositorio = RepositorioClientes(gerenciador)
+    segundos, _ = cronometrar(repositorio.carregar)
+    resultado["carregar_s"] = round(segundos, 4)
+
+    # Início a quente: grava o instantâneo da carga acima e carrega um repositório novo por ele.
+    # ler_instantaneo_s é só a leitura e decodificação do arquivo; o resto de
+    # carregar_instantaneo_s é a criação dos registros e do índice, que cresce com o cadastro
+    repositorio.caminho_instantaneo = os.path.join(pasta, f"bench_{tamanho}.instantaneo")
+    segundos, _ = cronometrar(repositorio.salvar_instantaneo)
+    resultado["gravar_instantaneo_s"] = round(segundos, 4)
+    with gerenciador.leitura() as conn:
+        estado = (*ler_alteracoes(conn), *resumir_clientes(conn))
+    segundos, _ = cronometrar(ler_instantaneo, repositorio.caminho_instantaneo, *estado)
+    resultado["ler_instantaneo_s"] = round(segundos, 4)
+    quente = RepositorioClientes(gerenciador, repositorio.caminho_instantaneo)
+    segundos, _ = cronometrar(quente.carregar)
+    resultado["carregar_instantaneo_s"] = round(segundos, 4)
+    del quente
+
+    with gerenciador.leitura() as conn:
+        segundos, _ = cronometrar(pagina_clientes, conn)
+    resultado["primeira_pagina_ms"] = round(segundos * 1000, 4)
+
+    # Clientes novos (semente diferente) para as inclusões e exclusões individuais
+    novos = [c for c in gerar_clientes(OPERACOES_UNITARIAS, semente + 1) if c["cpf"] not in repositorio]
+    resultado["inserir"] = resumo_tempos([cronometrar(repositorio.inserir, c)[0] for c in novos])
+    resultado["excluir"] = resumo_tempos([cronometrar(repositorio.excluir, c["cpf"])[0] for c in novos])
+
+    # Busca enquanto digita: uma consulta por tecla, como na barra do histórico. As linhas sem
+    # sufixo medem a busca em si (cache limpo antes de cada tecla); as "_cache", o que a barra
+    # vê com o cache ligado: na memória cada tecla estreita a anterior, na textual o termo se repete
+    prefixos = [TERMO_DIGITADO[:i] for i in range(1, len(TERMO_DIGITADO) + 1)]
+    resultado["busca_memoria"] = resumo_tempos([medir_sem_cache(repositorio, repositorio.buscar, p)
+                                                for p in prefixos])
+    resultado["busca_textual"] = resumo_tempos([medir_sem_cache(repositorio, repositorio.buscar_textual, p)
+                                                for p in prefixos])
+    repositorio.cache.limpar()
+    resultado["busca_memoria_cache"] = resumo_tempos([cronometrar(repositorio.buscar, p)[0] for p in prefixos])
+    for p in prefixos:
+        repositorio.buscar_textual(p)  # Guarda os termos: a medição abaixo é a da busca repetida
+    resultado["busca_textual_cache"] = resumo_tempos([cronometrar(repositorio.buscar_textual, p)[0]
+                                                      for p in prefixos])
+
+    segundos, _ = cronometrar(exportar, gerenciador, os.path.join(pasta, f"bench_{tamanho}.csv"))
+    resultado["exportar_csv_s"] = round(segundos, 4)
+
+    del repositorio
+    resultado["memoria"] = medir_memoria(gerenciador, tamanho)
+
+    gerenciador.fechar()
+    return resultado
+
+
+def descrever_ambiente():
+    """Informações para comparar resultados de máquinas e commits diferentes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o desempenho do registro de clientes (sem interface).")
+    parser.add_argument("--tamanhos", default=",".join(map(str, TAMANHOS_PADRAO)),
+                        help="Quantidades de clientes separadas por vírgula (padrão: 1000,100000,1000000)")
+    parser.add_argument("--saida", default="benchmark.json", help="Arquivo JSON com os resultados")
+    parser.add_argument("--pasta", help="Pasta para os bancos temporários (padrão: uma pasta temporária)")
+    parser.add_argument("--semente", type=int, default=0, help="Semente dos dados sintéticos")
+    args = parser.parse_args()
+
+    tamanhos = [int(t) for t in args.tamanhos.split(",") if t.strip()]
+    relatorio = {"ambiente": descrever_ambiente(), "resultados": []}
+    with tempfile.TemporaryDirectory(dir=args.pasta) as pasta:
+        for tamanho in tamanhos:
+            print(f"Medindo {tamanho} clientes...", flush=True)
+            relatorio["resultados"].append(medir_tamanho(tamanho, pasta, args.semente))
+
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, indent=4, ensure_ascii=False)
+    print(f"Resultados gravados em {args.saida}.")
+
+
+if __name__ == "__main__":
+    main()
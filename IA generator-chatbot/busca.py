@@ -0,0 +1,451 @@
+import queue
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+# Tamanho dos n-gramas usados no índice de substring
+TAMANHO_NGRAMA = 3
+
+# Mude ao alterar normalizar() ou TAMANHO_NGRAMA: invalida os índices guardados em instantâneos
+VERSAO_INDICE = 2
+
+# A cada quantos itens as varreduras longas conferem se a busca foi cancelada
+PASSO_CANCELAMENTO = 4096
+
+# Limites do cache de buscas: quantas buscas guarda e quantos CPFs elas podem somar
+CACHE_BUSCAS = 64
+CACHE_CPFS = 1_000_000
+
+# Maior caractere Unicode: serve de limite superior nas buscas por prefixo
+_FIM = "\U0010ffff"
+
+# Palavras como o tokenizador unicode61 do FTS5 as separa: letras e dígitos; "_" é separador
+_RE_PALAVRA = re.compile(r"[^\W_]+")
+
+
+class BuscaCancelada(Exception):
+    """Levantada quando uma busca é abandonada porque outra mais nova chegou."""
+
+
+def verificar_cancelamento(cancelado):
+    """Levanta BuscaCancelada se a função de cancelamento indicar que a busca ficou obsoleta."""
+    if cancelado is not None and cancelado():
+        raise BuscaCancelada()
+
+
+def normalizar(texto):
+    """Gera a chave de busca de um texto, sem acentos nem diferença de maiúsculas: "José" -> "jose".
+
+    Decompõe o texto (NFKD), descarta as marcas de acento e aplica casefold.
+    """
+    texto = texto or ""
+    if texto.isascii():
+        return texto.casefold()  # Nada a decompor: o caso mais comum sai sem o NFKD
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(ch for ch in decomposto if not unicodedata.combining(ch)).casefold()
+
+
+def palavras_sem_acento(texto):
+    """Separa o texto em palavras sem acentos e em minúsculas, como o tokenizador do FTS5."""
+    return _RE_PALAVRA.findall(normalizar(texto))
+
+
+def casa_nome(termo, nome):
+    """Diz se um nome atende à busca por nome; os dois já normalizados.
+
+    Termos com menos de TAMANHO_NGRAMA letras casam com o início do nome (são atendidos
+    por uma faixa do vetor ordenado); os demais, com qualquer trecho dele.
+    """
+    if len(termo) < TAMANHO_NGRAMA:
+        return nome.startswith(termo)
+    return termo in nome
+
+
+def ngramas(chave):
+    """Retorna o conjunto de n-gramas (trigramas) de uma chave normalizada."""
+    return {chave[i:i + TAMANHO_NGRAMA] for i in range(len(chave) - TAMANHO_NGRAMA + 1)}
+
+
+class IndiceNomes:
+    """Índice de nomes para a busca do histórico.
+
+    Mantém um vetor ordenado de pares (chave, cpf) para buscas por prefixo e para
+    listar tudo em ordem alfabética, e um índice invertido de trigramas para buscas
+    por trecho do nome. Ambos são atualizados a cada inclusão ou exclusão.
+
+    As listas de CPFs por trigrama são listas simples (8 bytes por entrada, contra
+    ~30 de um set): a busca só percorre a menor delas e confirma cada candidato pelo
+    trecho completo, então não precisa de interseções. Num índice restaurado de um
+    instantâneo elas são array('q') até a primeira inclusão de um CPF que não é inteiro.
+
+    Excluir não procura o CPF nessas listas: a entrada fica lá, marcada como morta em
+    _mortos, e a busca a ignora (o CPF já não tem chave, ou a chave nova não contém o
+    trecho). Uma lista só é limpa quando metade dela está morta, o que dá custo
+    constante por exclusão; se o CPF volta com o mesmo trigrama, a entrada morta revive.
+    """
+
+    def __init__(self):
+        self._chaves = []  # Pares (chave, cpf) em ordem
+        self._chave_por_cpf = {}
+        self._ngramas = {}  # Trigrama -> lista de CPFs
+        self._mortos = {}  # CPF -> trigramas em cujas listas ele tem uma entrada morta
+        self._lixo = {}  # Trigrama -> quantas entradas mortas a lista dele tem
+
+    def construir(self, pares, normalizados=False):
+        """Reconstrói o índice inteiro a partir de pares (cpf, nome).
+
+        Com normalizados=True os nomes já são chaves de normalizar() (ex.: a coluna
+        nome_busca do banco) e são usados como estão.
+        """
+        if normalizados:
+            self._chave_por_cpf = dict(pares)
+        else:
+            self._chave_por_cpf = {cpf: normalizar(nome) for cpf, nome in pares}
+        self._chaves = sorted((chave, cpf) for cpf, chave in self._chave_por_cpf.items())
+        self._ngramas = {}
+        self._mortos = {}
+        self._lixo = {}
+        for cpf, chave in self._chave_por_cpf.items():
+            for grama in ngramas(chave):
+                self._ngramas.setdefault(grama, []).append(cpf)
+
+    def adicionar(self, cpf, nome):
+        """Inclui (ou atualiza) um nome no índice."""
+        if cpf in self._chave_por_cpf:
+            self.remover(cpf)
+        chave = normalizar(nome)
+        insort(self._chaves, (chave, cpf))
+        self._indexar(cpf, chave)
+
+    def adicionar_varios(self, pares):
+        """Inclui um lote de pares (cpf, nome) de uma vez (usado pela importação em massa).
+
+        Em vez de uma inserção ordenada por nome, junta o lote ao vetor e reordena:
+        o Timsort aproveita os dois trechos já ordenados e faz isso em tempo linear.
+        """
+        novos = []
+        for cpf, nome in pares:
+            if cpf in self._chave_por_cpf:
+                self.remover(cpf)
+            chave = normalizar(nome)
+            novos.append((chave, cpf))
+            self._indexar(cpf, chave)
+        novos.sort()
+        self._chaves.extend(novos)
+        self._chaves.sort()
+
+    def _indexar(self, cpf, chave):
+        """Registra a chave do CPF e o põe nas listas dos trigramas dela, revivendo entradas mortas."""
+        self._chave_por_cpf[cpf] = chave
+        mortos = self._mortos.pop(cpf, None)
+        for grama in ngramas(chave):
+            if mortos is not None and grama in mortos:
+                mortos.discard(grama)
+                self._lixo[grama] -= 1
+            else:
+                self._anexar(grama, cpf)
+        if mortos:
+            self._mortos[cpf] = mortos
+
+    def _anexar(self, grama, cpf):
+        cpfs = self._ngramas.get(grama)
+        if cpfs is None:
+            self._ngramas[grama] = [cpf]
+            return
+        try:
+            cpfs.append(cpf)
+        except TypeError:
+            # array('q') de um instantâneo recebendo um CPF em texto: passa a ser lista
+            self._ngramas[grama] = [*cpfs, cpf]
+
+    def restaurar(self, chaves, cpfs, ngramas_cpfs):
+        """Substitui o índice por um já pronto, lido de um instantâneo, sem normalizar nem ordenar.
+
+        chaves e cpfs são listas paralelas em ordem de (chave, cpf); ngramas_cpfs mapeia
+        cada trigrama para a sequência dos seus CPFs.
+        """
+        self._chaves = list(zip(chaves, cpfs))
+        self._chave_por_cpf = dict(zip(cpfs, chaves))
+        self._ngramas = ngramas_cpfs
+        self._mortos = {}
+        self._lixo = {}
+
+    def pares(self):
+        """Retorna uma cópia da lista de pares (chave, cpf), em ordem."""
+        return list(self._chaves)
+
+    def postagens(self):
+        """Gera pares (trigrama, CPFs) só com as entradas vivas; não altere o índice enquanto os percorre."""
+        for grama, cpfs in self._ngramas.items():
+            if self._lixo.get(grama):
+                cpfs = [cpf for cpf in cpfs if grama not in self._mortos.get(cpf, ())]
+            if cpfs:
+                yield grama, cpfs
+
+    def remover(self, cpf):
+        """Retira um CPF do índice (não faz nada se ele não estiver indexado)."""
+        chave = self._chave_por_cpf.pop(cpf, None)
+        if chave is None:
+            return
+        del self._chaves[bisect_left(self._chaves, (chave, cpf))]
+        gramas = ngramas(chave)
+        self._mortos.setdefault(cpf, set()).update(gramas)
+        for grama in gramas:
+            lixo = self._lixo[grama] = self._lixo.get(grama, 0) + 1
+            if 2 * lixo > len(self._ngramas[grama]):
+                self._limpar(grama)
+
+    def _limpar(self, grama):
+        """Tira da lista do trigrama as entradas mortas."""
+        vivos = []
+        for cpf in self._ngramas[grama]:
+            mortos = self._mortos.get(cpf)
+            if mortos is not None and grama in mortos:
+                mortos.discard(grama)
+                if not mortos:
+                    del self._mortos[cpf]
+            else:
+                vivos.append(cpf)
+        del self._lixo[grama]
+        if not vivos:
+            del self._ngramas[grama]
+        elif isinstance(self._ngramas[grama], array):
+            self._ngramas[grama] = array("q", vivos)
+        else:
+            self._ngramas[grama] = vivos
+
+    def chave(self, cpf):
+        """Chave de busca (nome normalizado) de um CPF indexado, ou None."""
+        return self._chave_por_cpf.get(cpf)
+
+    def na_posicao(self, posicao):
+        """CPF que ocupa a posição indicada da ordem alfabética (IndexError se não houver)."""
+        return self._chaves[posicao][1]
+
+    def filtrar(self, cpfs, termo, cancelado=None):
+        """Mantém, na mesma ordem, só os CPFs cujo nome atende ao termo (veja casa_nome).
+
+        Serve para estreitar o resultado de uma busca por um termo que este estende.
+        """
+        chave = normalizar(termo)
+        resultado = []
+        for inicio in range(0, len(cpfs), PASSO_CANCELAMENTO):
+            verificar_cancelamento(cancelado)
+            resultado.extend(cpf for cpf in cpfs[inicio:inicio + PASSO_CANCELAMENTO]
+                             if casa_nome(chave, self._chave_por_cpf.get(cpf, "")))
+        return resultado
+
+    def buscar_prefixo(self, prefixo):
+        """Retorna, em ordem alfabética, os CPFs cujo nome começa com o prefixo.
+
+        Duas bisseções delimitam a faixa no vetor ordenado: o custo é o do resultado.
+        """
+        chave = normalizar(prefixo)
+        inicio = bisect_left(self._chaves, (chave,))
+        fim = bisect_left(self._chaves, (chave + _FIM,))
+        return [cpf for _, cpf in self._chaves[inicio:fim]]
+
+    def buscar(self, termo, cancelado=None):
+        """Retorna, em ordem alfabética, os CPFs cujo nome atende ao termo (veja casa_nome).
+
+        Termos curtos (uma ou duas letras digitadas) vão para buscar_prefixo: um trecho tão
+        curto casaria com quase todo o cadastro e só uma varredura o atenderia. Os demais
+        usam os trigramas. cancelado é uma função opcional consultada durante as
+        varreduras longas; se ela retornar True, a busca é interrompida com BuscaCancelada.
+        """
+        chave = normalizar(termo)
+        if len(chave) < TAMANHO_NGRAMA:
+            return self.buscar_prefixo(chave)  # Sem termo, a faixa é o vetor inteiro
+
+        # Todo acerto está na lista de cada trigrama do termo; basta percorrer a menor
+        candidatos = min((self._ngramas.get(grama, ()) for grama in ngramas(chave)), key=len)
+        acertos = []
+        for inicio in range(0, len(candidatos), PASSO_CANCELAMENTO):
+            verificar_cancelamento(cancelado)
+            # Os trigramas só filtram candidatos; a confirmação final é pelo trecho completo
+            for cpf in candidatos[inicio:inicio + PASSO_CANCELAMENTO]:
+                nome = self._chave_por_cpf.get(cpf)  # None: entrada morta de um CPF excluído
+                if nome is not None and chave in nome:
+                    acertos.append((nome, cpf))
+        acertos.sort()
+        return [cpf for _, cpf in acertos]
+
+    def __len__(self):
+        return len(self._chaves)
+
+
+class CacheBuscas:
+    """Cache LRU de resultados de busca, indexado por (tipo de busca, termo normalizado).
+
+    Guarda a lista de CPFs de cada resultado, na ordem dele. O tamanho é limitado pelo
+    número de buscas e pelo total de CPFs guardados; as usadas há mais tempo saem
+    primeiro. Quem usa mantém as listas em dia quando os cadastros mudam (via itens(),
+    descartar() e limpar()) e as protege com a própria trava: o cache não tem trava.
+    """
+
+    def __init__(self, buscas=CACHE_BUSCAS, cpfs=CACHE_CPFS):
+        self.buscas = buscas
+        self.cpfs = cpfs
+        self._resultados = OrderedDict()
+        self.zerar_contadores()
+
+    def consultar(self, chave, estreitar=False):
+        """Procura uma busca guardada e retorna (cpfs, chave da busca usada), ou (None, None).
+
+        Com estreitar=True, se o termo exato não estiver guardado, usa a busca guardada
+        de maior termo que seja prefixo dele (o resultado dela contém o desta, e quem
+        chama filtra). Os contadores de acertos, estreitadas e faltas são atualizados.
+        """
+        tipo, termo = chave
+        candidatas = [chave]
+        if estreitar:
+            candidatas.extend((tipo, termo[:fim]) for fim in range(len(termo) - 1, 0, -1))
+        for candidata in candidatas:
+            cpfs = self._resultados.get(candidata)
+            if cpfs is not None:
+                self._resultados.move_to_end(candidata)
+                if candidata == chave:
+                    self.acertos += 1
+                else:
+                    self.estreitadas += 1
+                return cpfs, candidata
+        self.faltas += 1
+        return None, None
+
+    def guardar(self, chave, cpfs):
+        """Guarda o resultado de uma busca, descartando as mais antigas se passar dos limites."""
+        if len(cpfs) > self.cpfs:
+            return
+        self._resultados[chave] = cpfs
+        self._resultados.move_to_end(chave)
+        while (len(self._resultados) > self.buscas
+               or sum(map(len, self._resultados.values())) > self.cpfs):
+            self._resultados.popitem(last=False)
+
+    def itens(self):
+        """Retorna uma cópia da lista de (chave, cpfs); as listas podem ser alteradas no lugar."""
+        return list(self._resultados.items())
+
+    def descartar(self, chave):
+        self._resultados.pop(chave, None)
+
+    def limpar(self):
+        self._resultados.clear()
+
+    def zerar_contadores(self):
+        self.acertos = 0
+        self.estreitadas = 0
+        self.faltas = 0
+
+    def estatisticas(self):
+        """Contadores para ajustar o cache: acertos exatos, estreitadas, faltas e ocupação."""
+        consultas = self.acertos + self.estreitadas + self.faltas
+        return {
+            "acertos": self.acertos,
+            "estreitadas": self.estreitadas,
+            "faltas": self.faltas,
+            "taxa_acerto": (self.acertos + self.estreitadas) / consultas if consultas else 0.0,
+            "buscas": len(self._resultados),
+            "cpfs": sum(map(len, self._resultados.values())),
+        }
+
+    def __len__(self):
+        return len(self._resultados)
+
+
+class BuscaAssincrona:
+    """Executa as buscas do histórico numa thread de fundo.
+
+    Cada pedido espera atraso_ms sem novas teclas (debounce) antes de ir para a
+    thread; um pedido mais novo cancela o anterior, esteja ele na fila ou em
+    execução. O resultado volta para a thread do Tk por sondagem com root.after.
+    Se a busca falhar (ex.: banco ocupado, servidor fora do ar), a exceção vai para
+    ao_falhar(erro) no lugar do resultado e a thread continua atendendo os pedidos.
+    """
+
+    def __init__(self, root, executar, ao_concluir, atraso_ms=150, intervalo_ms=30, ao_falhar=None):
+        self.root = root
+        self._executar = executar  # executar(termo, cancelado) -> resultado
+        self.ao_concluir = ao_concluir
+        self.ao_falhar = ao_falhar
+        self.atraso_ms = atraso_ms
+        self.intervalo_ms = intervalo_ms
+        self._geracao = 0
+        self._enviada = 0
+        self._entregue = 0
+        self._agendado = None
+        self._sondagem = None
+        self._pendente = None
+        self._encerrada = False
+        self._condicao = threading.Condition()
+        self._resultados = queue.Queue()
+        self._thread = threading.Thread(target=self._trabalhar, daemon=True)
+        self._thread.start()
+
+    def pedir(self, termo):
+        """Agenda uma busca; chamadas em sequência rápida resultam numa só consulta."""
+        self.cancelar()
+        self._agendado = self.root.after(self.atraso_ms, self._enviar, self._geracao, termo)
+
+    def cancelar(self):
+        """Descarta o pedido agendado e invalida a busca em andamento."""
+        self._geracao += 1
+        if self._agendado is not None:
+            self.root.after_cancel(self._agendado)
+            self._agendado = None
+
+    def encerrar(self):
+        """Cancela tudo e finaliza a thread de fundo."""
+        self.cancelar()
+        with self._condicao:
+            self._encerrada = True
+            self._condicao.notify()
+
+    def _enviar(self, geracao, termo):
+        """Entrega o pedido à thread de fundo e começa a sondar o resultado."""
+        self._agendado = None
+        self._enviada = geracao
+        with self._condicao:
+            self._pendente = (geracao, termo)
+            self._condicao.notify()
+        if self._sondagem is None:
+            self._sondagem = self.root.after(self.intervalo_ms, self._sondar)
+
+    def _trabalhar(self):
+        """Laço da thread de fundo: sempre atende só o pedido mais recente."""
+        while True:
+            with self._condicao:
+                while self._pendente is None and not self._encerrada:
+                    self._condicao.wait()
+                if self._encerrada:
+                    return
+                geracao, termo = self._pendente
+                self._pendente = None
+            try:
+                resultado = self._executar(termo, lambda: geracao != self._geracao)
+            except BuscaCancelada:
+                continue
+            except Exception as erro:
+                self._resultados.put((geracao, None, erro))
+                continue
+            self._resultados.put((geracao, resultado, None))
+
+    def _sondar(self):
+        """Repassa à interface o resultado (ou a falha) da busca atual; descarta os obsoletos."""
+        self._sondagem = None
+        while True:
+            try:
+                geracao, resultado, erro = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            if geracao == self._geracao:
+                self._entregue = geracao
+                if erro is None:
+                    self.ao_concluir(resultado)
+                elif self.ao_falhar:
+                    self.ao_falhar(erro)
+        if self._enviada == self._geracao != self._entregue:
+            self._sondagem = self.root.after(self.intervalo_ms, self._sondar)
@@ -0,0 +1,179 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from benchmark import PRIMEIROS_NOMES, SOBRENOMES, gerar_clientes, popular_banco, resumo_tempos
+
+# Proporção de cada operação na carga (somam 1)
+MISTURA = (("buscar", 0.6), ("listar", 0.25), ("obter", 0.05), ("criar_excluir", 0.1))
+# Cada requisição é uma amostra; criar_excluir gera uma de "criar" e, se criou, uma de "excluir"
+REQUISICOES = ("buscar", "listar", "obter", "criar", "excluir")
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor_local(pasta, quantidade, leitores):
+    """Sobe servidor.py num processo separado, sobre um banco com clientes sintéticos."""
+    banco = os.path.join(pasta, "carga.db")
+    popular_banco(banco, gerar_clientes(quantidade))
+    porta = _porta_livre()
+    servidor = os.path.join(os.path.dirname(os.path.abspath(__file__)), "servidor.py")
+    processo = subprocess.Popen([sys.executable, servidor, "--banco", banco, "--porta", str(porta),
+                                 "--leitores", str(leitores)], stdout=subprocess.DEVNULL)
+    prazo = time.monotonic() + 30
+    while time.monotonic() < prazo:
+        try:
+            with socket.create_connection(("127.0.0.1", porta), timeout=0.5):
+                return processo, f"http://127.0.0.1:{porta}"
+        except OSError:
+            time.sleep(0.1)
+    processo.kill()
+    raise RuntimeError("O servidor não respondeu a tempo.")
+
+
+class Usuario(threading.Thread):
+    """Simula uma mesa: faz requisições em sequência, numa conexão keep-alive, até o prazo."""
+
+    def __init__(self, url, prazo, semente):
+        super().__init__(daemon=True)
+        partes = urlsplit(url)
+        self.conexao = http.client.HTTPConnection(partes.hostname, partes.port, timeout=30)
+        self.prazo = prazo
+        self.aleatorio = random.Random(semente)
+        self.novos = gerar_clientes(10 ** 6, semente=10_000 + semente)
+        self.tempos = {nome: [] for nome in REQUISICOES}
+        self.erros = 0
+        self.marcador = None  # Próxima página da listagem
+        self.conhecidos = []  # CPFs vistos nas respostas, para as consultas por CPF
+
+    def _requisitar(self, amostra, metodo, caminho, corpo=None, esperado=(200,)):
+        """Faz uma requisição, guarda o tempo dela em self.tempos[amostra] e retorna (status, JSON).
+
+        O JSON vem None se a resposta for vazia ou o status não estiver em esperado.
+        """
+        dados = None if corpo is None else json.dumps(corpo).encode("utf-8")
+        inicio = time.perf_counter()
+        self.conexao.request(metodo, caminho, body=dados,
+                             headers={"Content-Type": "application/json"} if dados else {})
+        resposta = self.conexao.getresponse()
+        conteudo = resposta.read()
+        self.tempos[amostra].append(time.perf_counter() - inicio)
+        if resposta.status not in esperado:
+            self.erros += 1
+            return resposta.status, None
+        return resposta.status, json.loads(conteudo) if conteudo else None
+
+    def buscar(self):
+        termo = self.aleatorio.choice(PRIMEIROS_NOMES)[:self.aleatorio.randint(2, 5)]
+        if self.aleatorio.random() < 0.5:
+            termo += " " + self.aleatorio.choice(SOBRENOMES)[:3]
+        _, resultado = self._requisitar("buscar", "GET", "/clientes/busca?" + urlencode({"q": termo, "limite": 50}))
+        if resultado and resultado["itens"]:
+            self.conhecidos.append(resultado["itens"][0]["cpf"])
+
+    def listar(self):
+        parametros = {"limite": 100}
+        if self.marcador:
+            parametros.update(depois_nome=self.marcador["nome"], depois_cpf=self.marcador["cpf"])
+        _, resultado = self._requisitar("listar", "GET", "/clientes?" + urlencode(parametros))
+        self.marcador = resultado and resultado["proximo"]
+
+    def obter(self):
+        if self.conhecidos:
+            self._requisitar("obter", "GET", f"/clientes/{self.aleatorio.choice(self.conhecidos)}",
+                             esperado=(200, 404))
+
+    def criar_excluir(self):
+        cadastro = next(self.novos)
+        status, _ = self._requisitar("criar", "POST", "/clientes", cadastro, esperado=(201, 409))
+        # Um 409 quer dizer que o CPF já é de um cliente de verdade: só apaga o que criou
+        if status == 201:
+            self._requisitar("excluir", "DELETE", f"/clientes/{cadastro['cpf']}", esperado=(204, 404))
+
+    def run(self):
+        nomes = [nome for nome, _ in MISTURA]
+        pesos = [peso for _, peso in MISTURA]
+        while time.monotonic() < self.prazo:
+            operacao = self.aleatorio.choices(nomes, pesos)[0]
+            try:
+                getattr(self, operacao)()
+            except (http.client.HTTPException, OSError):
+                self.erros += 1
+                self.conexao.close()
+        self.conexao.close()
+
+
+def executar_carga(url, usuarios, duracao):
+    """Roda a carga e retorna o relatório com requisições por segundo e latências."""
+    prazo = time.monotonic() + duracao
+    simulados = [Usuario(url, prazo, semente) for semente in range(usuarios)]
+    inicio = time.perf_counter()
+    for usuario in simulados:
+        usuario.start()
+    for usuario in simulados:
+        usuario.join()
+    decorrido = time.perf_counter() - inicio
+
+    relatorio = {"usuarios": usuarios, "duracao_s": round(decorrido, 2),
+                 "erros": sum(u.erros for u in simulados), "operacoes": {}}
+    todos = []
+    for nome in REQUISICOES:
+        tempos = [t for u in simulados for t in u.tempos[nome]]
+        todos.extend(tempos)
+        if tempos:
+            relatorio["operacoes"][nome] = resumo_tempos(tempos)
+    requisicoes = len(todos)
+    relatorio["requisicoes"] = requisicoes
+    relatorio["requisicoes_por_s"] = round(requisicoes / decorrido, 1)
+    relatorio["geral"] = resumo_tempos(todos) if todos else None
+    return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor de clientes (servidor.py).")
+    parser.add_argument("--url", help="Servidor já em execução (padrão: sobe um local com dados sintéticos)")
+    parser.add_argument("--clientes", type=int, default=100_000, help="Clientes sintéticos do servidor local")
+    parser.add_argument("--leitores", type=int, default=4, help="Leitores do servidor local")
+    parser.add_argument("--usuarios", type=int, default=16, help="Mesas simultâneas (conexões)")
+    parser.add_argument("--duracao", type=float, default=10, help="Duração da carga em segundos")
+    parser.add_argument("--saida", help="Grava o relatório em JSON neste arquivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        processo = None
+        url = args.url
+        if not url:
+            print(f"Subindo servidor local com {args.clientes} clientes...", flush=True)
+            processo, url = iniciar_servidor_local(pasta, args.clientes, args.leitores)
+        try:
+            relatorio = executar_carga(url, args.usuarios, args.duracao)
+        finally:
+            if processo:
+                processo.terminate()
+                processo.wait()
+
+    geral = relatorio["geral"] or {}
+    print(f"{relatorio['requisicoes']} requisições em {relatorio['duracao_s']} s: "
+          f"{relatorio['requisicoes_por_s']} req/s, p99 {geral.get('p99_ms')} ms, {relatorio['erros']} erros")
+    for nome, tempos in relatorio["operacoes"].items():
+        print(f"  {nome:14} n={tempos['n']:<7} mediana {tempos['mediana_ms']} ms  p99 {tempos['p99_ms']} ms")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
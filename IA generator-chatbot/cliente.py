@@ -0,0 +1,98 @@
+import sys
+from collections.abc import Mapping
+
+CAMPOS = ("cpf", "nome", "telefone", "gmail", "data")
+
+
+class CpfTexto(str):
+    """Chave de um CPF fora do padrão (ex.: linha antiga com pontuação): o texto, ordenado depois dos int.
+
+    As chaves misturam int e texto e o índice de nomes ordena pares (nome, chave): dois
+    clientes de mesmo nome com chaves de tipos diferentes seriam comparados, e int com
+    str levanta TypeError. Este texto se declara maior que qualquer int, o que dá uma
+    ordem total; entre textos vale a ordem de str, e hash e igualdade são os de str.
+    """
+
+    __slots__ = ()
+
+    def __lt__(self, outro):
+        return False if isinstance(outro, int) else str.__lt__(self, outro)
+
+    def __le__(self, outro):
+        return False if isinstance(outro, int) else str.__le__(self, outro)
+
+    def __gt__(self, outro):
+        return True if isinstance(outro, int) else str.__gt__(self, outro)
+
+    def __ge__(self, outro):
+        return True if isinstance(outro, int) else str.__ge__(self, outro)
+
+
+def compactar_cpf(cpf):
+    """Chave compacta de um CPF: int para os 11 dígitos de sempre, CpfTexto nos demais casos.
+
+    Um int ocupa metade de um texto de 11 caracteres; o texto original é recuperado
+    com zeros à esquerda (f"{cpf:011d}").
+    """
+    if isinstance(cpf, str):
+        if len(cpf) == 11 and cpf.isascii() and cpf.isdigit():
+            return int(cpf)
+        return CpfTexto(cpf)
+    return cpf
+
+
+def _compactar_telefone(telefone):
+    """Guarda como int os telefones só com dígitos e sem zero à esquerda (o texto volta igual)."""
+    # isascii: isdigit também aceita "²" e outros dígitos que int() não converte
+    if (isinstance(telefone, str) and telefone.isascii() and telefone.isdigit() and telefone[0] != "0"
+            and len(telefone) <= 18):
+        return int(telefone)
+    return telefone
+
+
+class Cliente(Mapping):
+    """Cadastro de cliente em memória, compacto, que se comporta como o dicionário de antes.
+
+    Usa __slots__ em vez de um dicionário por registro, guarda CPF e telefone como
+    inteiros e compartilha (sys.intern) os textos de data, que se repetem muito. A
+    leitura continua igual à dos dicionários: cliente['nome'], cliente.get('data'),
+    dict(cliente) e comparação com dicionários funcionam normalmente.
+    """
+
+    __slots__ = ("chave", "nome", "_telefone", "gmail", "data")
+
+    def __init__(self, cpf, nome, telefone, gmail, data):
+        self.chave = compactar_cpf(cpf)  # Chave do repositório e do índice de nomes
+        self.nome = nome
+        self._telefone = _compactar_telefone(telefone)
+        self.gmail = gmail
+        self.data = sys.intern(data) if isinstance(data, str) else data
+
+    @classmethod
+    def de_cadastro(cls, cadastro):
+        """Converte um dicionário de cadastro (ou outro Cliente) num Cliente."""
+        if isinstance(cadastro, cls):
+            return cadastro
+        return cls(cadastro['cpf'], cadastro['nome'], cadastro['telefone'], cadastro['gmail'], cadastro['data'])
+
+    @property
+    def cpf(self):
+        return f"{self.chave:011d}" if isinstance(self.chave, int) else self.chave
+
+    @property
+    def telefone(self):
+        return str(self._telefone) if isinstance(self._telefone, int) else self._telefone
+
+    def __getitem__(self, campo):
+        if campo not in CAMPOS:
+            raise KeyError(campo)
+        return getattr(self, campo)
+
+    def __iter__(self):
+        return iter(CAMPOS)
+
+    def __len__(self):
+        return len(CAMPOS)
+
+    def __repr__(self):
+        return f"Cliente({dict(self)!r})"
@@ -0,0 +1,227 @@
+import argparse
+import glob
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from banco import DB_NAME, SQL_RECONSTRUIR_FTS, abrir_conexao, renovar_identidade
+
+# Páginas copiadas por passo da API de backup (~256 KB com páginas de 4 KB)
+PAGINAS_POR_PASSO = 64
+
+# Instruções da VM do SQLite entre duas medidas do arquivo que o VACUUM INTO está gravando
+PASSO_PROGRESSO_VACUUM = 100000
+
+# Cópias periódicas: intervalo padrão e quantas cópias antigas manter
+INTERVALO_PADRAO_S = 3600
+COPIAS_MANTIDAS = 24
+
+
+def _copiar_paginas(origem, destino, paginas_por_passo, ao_progresso):
+    """Copia o banco com a API de backup do SQLite, poucas páginas por vez.
+
+    A cópia roda dentro de uma transação de leitura aberta na origem: no modo WAL ela
+    fixa um instantâneo do banco, então as gravações do programa continuam livres e a
+    cópia não recomeça do zero a cada commit (o que a API faz sem esse instantâneo).
+    No fim a cópia recebe identidade própria (veja banco.renovar_identidade).
+    """
+    fonte = abrir_conexao(origem)
+    alvo = sqlite3.connect(destino)
+    try:
+        fonte.execute("BEGIN")
+        fonte.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()  # Abre o instantâneo
+
+        def progresso(status, restantes, total):
+            if ao_progresso:
+                ao_progresso(total - restantes, total)
+
+        fonte.backup(alvo, pages=paginas_por_passo, progress=progresso)
+        renovar_identidade(alvo)
+    finally:
+        alvo.close()
+        fonte.close()
+
+
+def _compactar(origem, destino, ao_progresso):
+    """Gera uma cópia compactada com VACUUM INTO, lida de um instantâneo da origem.
+
+    O VACUUM pode renumerar os rowids da Cliente; como o índice FTS aponta para eles,
+    a busca textual é reconstruída na cópia. Como na outra, a cópia recebe identidade própria.
+
+    O VACUUM não informa o próprio progresso: ele é medido pelo tamanho do arquivo em
+    construção contra as páginas em uso na origem. A contagem para uma página antes do
+    total, que só é informado depois da reconstrução da busca textual.
+    """
+    fonte = abrir_conexao(origem)
+    try:
+        if ao_progresso:
+            tamanho_pagina = fonte.execute("PRAGMA page_size").fetchone()[0]
+            total = (fonte.execute("PRAGMA page_count").fetchone()[0]
+                     - fonte.execute("PRAGMA freelist_count").fetchone()[0])
+
+            def progresso():
+                try:
+                    gravadas = os.path.getsize(destino) // tamanho_pagina
+                except OSError:
+                    gravadas = 0
+                ao_progresso(min(gravadas, total - 1), total)
+                return 0
+
+            fonte.set_progress_handler(progresso, PASSO_PROGRESSO_VACUUM)
+        fonte.execute("VACUUM INTO ?", (destino,))
+    finally:
+        fonte.close()
+    alvo = sqlite3.connect(destino)
+    try:
+        if alvo.execute("SELECT 1 FROM sqlite_master WHERE name='ClienteBusca'").fetchone():
+            with alvo:
+                alvo.execute(SQL_RECONSTRUIR_FTS)
+        renovar_identidade(alvo)
+        paginas = alvo.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        alvo.close()
+    if ao_progresso:
+        ao_progresso(paginas, paginas)
+
+
+def fazer_copia(origem, destino, compactar=False, ao_progresso=None, paginas_por_passo=PAGINAS_POR_PASSO):
+    """Copia o banco origem para o arquivo destino sem interromper quem o está usando.
+
+    Com compactar=True usa VACUUM INTO (arquivo menor, sem páginas livres); senão usa a
+    API de backup em passos de paginas_por_passo páginas. ao_progresso(copiadas, total)
+    é chamado durante a cópia; no modo compactado as duas contagens são estimativas
+    (veja _compactar).
+
+    A cópia é gravada num arquivo temporário e só então renomeada para destino, então
+    um destino existente nunca fica pela metade.
+    """
+    temporario = destino + ".tmp"
+    if os.path.exists(temporario):
+        os.remove(temporario)
+    try:
+        if compactar:
+            _compactar(origem, temporario, ao_progresso)
+        else:
+            _copiar_paginas(origem, temporario, paginas_por_passo, ao_progresso)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def restaurar_copia(copia, destino=DB_NAME):
+    """Grava uma cópia por cima do banco destino, que deve estar com o programa fechado.
+
+    Usa a API de backup no sentido inverso: copiar o arquivo por cima deixaria o -wal
+    do banco antigo para trás. O banco restaurado também ganha identidade nova, então
+    nenhum instantâneo de antes passa por válido, nem se a mesma cópia já tiver sido
+    restaurada outra vez.
+    """
+    fonte = sqlite3.connect(copia)
+    alvo = abrir_conexao(destino)
+    try:
+        fonte.backup(alvo)
+        renovar_identidade(alvo)
+    finally:
+        alvo.close()
+        fonte.close()
+
+
+def nome_da_copia(pasta, origem=DB_NAME, quando=None):
+    """Caminho de uma cópia datada: <pasta>/DBcliente-20240131-235959.db."""
+    base = os.path.splitext(os.path.basename(origem))[0]
+    return os.path.join(pasta, f"{base}-{(quando or datetime.now()):%Y%m%d-%H%M%S}.db")
+
+
+class CopiasPeriodicas:
+    """Faz cópias datadas do banco numa thread de fundo, a cada intervalo_s segundos.
+
+    Só as `manter` cópias mais recentes ficam na pasta. Erros de uma rodada vão para
+    ao_erro(erro) (se informado) e não interrompem as próximas. `ultima` guarda o
+    momento (datetime) da última cópia bem-sucedida, ou None.
+    """
+
+    def __init__(self, origem, pasta, intervalo_s=INTERVALO_PADRAO_S, manter=COPIAS_MANTIDAS,
+                 compactar=False, ao_erro=None):
+        self.origem = origem
+        self.pasta = pasta
+        self.intervalo_s = intervalo_s
+        self.manter = manter
+        self.compactar = compactar
+        self.ao_erro = ao_erro
+        self.ultima = None
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._trabalhar, daemon=True)
+
+    def iniciar(self):
+        os.makedirs(self.pasta, exist_ok=True)
+        self._thread.start()
+
+    def encerrar(self):
+        """Pede o fim da thread e espera a cópia em andamento terminar."""
+        self._parar.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def copiar_agora(self):
+        """Faz uma cópia datada e apaga as mais antigas além do limite."""
+        fazer_copia(self.origem, nome_da_copia(self.pasta, self.origem), self.compactar)
+        base = os.path.splitext(os.path.basename(self.origem))[0]
+        copias = sorted(glob.glob(os.path.join(glob.escape(self.pasta), f"{glob.escape(base)}-*.db")))
+        for antiga in copias[:-self.manter]:
+            os.remove(antiga)
+
+    def _trabalhar(self):
+        """Faz a primeira cópia logo ao iniciar e depois uma a cada intervalo."""
+        while True:
+            try:
+                self.copiar_agora()
+                self.ultima = datetime.now()
+            except (OSError, sqlite3.Error) as erro:
+                if self.ao_erro:
+                    self.ao_erro(erro)
+            if self._parar.wait(self.intervalo_s):
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Faz cópias de segurança do banco sem fechar o programa.")
+    parser.add_argument("destino", help="Arquivo da cópia ou, com --intervalo, pasta das cópias datadas; "
+                                        "com --restaurar, a cópia a restaurar")
+    parser.add_argument("--banco", default=DB_NAME, help="Banco SQLite de origem")
+    parser.add_argument("--compactar", action="store_true", help="Usa VACUUM INTO (cópia compactada)")
+    parser.add_argument("--intervalo", type=float, help="Repete a cópia a cada N segundos")
+    parser.add_argument("--manter", type=int, default=COPIAS_MANTIDAS, help="Cópias datadas mantidas")
+    parser.add_argument("--restaurar", action="store_true",
+                        help="Grava a cópia informada por cima do banco (com o programa fechado)")
+    args = parser.parse_args()
+
+    if args.restaurar:
+        restaurar_copia(args.destino, args.banco)
+        print(f"{args.destino} restaurada em {args.banco}.")
+        return
+
+    if args.intervalo:
+        copias = CopiasPeriodicas(args.banco, args.destino, args.intervalo, args.manter, args.compactar,
+                                  ao_erro=lambda erro: print(f"Falha na cópia: {erro}"))
+        copias.iniciar()
+        print(f"Copiando {args.banco} para {args.destino} a cada {args.intervalo:g} s (Ctrl+C para parar).")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            copias.encerrar()
+        return
+
+    def mostrar(copiadas, total):
+        print(f"\r{copiadas}/{total} páginas", end="", flush=True)
+
+    fazer_copia(args.banco, args.destino, args.compactar, ao_progresso=mostrar)
+    print(f"\nCópia gravada em {args.destino}.")
+
+
+if __name__ == "__main__":
+    main()
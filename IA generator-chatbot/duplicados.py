@@ -0,0 +1,172 @@
+import argparse
+import re
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from banco import DB_NAME, GerenciadorConexoes, iterar_clientes
+from busca import normalizar
+from validacao import somente_digitos
+
+# Peso de cada campo na pontuação de semelhança (somam 1)
+PESOS = {"nome": 0.45, "cpf": 0.3, "telefone": 0.1, "gmail": 0.1, "data": 0.05}
+LIMIAR_PADRAO = 0.6
+
+# Blocos maiores que isso (ex.: um sobrenome muito comum) são ignorados para aquela
+# chave: compará-los par a par voltaria a ser quadrático. Os de CPF não têm limite:
+# todos os seus pares são candidatos, por maior que seja o bloco
+LIMITE_BLOCO = 500
+
+# Regras do código fonético, aplicadas em ordem sobre o nome sem acentos
+_REGRAS_FONETICAS = (
+    (re.compile(r"[^a-z ]"), ""),
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"ch|sh"), "x"),
+    (re.compile(r"lh"), "l"),
+    (re.compile(r"nh"), "n"),
+    (re.compile(r"qu|q"), "k"),
+    (re.compile(r"gu(?=[ei])"), "g"),
+    (re.compile(r"c(?=[ei])"), "s"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"z"), "s"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"h"), ""),
+    (re.compile(r"(?<=\w)[aeiou]"), ""),  # Mantém só a vogal inicial
+    (re.compile(r"(\w)\1+"), r"\1"),
+)
+
+
+def codigo_fonetico(palavra):
+    """Código fonético simplificado para português: "Matheus" e "Mateus" dão "mts"."""
+    codigo = normalizar((palavra or "").casefold().replace("ç", "s"))
+    for padrao, troca in _REGRAS_FONETICAS:
+        codigo = padrao.sub(troca, codigo)
+    return codigo
+
+
+def chaves_de_bloco(cadastro):
+    """Retorna as chaves baratas usadas para agrupar possíveis duplicados."""
+    chaves = []
+    cpf = somente_digitos(cadastro.get("cpf") or "")
+    if cpf:
+        chaves.append(("cpf", cpf))
+    telefone = somente_digitos(cadastro.get("telefone") or "")
+    if len(telefone) >= 8:
+        # Só o final do número: ignora DDD e o nono dígito dos celulares
+        chaves.append(("telefone", telefone[-8:]))
+    local = normalizar((cadastro.get("gmail") or "").partition("@")[0])
+    local = local.partition("+")[0].replace(".", "")
+    if local:
+        chaves.append(("gmail", local))
+    palavras = normalizar(cadastro.get("nome") or "").split()
+    if palavras:
+        chaves.append(("nome", codigo_fonetico(palavras[0]) + " " + codigo_fonetico(palavras[-1])))
+    return chaves
+
+
+def pontuar(a, b):
+    """Semelhança entre dois cadastros, de 0 a 1, e os campos que coincidem."""
+    nome_a, nome_b = normalizar(a.get("nome")), normalizar(b.get("nome"))
+    comparador = SequenceMatcher(None, nome_a, nome_b, autojunk=False)
+    semelhanca_nome = comparador.ratio() if nome_a and nome_b else 0.0
+    pontuacao = PESOS["nome"] * semelhanca_nome
+    iguais = []
+    if semelhanca_nome >= 0.85:
+        iguais.append("nome")
+    comparacoes = {
+        "cpf": (somente_digitos(a.get("cpf") or ""), somente_digitos(b.get("cpf") or "")),
+        "telefone": (somente_digitos(a.get("telefone") or "")[-8:], somente_digitos(b.get("telefone") or "")[-8:]),
+        "gmail": (normalizar(a.get("gmail")), normalizar(b.get("gmail"))),
+        "data": (a.get("data") or "", b.get("data") or ""),
+    }
+    for campo, (valor_a, valor_b) in comparacoes.items():
+        if valor_a and valor_a == valor_b:
+            pontuacao += PESOS[campo]
+            iguais.append(campo)
+    return pontuacao, iguais
+
+
+def encontrar_duplicados(cadastros, limiar=LIMIAR_PADRAO):
+    """Procura cadastros que provavelmente são a mesma pessoa.
+
+    Os cadastros são agrupados em blocos por chaves baratas (CPF, final do telefone,
+    parte local do e-mail sem pontos e código fonético do primeiro e último nome) e a
+    comparação detalhada só acontece entre cadastros do mesmo bloco, o que mantém o
+    trabalho próximo de linear. CPFs repetidos são sempre candidatos.
+
+    Retorna os candidatos a mesclagem, do mais para o menos parecido, como dicionários
+    com "indices" (posições em cadastros), "pontuacao", "iguais" e "chaves".
+    """
+    cadastros = list(cadastros)
+    blocos = {}
+    for indice, cadastro in enumerate(cadastros):
+        for chave in chaves_de_bloco(cadastro):
+            blocos.setdefault(chave, []).append(indice)
+
+    pares = {}
+    pontuados = set()  # Pares que dividem vários blocos são pontuados uma vez só
+    for chave, indices in blocos.items():
+        if len(indices) < 2 or (len(indices) > LIMITE_BLOCO and chave[0] != "cpf"):
+            continue
+        for i, j in combinations(indices, 2):
+            if (i, j) in pontuados:
+                if (i, j) in pares:
+                    pares[(i, j)]["chaves"].append(chave[0])
+                continue
+            pontuados.add((i, j))
+            pontuacao, iguais = pontuar(cadastros[i], cadastros[j])
+            if pontuacao >= limiar or "cpf" in iguais:
+                pares[(i, j)] = {"indices": (i, j), "pontuacao": round(pontuacao, 3),
+                                 "iguais": iguais, "chaves": [chave[0]]}
+    return sorted(pares.values(), key=lambda p: -p["pontuacao"])
+
+
+def agrupar_candidatos(candidatos):
+    """Junta os pares encadeados (A~B, B~C) em grupos de cadastros a mesclar."""
+    pai = {}
+
+    def raiz(x):
+        while pai.setdefault(x, x) != x:
+            pai[x] = pai[pai[x]]
+            x = pai[x]
+        return x
+
+    for candidato in candidatos:
+        i, j = candidato["indices"]
+        pai[raiz(i)] = raiz(j)
+    grupos = {}
+    for indice in pai:
+        grupos.setdefault(raiz(indice), []).append(indice)
+    return [sorted(grupo) for grupo in grupos.values()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lista possíveis cadastros duplicados.")
+    parser.add_argument("--banco", default=DB_NAME, help="Banco SQLite a analisar")
+    parser.add_argument("--arquivo", help="Analisa um arquivo .json, .jsonl ou .csv em vez do banco")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_PADRAO, help="Pontuação mínima (0 a 1)")
+    args = parser.parse_args()
+
+    if args.arquivo:
+        from importacao import ler_registros
+        cadastros = [r for r in ler_registros(args.arquivo) if isinstance(r, dict)]
+    else:
+        gerenciador = GerenciadorConexoes(args.banco)
+        try:
+            with gerenciador.leitura() as conn:
+                cadastros = [dict(zip(("cpf", "nome", "telefone", "gmail", "data"), row))
+                             for bloco in iterar_clientes(conn) for row in bloco]
+        finally:
+            gerenciador.fechar()
+
+    candidatos = encontrar_duplicados(cadastros, args.limiar)
+    for grupo in agrupar_candidatos(candidatos):
+        print("Possíveis duplicados:")
+        for indice in grupo:
+            c = cadastros[indice]
+            print(f"  {c.get('cpf')}  {c.get('nome')}  {c.get('telefone')}  {c.get('gmail')}  {c.get('data')}")
+    print(f"{len(candidatos)} pares candidatos entre {len(cadastros)} cadastros.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import csv
+import json
+import os
+from json.encoder import encode_basestring
+
+from banco import DB_NAME, GerenciadorConexoes, contar_clientes, iterar_clientes
+
+CAMPOS = ("cpf", "nome", "telefone", "gmail", "data")
+
+# Modelo de um objeto no formato do cadastros.json; montar o texto direto evita o
+# codificador com indentação do módulo json, que é escrito em Python puro e lento
+_MODELO_JSON = "    {{\n" + ",\n".join(f'        "{campo}": {{}}' for campo in CAMPOS) + "\n    }}"
+FORMATOS = ("csv", "jsonl", "json")
+
+
+# ---- Escritores por formato (recebem blocos de tuplas) ----
+
+def _escrever_csv(arquivo, blocos):
+    escritor = csv.writer(arquivo)
+    escritor.writerow(CAMPOS)
+    for bloco in blocos:
+        escritor.writerows(bloco)
+        yield len(bloco)
+
+
+def _valor_json(valor):
+    """Codifica um valor da tabela (texto ou NULL) como literal JSON."""
+    return "null" if valor is None else encode_basestring(str(valor))
+
+
+def _escrever_jsonl(arquivo, blocos):
+    for bloco in blocos:
+        arquivo.writelines(json.dumps(dict(zip(CAMPOS, row)), ensure_ascii=False) + "\n" for row in bloco)
+        yield len(bloco)
+
+
+def _escrever_json(arquivo, blocos):
+    """Escreve um array no mesmo formato do cadastros.json (indentação de 4 espaços)."""
+    arquivo.write("[")
+    separador = "\n"
+    for bloco in blocos:
+        for row in bloco:
+            arquivo.write(separador + _MODELO_JSON.format(*map(_valor_json, row)))
+            separador = ",\n"
+        yield len(bloco)
+    arquivo.write("\n]" if separador != "\n" else "]")
+
+
+_ESCRITORES = {"csv": _escrever_csv, "jsonl": _escrever_jsonl, "json": _escrever_json}
+
+
+def formato_do_arquivo(caminho):
+    """Deduz o formato de exportação pela extensão do arquivo."""
+    formato = os.path.splitext(caminho)[1].lower().lstrip(".")
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de arquivo não suportado: .{formato}")
+    return formato
+
+
+def exportar(gerenciador, caminho, formato=None, ao_progresso=None):
+    """Exporta a tabela Cliente para CSV, JSONL ou o formato legado do cadastros.json.
+
+    As linhas vêm do banco em blocos com fetchmany e são escritas à medida que chegam,
+    então o uso de memória não depende do tamanho da tabela. O arquivo é gravado com
+    outro nome e só substitui o destino no final, para nunca deixar uma exportação pela
+    metade. ao_progresso(exportados, total) é chamado a cada bloco.
+    Retorna o número de clientes exportados.
+    """
+    formato = formato or formato_do_arquivo(caminho)
+    escrever = _ESCRITORES[formato]
+    temporario = caminho + ".tmp"
+    exportados = 0
+    with gerenciador.leitura() as conn:
+        total = contar_clientes(conn)
+        try:
+            with open(temporario, "w", encoding="utf-8", newline="") as arquivo:
+                for quantidade in escrever(arquivo, iterar_clientes(conn)):
+                    exportados += quantidade
+                    if ao_progresso:
+                        ao_progresso(exportados, total)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+    os.replace(temporario, caminho)
+    return exportados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta os cadastros de clientes.")
+    parser.add_argument("destino", help="Arquivo .csv, .jsonl ou .json de destino")
+    parser.add_argument("--banco", default=DB_NAME, help="Banco SQLite de origem")
+    parser.add_argument("--formato", choices=FORMATOS, help="Formato (padrão: deduzido da extensão)")
+    args = parser.parse_args()
+
+    def mostrar_progresso(exportados, total):
+        print(f"\r{exportados}/{total} cadastros exportados", end="", flush=True)
+
+    gerenciador = GerenciadorConexoes(args.banco)
+    try:
+        exportados = exportar(gerenciador, args.destino, args.formato, mostrar_progresso)
+    finally:
+        gerenciador.fechar()
+    print(f"\nConcluído: {exportados} cadastros exportados para {args.destino}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import csv
+import json
+import os
+from itertools import islice
+
+from banco import DB_NAME, SQL_INSERIR, TAMANHO_CONSULTA_IN, GerenciadorConexoes, inclusao_em_massa, linha_cliente
+from validacao import somente_digitos, validar_cadastro, validar_cpfs_em_lote
+
+# Registros por executemany e lotes por transação
+TAMANHO_LOTE = 5000
+LOTES_POR_TRANSACAO = 20
+
+CAMPOS = ("cpf", "nome", "telefone", "gmail", "data")
+CAMPOS_RELATORIO = ("registro", "motivo") + CAMPOS
+
+
+# ---- Leitura dos arquivos ----
+
+def _ler_json(arquivo, tamanho_bloco=1 << 16):
+    """Lê um array JSON (formato do cadastros.json) objeto a objeto, sem carregar o arquivo inteiro."""
+    decodificador = json.JSONDecoder()
+    buffer, pos = "", 0
+    while True:
+        # Pula espaços, a abertura do array e as vírgulas entre os objetos
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,[":
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            objeto, pos = decodificador.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            bloco = arquivo.read(tamanho_bloco)
+            if not bloco:
+                if pos >= len(buffer):
+                    return
+                raise
+            buffer, pos = buffer[pos:] + bloco, 0
+            continue
+        yield objeto
+
+
+def _ler_jsonl(arquivo):
+    """Lê um objeto JSON por linha, ignorando linhas em branco."""
+    for linha in arquivo:
+        if linha.strip():
+            yield json.loads(linha)
+
+
+def ler_registros(caminho):
+    """Percorre os registros de um arquivo .json, .jsonl ou .csv, um de cada vez."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    with open(caminho, encoding="utf-8", newline="") as arquivo:
+        if extensao == ".json":
+            yield from _ler_json(arquivo)
+        elif extensao == ".jsonl":
+            yield from _ler_jsonl(arquivo)
+        elif extensao == ".csv":
+            yield from csv.DictReader(arquivo)
+        else:
+            raise ValueError(f"Formato de arquivo não suportado: {extensao}")
+
+
+def _campo(bruto, campo):
+    """Lê um campo de um registro bruto como texto sem espaços nas pontas."""
+    return str(bruto.get(campo) or "").strip() if isinstance(bruto, dict) else ""
+
+
+def preparar_cadastro(bruto, cpf_valido=None):
+    """Valida um registro bruto e o converte para o formato gravado pelo formulário.
+
+    cpf_valido pode trazer o resultado da validação de CPF feita em lote.
+    Retorna (cadastro, None) se for válido ou (None, mensagem de erro) caso contrário.
+    """
+    if not isinstance(bruto, dict):
+        return None, "Registro não é um objeto."
+    valores = {campo: _campo(bruto, campo) for campo in CAMPOS}
+    erro = validar_cadastro(**valores, cpf_valido=cpf_valido)
+    if erro:
+        return None, erro
+    valores["cpf"] = somente_digitos(valores["cpf"])
+    valores["telefone"] = somente_digitos(valores["telefone"])
+    return valores, None
+
+
+# ---- Gravação em lotes ----
+
+def _inserir_lote(conn, lote, rejeitar):
+    """Insere um lote de (número, cadastro) e retorna os cadastros aceitos.
+
+    CPFs repetidos, dentro do lote ou já presentes no banco, vão para o relatório
+    em vez de derrubar o executemany inteiro com IntegrityError.
+    """
+    unicos = {}
+    for numero, cadastro in lote:
+        if cadastro["cpf"] in unicos:
+            rejeitar(numero, cadastro, "CPF já cadastrado.")
+        else:
+            unicos[cadastro["cpf"]] = (numero, cadastro)
+
+    existentes = set()
+    cpfs = list(unicos)
+    for inicio in range(0, len(cpfs), TAMANHO_CONSULTA_IN):
+        parte = cpfs[inicio:inicio + TAMANHO_CONSULTA_IN]
+        marcadores = ",".join("?" * len(parte))
+        existentes.update(row[0] for row in
+                          conn.execute(f"SELECT cpf FROM Cliente WHERE cpf IN ({marcadores})", parte))
+
+    aceitos = []
+    for cpf, (numero, cadastro) in unicos.items():
+        if cpf in existentes:
+            rejeitar(numero, cadastro, "CPF já cadastrado.")
+        else:
+            aceitos.append(cadastro)
+
+    conn.executemany(SQL_INSERIR, map(linha_cliente, aceitos))
+    return aceitos
+
+
+def importar(gerenciador, caminho, caminho_relatorio=None, ao_inserir=None, ao_progresso=None):
+    """Importa em massa os cadastros de um arquivo .json, .jsonl ou .csv.
+
+    O arquivo é lido em fluxo, cada registro passa pelas mesmas regras do formulário
+    e os válidos são gravados com executemany em lotes de TAMANHO_LOTE, com um commit
+    a cada LOTES_POR_TRANSACAO lotes e os gatilhos de inclusão suspensos (veja
+    banco.inclusao_em_massa). Os rejeitados vão para um relatório CSV.
+
+    ao_inserir(cadastros) é chamado após cada commit com os cadastros gravados, e
+    ao_progresso(resumo) com a contagem parcial. Retorna o resumo final.
+    """
+    resumo = {"lidos": 0, "inseridos": 0, "rejeitados": 0}
+    relatorio = open(caminho_relatorio, "w", encoding="utf-8", newline="") if caminho_relatorio else None
+    escritor = csv.writer(relatorio) if relatorio else None
+    if escritor:
+        escritor.writerow(CAMPOS_RELATORIO)
+
+    def rejeitar(numero, registro, motivo):
+        resumo["rejeitados"] += 1
+        if escritor:
+            if not isinstance(registro, dict):
+                registro = {}
+            escritor.writerow([numero, motivo] + [registro.get(campo, "") for campo in CAMPOS])
+
+    def validos():
+        # Os CPFs de cada bloco de leitura são validados de uma vez só
+        numerados = enumerate(ler_registros(caminho), start=1)
+        while bloco := list(islice(numerados, TAMANHO_LOTE)):
+            resumo["lidos"] = bloco[-1][0]
+            mascara, _ = validar_cpfs_em_lote([_campo(bruto, "cpf") for _, bruto in bloco])
+            for (numero, bruto), cpf_valido in zip(bloco, mascara):
+                cadastro, erro = preparar_cadastro(bruto, bool(cpf_valido))
+                if erro:
+                    rejeitar(numero, bruto, erro)
+                else:
+                    yield numero, cadastro
+
+    def em_lotes(registros):
+        registros = iter(registros)
+        while lote := list(islice(registros, TAMANHO_LOTE)):
+            yield lote
+
+    try:
+        lotes = em_lotes(validos())
+        # Os lotes de cada transação são lidos e validados antes de pegar a conexão de
+        # escrita: enquanto ela está presa, as gravações do formulário ficam esperando
+        while transacao := list(islice(lotes, LOTES_POR_TRANSACAO)):
+            gravados = []
+            with gerenciador.escrita() as conn, inclusao_em_massa(conn):
+                for lote in transacao:
+                    gravados.extend(_inserir_lote(conn, lote, rejeitar))
+            resumo["inseridos"] += len(gravados)
+            if ao_inserir:
+                ao_inserir(gravados)
+            if ao_progresso:
+                ao_progresso(dict(resumo))
+    finally:
+        if relatorio:
+            relatorio.close()
+    return resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa cadastros de clientes em massa.")
+    parser.add_argument("arquivo", help="Arquivo .json, .jsonl ou .csv com os cadastros")
+    parser.add_argument("--banco", default=DB_NAME, help="Banco SQLite de destino")
+    parser.add_argument("--relatorio", help="CSV com os registros rejeitados "
+                                            "(padrão: <arquivo>.rejeitados.csv)")
+    args = parser.parse_args()
+
+    relatorio = args.relatorio or os.path.splitext(args.arquivo)[0] + ".rejeitados.csv"
+    gerenciador = GerenciadorConexoes(args.banco)
+    try:
+        resumo = importar(gerenciador, args.arquivo, relatorio,
+                          ao_progresso=lambda r: print(f"{r['lidos']} lidos, {r['inseridos']} inseridos..."))
+    finally:
+        gerenciador.fechar()
+    print(f"Concluído: {resumo['lidos']} lidos, {resumo['inseridos']} inseridos, "
+          f"{resumo['rejeitados']} rejeitados (detalhes em {relatorio}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from busca import VERSAO_INDICE
+
+# Instantâneo: arquivo binário com os cadastros e o índice de nomes já montados, para o
+# programa abrir sem reler a tabela inteira do banco. Layout (little-endian):
+#   cabeçalho  assinatura, versão do formato, versão do índice (busca.VERSAO_INDICE),
+#              quantidade de cadastros e maior rowid da Cliente, o (contador,
+#              identidade) do banco na gravação e o CRC-32 dos dados, que pega arquivos
+#              corrompidos
+#   seções     deslocamento e tamanho de cada seção de SECOES
+#   dados      CPFs em int64; nomes, telefones, gmails, datas, chaves de busca e trigramas
+#              como textos UTF-8 separados por "\0"; o tamanho da lista de cada trigrama
+#              e os CPFs de todas as listas, concatenados, em int64
+# Os cadastros ficam na ordem do índice (chave de busca, cpf), então a lista ordenada
+# e as listas de trigramas voltam prontas, sem normalizar nem ordenar nada.
+#
+# O ganho sobre ler do banco é de fator constante, não de ordem: a leitura poupa o SQLite,
+# a normalização dos nomes e a montagem dos trigramas, mas ainda decodifica todas as seções
+# e o repositório ainda cria um Cliente e uma entrada de índice por cadastro. O tempo cresce
+# com o cadastro (cerca de um terço do da carga pelo banco; veja ler_instantaneo_s e
+# carregar_instantaneo_s em benchmark.py), e a carga roda numa thread de fundo.
+ASSINATURA = b"REGCLI\x00\x01"
+VERSAO_FORMATO = 2
+EXTENSAO = ".instantaneo"
+SECOES = ("cpfs", "nomes", "telefones", "gmails", "datas", "chaves", "gramas", "tamanhos", "postagens")
+
+_CABECALHO = struct.Struct("<8sIIQQQ16sI")
+_SECAO = struct.Struct("<QQ")
+_SEPARADOR = "\x00"
+
+
+def caminho_instantaneo(caminho_banco):
+    """Caminho do instantâneo de um banco: DBcliente.db -> DBcliente.instantaneo."""
+    return os.path.splitext(caminho_banco)[0] + EXTENSAO
+
+
+def _inteiros(valores):
+    numeros = valores if isinstance(valores, array) else array("q", valores)
+    if sys.byteorder == "big":
+        numeros.byteswap()
+    return numeros.tobytes()
+
+
+def _ler_inteiros(dados):
+    numeros = array("q")
+    numeros.frombytes(dados)
+    if sys.byteorder == "big":
+        numeros.byteswap()
+    return numeros
+
+
+def _textos(valores):
+    dados = _SEPARADOR.join(valores).encode("utf-8")
+    if dados.count(b"\x00") != max(len(valores) - 1, 0):
+        raise ValueError("texto com o caractere separador do instantâneo")
+    return dados
+
+
+def _ler_textos(dados, quantidade):
+    textos = dados.decode("utf-8").split(_SEPARADOR) if quantidade else []
+    if len(textos) != quantidade:
+        raise ValueError("seção de textos corrompida")
+    return textos
+
+
+def serializar(clientes, indice):
+    """Monta as seções do instantâneo a partir dos cadastros (chave -> Cliente) e do IndiceNomes.
+
+    Quem chama deve impedir alterações nos dois enquanto isso roda. Levanta ValueError
+    se algum cadastro não couber no formato: CPF que não é inteiro, campo vazio (None)
+    ou texto com o caractere separador.
+    """
+    pares = indice.pares()
+    if len(pares) != len(clientes):
+        raise ValueError("índice de nomes e cadastros com tamanhos diferentes")
+    ordenados = [clientes[cpf] for _, cpf in pares]
+    gramas, tamanhos, postagens = [], [], array("q")
+    try:
+        for grama, cpfs in indice.postagens():
+            gramas.append(grama)
+            tamanhos.append(len(cpfs))
+            postagens.extend(cpfs)
+        return [
+            _inteiros(cpf for _, cpf in pares),
+            _textos([c.nome for c in ordenados]),
+            _textos([c.telefone for c in ordenados]),
+            _textos([c.gmail for c in ordenados]),
+            _textos([c.data for c in ordenados]),
+            _textos([chave for chave, _ in pares]),
+            _textos(gramas),
+            _inteiros(tamanhos),
+            _inteiros(postagens),
+        ]
+    except TypeError as erro:
+        raise ValueError(f"cadastro fora do formato do instantâneo: {erro}") from erro
+
+
+def gravar_instantaneo(caminho, identidade, contador, quantidade, maior_rowid, secoes):
+    """Grava as seções de serializar() com o estado do banco que elas refletem.
+
+    identidade e contador vêm de banco.ler_alteracoes; quantidade e maior_rowid, de
+    banco.resumir_clientes (a quantidade é também a de cadastros nas seções).
+
+    Escreve num arquivo temporário e só então o renomeia, então um instantâneo
+    existente nunca fica pela metade.
+    """
+    deslocamento = _CABECALHO.size + _SECAO.size * len(SECOES)
+    indice_secoes = []
+    crc = 0
+    for dados in secoes:
+        indice_secoes.append(_SECAO.pack(deslocamento, len(dados)))
+        deslocamento += len(dados)
+        crc = zlib.crc32(dados, crc)
+    temporario = caminho + ".tmp"
+    try:
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(_CABECALHO.pack(ASSINATURA, VERSAO_FORMATO, VERSAO_INDICE, quantidade, maior_rowid,
+                                          contador, identidade, crc))
+            arquivo.writelines(indice_secoes)
+            arquivo.writelines(secoes)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def ler_instantaneo(caminho, identidade, contador, quantidade, maior_rowid):
+    """Abre o instantâneo com mmap e o decodifica inteiro se ele refletir o estado informado do banco.
+
+    Retorna None se o arquivo não existir, for de outro banco ou de outra versão, estiver
+    velho ou corrompido; quem chama então carrega do banco. Velho é qualquer diferença
+    no contador ou no resumo das linhas (quantidade e maior rowid): o contador sozinho
+    pode coincidir num banco restaurado de uma cópia antiga. O
+    cabeçalho é conferido antes de decodificar qualquer seção. Senão retorna um
+    dicionário com as listas paralelas cpfs, nomes, telefones, gmails, datas e chaves
+    (na ordem do índice) e ngramas (trigrama -> array de CPFs).
+    """
+    try:
+        with open(caminho, "rb") as arquivo:
+            tamanho = os.fstat(arquivo.fileno()).st_size
+            if tamanho < _CABECALHO.size + _SECAO.size * len(SECOES):
+                return None
+            with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                assinatura, formato, versao_indice, *estado, crc = _CABECALHO.unpack_from(mapa)
+                if (assinatura, formato, versao_indice) != (ASSINATURA, VERSAO_FORMATO, VERSAO_INDICE):
+                    return None
+                if estado != [quantidade, maior_rowid, contador, identidade]:
+                    return None
+                secoes = {}
+                conferido = 0
+                for i, nome in enumerate(SECOES):
+                    inicio, comprimento = _SECAO.unpack_from(mapa, _CABECALHO.size + i * _SECAO.size)
+                    if inicio + comprimento > tamanho:
+                        return None
+                    secoes[nome] = mapa[inicio:inicio + comprimento]
+                    conferido = zlib.crc32(secoes[nome], conferido)
+                if conferido != crc:
+                    return None
+        return _decodificar(secoes, quantidade)
+    except (OSError, ValueError):  # UnicodeDecodeError também é ValueError
+        return None
+
+
+def _decodificar(secoes, quantidade):
+    cpfs = _ler_inteiros(secoes["cpfs"]).tolist()
+    if len(cpfs) != quantidade:
+        raise ValueError("seção de CPFs corrompida")
+    dados = {"cpfs": cpfs}
+    for nome in ("nomes", "telefones", "gmails", "datas", "chaves"):
+        dados[nome] = _ler_textos(secoes[nome], quantidade)
+
+    tamanhos = _ler_inteiros(secoes["tamanhos"])
+    gramas = _ler_textos(secoes["gramas"], len(tamanhos))
+    postagens = _ler_inteiros(secoes["postagens"])
+    if sum(tamanhos) != len(postagens):
+        raise ValueError("seção de trigramas corrompida")
+    ngramas_cpfs = {}
+    inicio = 0
+    for grama, tamanho in zip(gramas, tamanhos):
+        ngramas_cpfs[grama] = postagens[inicio:inicio + tamanho]
+        inicio += tamanho
+    dados["ngramas"] = ngramas_cpfs
+    return dados
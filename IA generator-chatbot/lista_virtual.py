@@ -0,0 +1,165 @@
+import tkinter as tk
+from tkinter import ttk
+
+from metricas import medir
+
+
+class ListaVirtual(tk.Frame):
+    """Lista rolável que só cria botões para as linhas visíveis.
+
+    Os itens ficam numa sequência comum; o canvas simula a altura total da lista e,
+    a cada rolagem, o mesmo punhado de botões é reposicionado e recebe o texto das
+    linhas que entraram na tela. O número de widgets depende só da altura da janela.
+
+    A sequência também pode ser uma visão que muda sozinha (ex.: os cadastros em
+    memória em ordem alfabética); quem a exibe chama redesenhar() quando ela mudar.
+
+    Com identificar (ex.: lambda c: c['cpf']), localizar() acha um item pela identidade
+    sem percorrer a lista: o dicionário é montado na primeira consulta e mantido pelas
+    alterações feitas por esta classe.
+    """
+
+    def __init__(self, master, ao_clicar, texto=str, altura_linha=42,
+                 vazio="Nenhum cadastro encontrado.", bg="#2c3e50", ao_chegar_ao_fim=None,
+                 identificar=None):
+        super().__init__(master, bg=bg)
+        self._ao_clicar = ao_clicar
+        self._identificar = identificar
+        self._por_id = None  # Identidade -> item, montado sob demanda por localizar()
+        # Chamado quando a rolagem se aproxima do último item (rolagem infinita)
+        self._ao_chegar_ao_fim = ao_chegar_ao_fim
+        self._fim_agendado = False
+        self._texto = texto
+        self.altura_linha = altura_linha
+        self._itens = []
+        self._geracao = 0  # Muda a cada definir_itens para invalidar as linhas já desenhadas
+        self._linhas = []  # [botão, id da janela no canvas, (geração, índice) exibido, item exibido]
+
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0, yscrollincrement=altura_linha)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._rolar)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        aviso = tk.Label(self.canvas, text=vazio, bg=bg, fg="white", font=("Segoe UI", 11))
+        self._aviso = self.canvas.create_window(0, 20, window=aviso, anchor="n", state="hidden")
+
+        self.canvas.bind("<Configure>", lambda e: self._desenhar())
+        self.canvas.bind("<MouseWheel>", self._ao_rolar_roda)
+
+    def definir_itens(self, itens, manter_rolagem=False):
+        """Troca o conteúdo da lista e volta ao topo (salvo com manter_rolagem=True)."""
+        self._itens = itens
+        self._por_id = None
+        self._geracao += 1
+        if not manter_rolagem:
+            self.canvas.yview_moveto(0)
+        self._desenhar()
+
+    def redesenhar(self):
+        """Atualiza as linhas visíveis depois de a sequência mudar por fora."""
+        self._geracao += 1
+        self._desenhar()
+
+    def adicionar_itens(self, novos):
+        """Acrescenta itens ao fim da lista sem mexer na rolagem."""
+        self._itens.extend(novos)
+        if self._por_id is not None:
+            self._por_id.update((self._identificar(item), item) for item in novos)
+        self._desenhar()
+
+    def inserir_item(self, posicao, item):
+        """Insere um item na posição indicada, redesenhando só as linhas visíveis."""
+        self._itens.insert(posicao, item)
+        if self._por_id is not None:
+            self._por_id[self._identificar(item)] = item
+        self._geracao += 1
+        self._desenhar()
+
+    def remover_item(self, posicao):
+        """Remove o item da posição indicada."""
+        if self._por_id is not None:
+            self._por_id.pop(self._identificar(self._itens[posicao]), None)
+        del self._itens[posicao]
+        self._geracao += 1
+        self._desenhar()
+
+    def itens(self):
+        """Retorna a sequência exibida atualmente."""
+        return self._itens
+
+    def localizar(self, identidade):
+        """Retorna o item com a identidade informada (veja identificar), ou None."""
+        if self._por_id is None:
+            self._por_id = {self._identificar(item): item for item in self._itens}
+        return self._por_id.get(identidade)
+
+    def _rolar(self, *args):
+        """Repassa o comando da barra de rolagem ao canvas e redesenha as linhas."""
+        self.canvas.yview(*args)
+        self._desenhar()
+
+    def _ao_rolar_roda(self, event):
+        """Rola a lista com a roda do mouse sem rolar o formulário principal."""
+        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        self._desenhar()
+        return "break"
+
+    def _criar_linha(self):
+        """Cria um botão reaproveitável e a janela do canvas que o posiciona."""
+        k = len(self._linhas)
+        botao = tk.Button(self.canvas, font=("Segoe UI", 11, "bold"),
+                          bg="#34495e", fg="white", relief="flat", anchor="w", cursor="hand2",
+                          activebackground="#2a3847", activeforeground="white",
+                          command=lambda: self._clicar(k))
+        botao.bind("<MouseWheel>", self._ao_rolar_roda)
+        janela = self.canvas.create_window(10, 0, window=botao, anchor="nw", state="hidden")
+        self._linhas.append([botao, janela, None, None])
+
+    def _clicar(self, k):
+        # O item guardado no desenho: a posição dele pode ter mudado desde então
+        botao, janela, exibido, item = self._linhas[k]
+        if exibido is not None:
+            self._ao_clicar(item)
+
+    def _chegar_ao_fim(self):
+        self._fim_agendado = False
+        self._ao_chegar_ao_fim()
+
+    @medir("interface.desenhar_lista")
+    def _desenhar(self):
+        """Posiciona os botões reaproveitados sobre as linhas atualmente visíveis."""
+        largura = self.canvas.winfo_width()
+        altura = self.canvas.winfo_height()
+        total = len(self._itens)
+        h = self.altura_linha
+
+        self.canvas.configure(scrollregion=(0, 0, largura, max(total * h, altura)))
+        self.canvas.coords(self._aviso, largura // 2, 20)
+        self.canvas.itemconfigure(self._aviso, state="hidden" if total else "normal")
+
+        primeiro = max(0, int(self.canvas.canvasy(0)) // h)
+        visiveis = altura // h + 2
+        if self._ao_chegar_ao_fim and primeiro + 2 * visiveis >= total and not self._fim_agendado:
+            self._fim_agendado = True
+            self.after_idle(self._chegar_ao_fim)
+        while len(self._linhas) < visiveis:
+            self._criar_linha()
+
+        for k, linha in enumerate(self._linhas):
+            botao, janela, exibido, _ = linha
+            i = primeiro + k
+            if k < visiveis and i < total and exibido != (self._geracao, i):
+                try:
+                    item = self._itens[i]
+                except IndexError:  # Uma visão que encolheu desde o len()
+                    total = i
+                else:
+                    botao.configure(text=self._texto(item))
+                    linha[2:] = (self._geracao, i), item
+            if k >= visiveis or i >= total:
+                self.canvas.itemconfigure(janela, state="hidden")
+                linha[2:] = None, None
+                continue
+            self.canvas.coords(janela, 10, i * h + 5)
+            self.canvas.itemconfigure(janela, state="normal", width=max(largura - 20, 1), height=h - 10)
@@ -1,65 +1,131 @@
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import messagebox, ttk, filedialog, simpledialog
 import sqlite3
 import re
 import os
-
-# Define o nome do banco de dados
-DB_NAME = "DBcliente.db"
-
-# Lista em memória para salvar os cadastros
-cadastros = []
+import atexit
+import queue
+import string
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime
+
+from banco import DB_NAME, GerenciadorConexoes
+from repositorio import RepositorioClientes, FilaEscrita, ADICIONADO, REMOVIDO, RECARREGADO
+from lista_virtual import ListaVirtual
+from busca import BuscaAssincrona
+from validacao import validar_cadastro
+from importacao import importar
+from copia import fazer_copia, nome_da_copia, CopiasPeriodicas, INTERVALO_PADRAO_S
+from instantaneo import caminho_instantaneo
+from remoto import RepositorioRemoto, FilaRemota
+import metricas
+
+# Repositório em memória com os cadastros (criado junto com a conexão)
+cadastros = None
+conexoes = None  # Gerenciador de conexões SQLite, criado sob demanda
+fila_escrita = None  # Thread que grava inclusões e exclusões sem travar a janela
+busca_historico = None  # Busca em segundo plano da barra de pesquisa do histórico
+lista_historico = None  # Lista virtual exibida na aba de histórico
+termo_exibido_historico = None  # Termo cujo resultado a lista mostra (None: lista sem filtro)
+# Marcador da próxima página da lista sem filtro (modo remoto) e se ela já foi pedida
+paginacao_historico = {"depois": None, "fim": True, "pedida": False}
+paginas_historico = None  # Leitura das páginas do servidor numa thread de fundo (modo remoto)
+eventos_cadastro = queue.Queue()  # Mudanças do repositório, aplicadas na thread do Tk
+copias_automaticas = None  # Cópias periódicas ligadas pelo menu (CopiasPeriodicas), ou None
+abas_detalhes = OrderedDict()  # CPF -> aba de detalhes aberta, da menos para a mais usada
 menu_aberto = False
 MENU_WIDTH = 0.4  # 40% da largura da janela
+INTERVALO_EVENTOS_MS = 100  # Frequência com que a interface aplica as mudanças do repositório
+INTERVALO_COPIAS_MS = 5000  # Frequência com que o menu confere a última cópia automática
+LIMITE_ABAS_DETALHES = 8  # Abas de detalhes abertas ao mesmo tempo; as menos usadas são fechadas
+# Endereço do servidor (servidor.py) para o modo remoto, ex.: http://127.0.0.1:8765; vazio usa o banco local
+SERVIDOR = os.environ.get("REGISTRO_SERVIDOR")
 
 
 # ---- Funções de persistência e utilidades ----
 
 def conectar_db():
-    """Conecta-se ao banco de dados SQLite."""
-    conn = sqlite3.connect(DB_NAME)
-    return conn
+    """Retorna o gerenciador de conexões persistente, criando-o na primeira chamada."""
+    global conexoes
+    if conexoes is None:
+        conexoes = GerenciadorConexoes(DB_NAME)
+        atexit.register(conexoes.fechar)
+    return conexoes
 
 
 def carregar_cadastros():
-    """Carrega os dados de cadastro do banco de dados."""
-    global cadastros
-    conn = conectar_db()
-    cursor = conn.cursor()
+    """Prepara o repositório e carrega os cadastros do banco numa thread de fundo.
+
+    O formulário e as gravações funcionam desde já (a fila de gravação não depende da
+    carga); o histórico fica desabilitado, com um aviso no menu lateral, até o fim.
+    """
+    global cadastros, fila_escrita, paginas_historico
+    if cadastros is None:
+        if SERVIDOR:
+            cadastros = RepositorioRemoto(SERVIDOR)
+            fila_escrita = FilaRemota(cadastros, root)
+            # Mesma mecânica da busca: thread própria, resultado entregue por sondagem, pedidos velhos descartados
+            paginas_historico = BuscaAssincrona(root, lambda depois, cancelado: cadastros.pagina(depois),
+                                                receber_pagina_historico, atraso_ms=0,
+                                                ao_falhar=avisar_falha_pagina)
+        else:
+            cadastros = RepositorioClientes(conectar_db(), caminho_instantaneo(DB_NAME))
+            fila_escrita = FilaEscrita(cadastros, root)
+            # Roda depois de a fila terminar de gravar: o próximo início abre pelo instantâneo
+            atexit.register(cadastros.salvar_instantaneo)
+        # O repositório pode avisar de uma thread de fundo; a interface aplica os avisos pela fila
+        cadastros.inscrever(lambda evento, cadastro: eventos_cadastro.put((evento, cadastro)))
+        atexit.register(fila_escrita.encerrar)  # Roda antes de fechar as conexões
+    resultado = {}
+
+    def trabalhar():
+        try:
+            cadastros.carregar()
+        except Exception as erro:  # Banco, disco ou servidor: o histórico só não é liberado
+            resultado["erro"] = erro
+
+    thread = threading.Thread(target=trabalhar, daemon=True)
+    thread.start()
+    history_btn.configure(state="disabled")
+    carregando_label.configure(text="⏳ Carregando cadastros...")
+
+    def acompanhar():
+        if thread.is_alive():
+            root.after(100, acompanhar)
+            return
+        carregando_label.configure(text="")
+        if "erro" in resultado:
+            messagebox.showerror("Cadastros", f"Não foi possível carregar os cadastros: {resultado['erro']}")
+        else:
+            history_btn.configure(state="normal")
 
-    cursor.execute(
-        "CREATE TABLE IF NOT EXISTS Cliente (cpf TEXT PRIMARY KEY, nome TEXT, telefone TEXT, gmail TEXT, data TEXT)")
+    acompanhar()
 
-    cursor.execute("SELECT * FROM Cliente")
-    cadastros = [{"cpf": row[0], "nome": row[1], "telefone": row[2], "gmail": row[3], "data": row[4]} for row in
-                 cursor.fetchall()]
 
-    conn.close()
+def salvar_cadastro_db(cadastro, ao_salvar):
+    """Envia o cadastro para a fila de gravação; ao_salvar() é chamado quando ele estiver no banco."""
+    def concluir(erro):
+        if erro is None:
+            ao_salvar()
+        elif isinstance(erro, sqlite3.IntegrityError):
+            messagebox.showerror("Erro de Cadastro", "CPF já cadastrado.")
+        else:
+            messagebox.showerror("Erro de Cadastro", f"Não foi possível salvar o cadastro: {erro}")
 
+    fila_escrita.inserir(cadastro, concluir)
 
-def salvar_cadastro_db(cadastro):
-    """Salva um novo cadastro no banco de dados."""
-    conn = conectar_db()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("INSERT INTO Cliente (cpf, nome, telefone, gmail, data) VALUES (?, ?, ?, ?, ?)",
-                       (cadastro['cpf'], cadastro['nome'], cadastro['telefone'], cadastro['gmail'], cadastro['data']))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        messagebox.showerror("Erro de Cadastro", "CPF já cadastrado.")
-        return False
-    finally:
-        conn.close()
 
+def excluir_cadastro_db(cpf, ao_excluir):
+    """Envia a exclusão para a fila de gravação; ao_excluir() é chamado quando ela estiver no banco."""
+    def concluir(erro):
+        if erro is None:
+            ao_excluir()
+        else:
+            messagebox.showerror("Exclusão", f"Não foi possível excluir o cadastro: {erro}")
 
-def excluir_cadastro_db(cpf):
-    """Exclui um cadastro do banco de dados."""
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM Cliente WHERE cpf=?", (cpf,))
-    conn.commit()
-    conn.close()
+    fila_escrita.excluir(cpf, concluir)
 
 
 def limitar_tamanho(entry_text, limite):
@@ -109,36 +175,6 @@ def formatar_telefone(event=None):
     tel_entry.icursor(tk.END)
 
 
-def validar_cpf_checksum(cpf):
-    """Verifica se o CPF é estruturalmente válido usando o algoritmo de checksum."""
-    cpf = re.sub(r'[^0-9]', '', cpf)
-
-    if len(cpf) != 11 or len(set(cpf)) == 1:
-        return False
-
-    # Valida o primeiro dígito verificador
-    soma = 0
-    for i in range(9):
-        soma += int(cpf[i]) * (10 - i)
-    resto = soma % 11
-    digito1 = 0 if resto < 2 else 11 - resto
-
-    if int(cpf[9]) != digito1:
-        return False
-
-    # Valida o segundo dígito verificador
-    soma = 0
-    for i in range(10):
-        soma += int(cpf[i]) * (11 - i)
-    resto = soma % 11
-    digito2 = 0 if resto < 2 else 11 - resto
-
-    if int(cpf[10]) != digito2:
-        return False
-
-    return True
-
-
 def validar_dados():
     """Valida os dados de entrada antes de salvar."""
     cpf = cpf_var.get()
@@ -147,29 +183,15 @@ def validar_dados():
     gmail = gmail_var.get().strip()
     data = data_var.get().strip()
 
-    if not nome:
-        messagebox.showerror("Erro de validação", "O campo 'Nome' é obrigatório.")
-        return False
-
-    if not validar_cpf_checksum(cpf):
-        messagebox.showerror("Erro de validação", "CPF inválido. Verifique o número digitado.")
-        return False
-
-    if not re.match(r"\(?\d{2}\)?\s?\d{4,5}-?\d{4}", telefone):
-        messagebox.showerror("Erro de validação", "Telefone inválido. Formato esperado: (99) 99999-9999.")
-        return False
-
-    if not re.match(r"[^@]+@[^@]+\.[^@]+", gmail):
-        messagebox.showerror("Erro de validação", "Gmail inválido.")
-        return False
-
-    if not re.match(r"\d{2}/\d{2}/\d{4}", data):
-        messagebox.showerror("Erro de validação", "Data inválida. Use o formato dd/mm/aaaa.")
+    erro = validar_cadastro(cpf, nome, telefone, gmail, data)
+    if erro:
+        messagebox.showerror("Erro de validação", erro)
         return False
 
     return True
 
 
+@metricas.medir("interface.salvar")
 def salvar():
     """Valida e salva o cadastro, atualizando o banco de dados e a interface."""
     if not validar_dados():
@@ -183,7 +205,7 @@ def salvar():
         "data": data_var.get()
     }
 
-    if salvar_cadastro_db(cadastro):
+    def ao_salvar():
         messagebox.showinfo("Cadastro realizado", f"Informações de {cadastro['nome']} salvas com sucesso!")
 
         # Limpa os campos após salvar
@@ -193,20 +215,54 @@ def salvar():
         gmail_var.set("")
         data_var.set("")
 
+    salvar_cadastro_db(cadastro, ao_salvar)
+
 
 def excluir_cadastro(cadastro_para_excluir):
     """Exclui um cadastro e atualiza a interface."""
     if messagebox.askyesno("Confirmar exclusão",
                            f"Tem certeza que deseja excluir o cadastro de {cadastro_para_excluir['nome']}?"):
-        excluir_cadastro_db(cadastro_para_excluir['cpf'])
-        mostrar_historico()
-        messagebox.showinfo("Exclusão", "Cadastro excluído com sucesso!")
+        def ao_excluir():
+            # A linha some da lista pelo evento de remoção; aqui só fecha a aba do cliente
+            fechar_aba_detalhes(cadastro_para_excluir['cpf'])
+            notebook.select(0)
+            messagebox.showinfo("Exclusão", "Cadastro excluído com sucesso!")
+
+        excluir_cadastro_db(cadastro_para_excluir['cpf'], ao_excluir)
+
+
+def fechar_aba_detalhes(cpf):
+    """Fecha a aba de detalhes de um cliente, destruindo seus widgets."""
+    aba = abas_detalhes.pop(cpf, None)
+    if aba is not None:
+        aba.destroy()  # Destruir o frame também remove a aba do notebook
+
 
+def ao_trocar_aba(event=None):
+    """Marca a aba de detalhes selecionada como a mais usada."""
+    selecionada = notebook.select()
+    for cpf, aba in abas_detalhes.items():
+        if str(aba) == selecionada:
+            abas_detalhes.move_to_end(cpf)
+            break
 
+
+@metricas.medir("interface.mostrar_detalhes")
 def mostrar_detalhes(cadastro_selecionado):
-    """Cria uma nova aba com os detalhes do cadastro selecionado."""
+    """Abre (ou reaproveita) a aba com os detalhes do cadastro selecionado."""
+    cpf = cadastro_selecionado['cpf']
+    if cpf in abas_detalhes:
+        abas_detalhes.move_to_end(cpf)
+        notebook.select(abas_detalhes[cpf])
+        return
+
+    # Mantém no máximo LIMITE_ABAS_DETALHES abas, fechando as usadas há mais tempo
+    while len(abas_detalhes) >= LIMITE_ABAS_DETALHES:
+        fechar_aba_detalhes(next(iter(abas_detalhes)))
+
     # Cria uma nova aba e a seleciona
     details_frame = tk.Frame(notebook, bg="#2c3e50")
+    abas_detalhes[cpf] = details_frame
     notebook.add(details_frame, text=cadastro_selecionado['nome'])
     notebook.select(details_frame)
 
@@ -245,16 +301,155 @@ def mostrar_detalhes(cadastro_selecionado):
                                                                                                            expand=True)
 
 
+def carregar_mais_historico():
+    """Pede ao servidor a próxima página do histórico (rolagem infinita do modo remoto).
+
+    A requisição roda numa thread de fundo; a página entra na lista por
+    receber_pagina_historico. Só há um pedido por vez.
+    """
+    if paginacao_historico["fim"] or paginacao_historico["pedida"] or search_var.get().strip():
+        return
+    paginacao_historico["pedida"] = True
+    paginas_historico.pedir(paginacao_historico["depois"])
+
+
+@metricas.medir("interface.carregar_mais_historico")
+def receber_pagina_historico(resultado):
+    """Acrescenta à lista uma página lida do servidor."""
+    pagina, proxima = resultado
+    paginacao_historico.update(depois=proxima, fim=proxima is None, pedida=False)
+    if historico_aberto():
+        lista_historico.adicionar_itens(pagina)
+
+
+def avisar_falha_pagina(erro):
+    """Mostra o erro da leitura de uma página e para a rolagem infinita até o histórico ser reaberto."""
+    paginacao_historico.update(fim=True, pedida=False)
+    messagebox.showerror("Histórico", f"Não foi possível carregar mais cadastros: {erro}")
+
+
+def reiniciar_paginacao_historico():
+    """Volta a lista do histórico para todos os cadastros, sem filtro.
+
+    No modo local a lista é a visão em ordem alfabética do repositório em memória: não
+    lê o banco nem copia nada. No remoto, começa pela primeira página do servidor e as
+    seguintes chegam conforme a rolagem se aproxima do fim.
+    """
+    global termo_exibido_historico
+    termo_exibido_historico = None
+    if not SERVIDOR:
+        paginacao_historico.update(depois=None, fim=True)
+        lista_historico.definir_itens(cadastros.em_ordem())
+        return
+    paginas_historico.cancelar()  # Uma página pedida antes não continua esta lista
+    paginacao_historico.update(depois=None, fim=False, pedida=False)
+    lista_historico.definir_itens([])
+    carregar_mais_historico()
+
+
+def historico_aberto():
+    """Diz se a lista do histórico existe (ela é recriada a cada abertura do histórico)."""
+    return lista_historico is not None and lista_historico.winfo_exists()
+
+
+# COLLATE NOCASE só ignora maiúsculas/minúsculas nas letras ASCII
+_MINUSCULAS_ASCII = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def chave_ordem_historico(cadastro):
+    """Chave da ordem da lista paginada, igual à do SQLite: nome COLLATE NOCASE, depois cpf."""
+    return (cadastro['nome'] or "").translate(_MINUSCULAS_ASCII), cadastro['cpf']
+
+
+@metricas.medir("interface.atualizar_historico")
+def atualizar_historico(evento, cadastro):
+    """Aplica uma mudança do repositório à lista do histórico sem percorrer a lista.
+
+    Com filtro, refaz a busca em segundo plano (o cache do repositório já foi corrigido,
+    então sai barato) e o resultado novo entra mantendo a rolagem. Sem filtro, a visão
+    local só é redesenhada; a lista paginada do modo remoto está na ordem de
+    chave_ordem_historico, então a linha afetada é achada por bisseção.
+    """
+    if evento == RECARREGADO:
+        pesquisar_historico()
+        return
+    termo = search_var.get()
+    if termo.strip():
+        if evento != ADICIONADO or cadastros.corresponde(termo, cadastro):
+            busca_historico.pedir(termo)
+        return
+    if not SERVIDOR:
+        lista_historico.redesenhar()  # A visão do repositório já reflete a mudança
+        return
+
+    itens = lista_historico.itens()
+    antigo = lista_historico.localizar(cadastro['cpf'])
+    if antigo is not None:
+        lista_historico.remover_item(bisect_left(itens, chave_ordem_historico(antigo), key=chave_ordem_historico))
+    if evento != REMOVIDO:
+        # Só entra se cair dentro das páginas já carregadas; senão chega com a rolagem
+        posicao = bisect_left(itens, chave_ordem_historico(cadastro), key=chave_ordem_historico)
+        if posicao < len(itens) or paginacao_historico["fim"]:
+            lista_historico.inserir_item(posicao, cadastro)
+
+
+def aplicar_eventos_cadastro():
+    """Consome, na thread do Tk, as mudanças avisadas pelo repositório."""
+    while True:
+        try:
+            evento, cadastro = eventos_cadastro.get_nowait()
+        except queue.Empty:
+            break
+        if historico_aberto():
+            atualizar_historico(evento, cadastro)
+    root.after(INTERVALO_EVENTOS_MS, aplicar_eventos_cadastro)
+
+
+def pesquisar_historico(*args):
+    """Filtra o histórico pelo termo digitado; sem termo, volta à lista paginada."""
+    if not historico_aberto():
+        return
+    termo = search_var.get()
+    if termo.strip():
+        if paginas_historico is not None:
+            paginas_historico.cancelar()  # A página pedida não cabe mais na lista filtrada
+            paginacao_historico["pedida"] = False
+        busca_historico.pedir(termo)
+    else:
+        busca_historico.cancelar()
+        reiniciar_paginacao_historico()
+
+
+def buscar_historico(termo, cancelado):
+    """Busca do histórico, na thread de fundo; devolve o termo junto com o resultado."""
+    return termo, cadastros.buscar_textual(termo, cancelado)
+
+
+def exibir_busca_historico(resultado):
+    """Mostra o resultado de uma busca; se ela só foi refeita (mesmo termo), mantém a rolagem."""
+    global termo_exibido_historico
+    termo, itens = resultado
+    lista_historico.definir_itens(itens, manter_rolagem=termo == termo_exibido_historico)
+    termo_exibido_historico = termo
+
+
+def avisar_falha_busca(erro):
+    """Mostra o erro de uma busca do histórico; a próxima tecla tenta de novo."""
+    messagebox.showerror("Histórico", f"Não foi possível pesquisar: {erro}")
+
+
+@metricas.medir("interface.mostrar_historico")
 def mostrar_historico():
     """Exibe a lista de cadastros no painel lateral."""
-    carregar_cadastros()
+    global busca_historico, lista_historico
     # Oculta o menu principal e mostra a lista de histórico
     main_menu_frame.pack_forget()
     history_frame.pack(fill="both", expand=True)
 
-    # Limpa o notebook para recriar as abas
+    # Limpa o notebook para recriar as abas (destruindo os widgets, não só escondendo)
+    abas_detalhes.clear()
     for tab in notebook.tabs():
-        notebook.forget(tab)
+        notebook.nametowidget(tab).destroy()
 
     # Cria a primeira aba de histórico
     history_list_frame = tk.Frame(notebook, bg="#2c3e50")
@@ -268,35 +463,22 @@ def mostrar_historico():
     search_entry = tk.Entry(search_frame, textvariable=search_var, font=("Segoe UI", 11), relief="flat", bd=0,
                             bg="#4f6176", fg="white")
     search_entry.pack(fill="x", padx=5, ipady=5)
-    search_var.trace("w", lambda *args: filtrar_cadastros())
 
     tk.Frame(search_frame, height=1, bg="#2c3e50").pack(fill="x")  # Adiciona a linha cinza
 
-    # Frame para a lista de botões
-    list_frame = tk.Frame(history_list_frame, bg="#2c3e50")
-    list_frame.pack(fill="both", expand=True)
-
-    def filtrar_cadastros():
-        termo = search_var.get().lower()
-        for widget in list_frame.winfo_children():
-            widget.destroy()
+    # Lista virtual: só as linhas visíveis viram botões, reaproveitados na rolagem
+    # Sem filtro, no modo remoto, as páginas vêm do servidor conforme a rolagem chega ao fim
+    lista_historico = ListaVirtual(history_list_frame, ao_clicar=mostrar_detalhes, texto=lambda c: c['nome'],
+                                   ao_chegar_ao_fim=carregar_mais_historico, identificar=lambda c: c['cpf'])
+    lista_historico.pack(fill="both", expand=True)
 
-        # Exibe os cadastros filtrados
-        cadastros_filtrados = [c for c in sorted(cadastros, key=lambda x: x['nome'].lower()) if
-                               termo in c['nome'].lower()]
+    # A busca roda numa thread própria e devolve o resultado para a lista atual
+    if busca_historico is None:
+        busca_historico = BuscaAssincrona(root, buscar_historico, exibir_busca_historico,
+                                          ao_falhar=avisar_falha_busca)
+    busca_historico.cancelar()
 
-        if not cadastros_filtrados:
-            tk.Label(list_frame, text="Nenhum cadastro encontrado.",
-                     bg="#2c3e50", fg="white", font=("Segoe UI", 11)).pack(pady=20)
-        else:
-            for cadastro in cadastros_filtrados:
-                btn = tk.Button(list_frame, text=cadastro['nome'], font=("Segoe UI", 11, "bold"),
-                                bg="#34495e", fg="white", relief="flat", anchor="w", cursor="hand2",
-                                activebackground="#2a3847", activeforeground="white",
-                                command=lambda c=cadastro: mostrar_detalhes(c))
-                btn.pack(fill="x", padx=10, pady=5)
-
-    filtrar_cadastros()  # Chama a função para exibir a lista inicial
+    reiniciar_paginacao_historico()  # Exibe a primeira página
 
     notebook.select(0)  # Seleciona a primeira aba
 
@@ -304,6 +486,7 @@ def mostrar_historico():
 def voltar_menu():
     """Volta para o menu principal do painel lateral."""
     history_frame.pack_forget()
+    stats_frame.pack_forget()
     main_menu_frame.pack(fill="both", expand=True)
 
 
@@ -329,6 +512,161 @@ def toggle_menu():
         menu_aberto = True
 
 
+def importar_cadastros():
+    """Importa em massa um arquivo .json, .jsonl ou .csv escolhido pelo usuário."""
+    caminho = filedialog.askopenfilename(title="Importar cadastros",
+                                         filetypes=[("Cadastros", "*.json *.jsonl *.csv")])
+    if not caminho:
+        return
+    relatorio = os.path.splitext(caminho)[0] + ".rejeitados.csv"
+    resultado = {}
+
+    # A importação roda numa thread para não travar a janela
+    def trabalhar():
+        try:
+            resultado["resumo"] = importar(conectar_db(), caminho, relatorio, ao_inserir=cadastros.incorporar)
+        except (OSError, ValueError, sqlite3.Error) as erro:
+            resultado["erro"] = erro
+
+    thread = threading.Thread(target=trabalhar, daemon=True)
+    thread.start()
+
+    def acompanhar():
+        if thread.is_alive():
+            root.after(200, acompanhar)
+        elif "erro" in resultado:
+            messagebox.showerror("Importação", f"Não foi possível importar o arquivo: {resultado['erro']}")
+        else:
+            resumo = resultado["resumo"]
+            messagebox.showinfo("Importação",
+                                f"{resumo['inseridos']} cadastros importados, {resumo['rejeitados']} rejeitados.\n"
+                                f"Registros rejeitados em: {relatorio}")
+
+    acompanhar()
+
+
+def copiar_banco():
+    """Faz uma cópia de segurança do banco sem fechar o programa nem travar as gravações."""
+    caminho = filedialog.asksaveasfilename(title="Cópia de segurança", defaultextension=".db",
+                                           initialfile=os.path.basename(nome_da_copia("", DB_NAME)),
+                                           filetypes=[("Banco SQLite", "*.db")])
+    if not caminho:
+        return
+    compactar = messagebox.askyesno("Cópia de segurança",
+                                    "Compactar a cópia? (mais lenta, mas gera um arquivo menor)")
+    progresso = {"copiadas": 0, "total": 0}
+    resultado = {}
+
+    # A cópia roda numa thread; a interface só acompanha o progresso
+    def trabalhar():
+        try:
+            fazer_copia(DB_NAME, caminho, compactar,
+                        ao_progresso=lambda copiadas, total: progresso.update(copiadas=copiadas, total=total))
+        except (OSError, sqlite3.Error) as erro:
+            resultado["erro"] = erro
+
+    thread = threading.Thread(target=trabalhar, daemon=True)
+    thread.start()
+    backup_btn.configure(state="disabled")
+
+    def acompanhar():
+        if thread.is_alive():
+            if progresso["total"]:
+                backup_status.configure(text=f"Copiando... {100 * progresso['copiadas'] // progresso['total']}%")
+            else:
+                backup_status.configure(text="Copiando...")
+            root.after(200, acompanhar)
+            return
+        backup_btn.configure(state="normal")
+        backup_status.configure(text="")
+        if "erro" in resultado:
+            messagebox.showerror("Cópia de segurança", f"Não foi possível copiar o banco: {resultado['erro']}")
+        else:
+            messagebox.showinfo("Cópia de segurança", f"Cópia gravada em: {caminho}")
+
+    acompanhar()
+
+
+def alternar_copias_automaticas():
+    """Liga (pedindo a pasta e o intervalo) ou desliga as cópias periódicas do banco."""
+    global copias_automaticas
+    if copias_automaticas is not None:
+        # Uma cópia em andamento termina antes de a thread parar: espera fora da thread do Tk
+        threading.Thread(target=copias_automaticas.encerrar, daemon=True).start()
+        copias_automaticas = None
+        copias_btn.configure(text="⏱️ Ligar Cópias Automáticas")
+        copias_status.configure(text="")
+        return
+    pasta = filedialog.askdirectory(title="Pasta das cópias automáticas", mustexist=False)
+    if not pasta:
+        return
+    horas = simpledialog.askfloat("Cópias automáticas", "Fazer uma cópia a cada quantas horas?",
+                                  initialvalue=INTERVALO_PADRAO_S / 3600, minvalue=0.1)
+    if not horas:
+        return
+    falha = {}  # Preenchida pela thread das cópias; a interface só a consulta
+    copias = CopiasPeriodicas(DB_NAME, pasta, horas * 3600,
+                              ao_erro=lambda erro: falha.update(quando=datetime.now(), erro=erro))
+    copias.iniciar()
+    atexit.register(copias.encerrar)  # Não deixa uma cópia pela metade ao fechar
+    copias_automaticas = copias
+    copias_btn.configure(text="⏱️ Desligar Cópias Automáticas")
+    copias_status.configure(text=f"A cada {horas:g} h em {pasta}")
+
+    def acompanhar():
+        if copias is not copias_automaticas:
+            return  # Desligadas (ou religadas com outra configuração)
+        if falha and (copias.ultima is None or falha["quando"] > copias.ultima):
+            copias_status.configure(text=f"Falha na cópia das {falha['quando']:%H:%M}: {falha['erro']}")
+        elif copias.ultima is not None:
+            copias_status.configure(text=f"A cada {horas:g} h; última às {copias.ultima:%H:%M}")
+        root.after(INTERVALO_COPIAS_MS, acompanhar)
+
+    acompanhar()
+
+
+def mostrar_estatisticas():
+    """Exibe no painel lateral os tempos medidos (só aparece com REGISTRO_METRICAS=1)."""
+    main_menu_frame.pack_forget()
+    stats_frame.pack(fill="both", expand=True)
+    atualizar_estatisticas()
+
+
+def atualizar_estatisticas():
+    """Preenche a tabela de estatísticas com o resumo atual das medições."""
+    tabela_metricas.delete(*tabela_metricas.get_children())
+    for nome, medicao in metricas.resumo().items():
+        tabela_metricas.insert("", "end", values=(nome, medicao["contagem"], medicao["media_ms"],
+                                                  medicao["p95_ms"], medicao["p99_ms"], medicao["max_ms"]))
+    if not isinstance(cadastros, RepositorioClientes):  # O repositório remoto não tem cache de buscas
+        cache_label.configure(text="")
+        return
+    contadores = cadastros.estatisticas_cache()
+    cache_label.configure(text=f"Cache de buscas: {contadores['acertos']} acertos, "
+                               f"{contadores['estreitadas']} estreitadas, {contadores['faltas']} faltas "
+                               f"({contadores['taxa_acerto']:.0%}); {contadores['buscas']} buscas guardadas")
+
+
+def salvar_estatisticas():
+    """Grava o resumo das medições num arquivo JSON escolhido pelo usuário."""
+    caminho = filedialog.asksaveasfilename(title="Salvar estatísticas", defaultextension=".json",
+                                           filetypes=[("JSON", "*.json")])
+    if not caminho:
+        return
+    try:
+        metricas.gravar(caminho)
+    except OSError as erro:
+        messagebox.showerror("Estatísticas", f"Não foi possível salvar o arquivo: {erro}")
+
+
+def zerar_estatisticas():
+    """Descarta as medições feitas até agora."""
+    metricas.zerar()
+    if isinstance(cadastros, RepositorioClientes):
+        cadastros.cache.zerar_contadores()
+    atualizar_estatisticas()
+
+
 def novo_cadastro():
     """Abre a tela de novo cadastro (fecha o menu lateral)."""
     fechar_menu()
@@ -337,13 +675,10 @@ def novo_cadastro():
 
 # ---- Janela principal ----
 root = tk.Tk()
-root.title("Cadastro de Cliente")
+root.title(f"Cadastro de Cliente — {SERVIDOR}" if SERVIDOR else "Cadastro de Cliente")
 root.geometry("1024x768")  # Define a janela para um formato de retângulo deitado
 root.configure(bg="#34495e")  # Cor de fundo mais escura
 
-# Carrega os dados existentes ao iniciar a aplicação
-carregar_cadastros()
-
 fonte_label = ("Segoe UI", 11, "bold")
 fonte_entry = ("Segoe UI", 11)
 
@@ -353,6 +688,9 @@ tel_var = tk.StringVar()
 gmail_var = tk.StringVar()
 data_var = tk.StringVar()
 search_var = tk.StringVar()  # Variável para a barra de pesquisa
+search_var.trace("w", pesquisar_historico)  # Registrado uma única vez
+
+aplicar_eventos_cadastro()
 
 # Cria um frame para o cabeçalho onde o botão estará
 header_frame = tk.Frame(root, bg="#34495e", height=40)
@@ -458,14 +796,66 @@ main_menu_frame = tk.Frame(menu_frame, bg="#2c3e50")
 history_frame = tk.Frame(menu_frame, bg="#2c3e50")
 
 # Botões do menu principal
-tk.Button(main_menu_frame, text="🔎 Histórico", font=("Segoe UI", 11, "bold"),
-          bg="#34495e", fg="white", relief="flat", activebackground="#2a3847", activeforeground="white",
-          command=mostrar_historico, cursor="hand2").pack(pady=10)
+history_btn = tk.Button(main_menu_frame, text="🔎 Histórico", font=("Segoe UI", 11, "bold"),
+                        bg="#34495e", fg="white", relief="flat", activebackground="#2a3847",
+                        activeforeground="white", command=mostrar_historico, cursor="hand2")
+history_btn.pack(pady=(10, 0))
+carregando_label = tk.Label(main_menu_frame, text="", font=("Segoe UI", 9), bg="#2c3e50", fg="white")
+carregando_label.pack(pady=(0, 10))
 
 tk.Button(main_menu_frame, text="➕ Novo Cadastro", font=("Segoe UI", 11, "bold"),
           bg="#34495e", fg="white", relief="flat", activebackground="#2a3847", activeforeground="white",
           command=novo_cadastro, cursor="hand2").pack(pady=10)
 
+# Importação e cópia de segurança trabalham sobre o arquivo local: não existem no modo remoto
+if not SERVIDOR:
+    tk.Button(main_menu_frame, text="📥 Importar Cadastros", font=("Segoe UI", 11, "bold"),
+              bg="#34495e", fg="white", relief="flat", activebackground="#2a3847", activeforeground="white",
+              command=importar_cadastros, cursor="hand2").pack(pady=10)
+
+    backup_btn = tk.Button(main_menu_frame, text="🗄️ Cópia de Segurança", font=("Segoe UI", 11, "bold"),
+                           bg="#34495e", fg="white", relief="flat", activebackground="#2a3847",
+                           activeforeground="white", command=copiar_banco, cursor="hand2")
+    backup_btn.pack(pady=(10, 0))
+    backup_status = tk.Label(main_menu_frame, text="", font=("Segoe UI", 9), bg="#2c3e50", fg="white")
+    backup_status.pack()
+
+    copias_btn = tk.Button(main_menu_frame, text="⏱️ Ligar Cópias Automáticas", font=("Segoe UI", 11, "bold"),
+                           bg="#34495e", fg="white", relief="flat", activebackground="#2a3847",
+                           activeforeground="white", command=alternar_copias_automaticas, cursor="hand2")
+    copias_btn.pack(pady=(10, 0))
+    copias_status = tk.Label(main_menu_frame, text="", font=("Segoe UI", 9), bg="#2c3e50", fg="white",
+                             wraplength=300)
+    copias_status.pack()
+
+# Painel de estatísticas: o botão só existe com a coleta de métricas ligada
+if metricas.ATIVO:
+    tk.Button(main_menu_frame, text="📊 Estatísticas", font=("Segoe UI", 11, "bold"),
+              bg="#34495e", fg="white", relief="flat", activebackground="#2a3847", activeforeground="white",
+              command=mostrar_estatisticas, cursor="hand2").pack(pady=10)
+    if metricas.ARQUIVO_SAIDA:
+        atexit.register(metricas.gravar, metricas.ARQUIVO_SAIDA)
+
+stats_frame = tk.Frame(menu_frame, bg="#2c3e50")
+stats_botoes = tk.Frame(stats_frame, bg="#2c3e50")
+stats_botoes.pack(fill="x", padx=10, pady=10)
+for texto, comando in (("🔙 Voltar ao Menu", voltar_menu), ("🔄 Atualizar", atualizar_estatisticas),
+                       ("💾 Salvar", salvar_estatisticas), ("🧹 Zerar", zerar_estatisticas)):
+    tk.Button(stats_botoes, text=texto, font=("Segoe UI", 10, "bold"),
+              bg="#34495e", fg="white", relief="flat", activebackground="#2a3847", activeforeground="white",
+              command=comando, cursor="hand2").pack(side="left", padx=(0, 5))
+
+cache_label = tk.Label(stats_frame, text="", font=("Segoe UI", 9), bg="#2c3e50", fg="white", anchor="w")
+cache_label.pack(fill="x", padx=10, pady=(0, 5))
+
+colunas_metricas = ("operacao", "contagem", "media", "p95", "p99", "max")
+tabela_metricas = ttk.Treeview(stats_frame, columns=colunas_metricas, show="headings")
+for coluna, titulo, largura in zip(colunas_metricas, ("Operação", "Chamadas", "Média (ms)", "p95 (ms)",
+                                                      "p99 (ms)", "Máx. (ms)"), (200, 70, 80, 70, 70, 80)):
+    tabela_metricas.heading(coluna, text=titulo)
+    tabela_metricas.column(coluna, width=largura, anchor="w" if coluna == "operacao" else "e")
+tabela_metricas.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
 tk.Button(history_frame, text="🔙 Voltar ao Menu", font=("Segoe UI", 11, "bold"),
           bg="#34495e", fg="white", relief="flat", activebackground="#2a3847", activeforeground="white",
           command=voltar_menu, cursor="hand2").pack(pady=10, padx=10, anchor="w")
@@ -479,5 +869,9 @@ style.map("TNotebook.Tab", background=[("selected", "#2c3e50")], foreground=[("s
 
 notebook = ttk.Notebook(history_frame)
 notebook.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+notebook.bind("<<NotebookTabChanged>>", ao_trocar_aba)
+
+# Carrega os dados existentes em segundo plano, com a janela já desenhada
+carregar_cadastros()
 
 root.mainloop()
@@ -0,0 +1,100 @@
+import json
+import math
+import os
+import threading
+import time
+from functools import wraps
+
+# Liga a coleta com REGISTRO_METRICAS=1; desligada, medir() devolve a própria função
+ATIVO = os.environ.get("REGISTRO_METRICAS", "") not in ("", "0")
+
+# Se definido, o resumo é gravado neste arquivo ao fechar o programa
+ARQUIVO_SAIDA = os.environ.get("REGISTRO_METRICAS_ARQUIVO")
+
+# Faixas do histograma em potências de 2 microssegundos: 1 µs, 2 µs, 4 µs ... ~67 s
+QUANTIDADE_FAIXAS = 27
+
+_trava = threading.Lock()
+_medicoes = {}  # Nome -> [contagem, total, mínimo, máximo, faixas]
+
+
+def _faixa(segundos):
+    """Índice da faixa do histograma onde cai uma duração."""
+    micros = segundos * 1_000_000
+    if micros <= 1:
+        return 0
+    return min(QUANTIDADE_FAIXAS - 1, math.ceil(math.log2(micros)))
+
+
+def registrar(nome, segundos):
+    """Acrescenta uma duração ao histograma da operação informada."""
+    with _trava:
+        medicao = _medicoes.get(nome)
+        if medicao is None:
+            medicao = _medicoes[nome] = [0, 0.0, segundos, segundos, [0] * QUANTIDADE_FAIXAS]
+        medicao[0] += 1
+        medicao[1] += segundos
+        medicao[2] = min(medicao[2], segundos)
+        medicao[3] = max(medicao[3], segundos)
+        medicao[4][_faixa(segundos)] += 1
+
+
+def medir(nome):
+    """Decorador que mede cada chamada da função; com a coleta desligada não muda nada."""
+    def decorar(funcao):
+        if not ATIVO:
+            return funcao
+
+        @wraps(funcao)
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                registrar(nome, time.perf_counter() - inicio)
+        return medida
+    return decorar
+
+
+def _percentil(faixas, contagem, fracao):
+    """Limite superior (em ms) da faixa que contém o percentil pedido."""
+    alvo = math.ceil(contagem * fracao)
+    acumulado = 0
+    for indice, quantidade in enumerate(faixas):
+        acumulado += quantidade
+        if acumulado >= alvo:
+            return (1 << indice) / 1000
+    return (1 << (QUANTIDADE_FAIXAS - 1)) / 1000
+
+
+def resumo():
+    """Retorna, por operação, contagem, média, mínimo, máximo e percentis aproximados (em ms)."""
+    with _trava:
+        copia = {nome: (m[0], m[1], m[2], m[3], list(m[4])) for nome, m in _medicoes.items()}
+    resultado = {}
+    for nome, (contagem, total, minimo, maximo, faixas) in sorted(copia.items()):
+        resultado[nome] = {
+            "contagem": contagem,
+            "total_ms": round(total * 1000, 3),
+            "media_ms": round(total * 1000 / contagem, 3),
+            "min_ms": round(minimo * 1000, 3),
+            "p50_ms": _percentil(faixas, contagem, 0.5),
+            "p95_ms": _percentil(faixas, contagem, 0.95),
+            "p99_ms": _percentil(faixas, contagem, 0.99),
+            "max_ms": round(maximo * 1000, 3),
+            # Histograma: limite superior da faixa em µs -> quantidade
+            "histograma_us": {1 << i: q for i, q in enumerate(faixas) if q},
+        }
+    return resultado
+
+
+def gravar(caminho):
+    """Grava o resumo das medições num arquivo JSON."""
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(resumo(), arquivo, indent=4, ensure_ascii=False)
+
+
+def zerar():
+    """Descarta todas as medições feitas até agora."""
+    with _trava:
+        _medicoes.clear()
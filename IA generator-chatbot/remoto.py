@@ -0,0 +1,160 @@
+import http.client
+import json
+import sqlite3
+import threading
+from urllib.parse import quote, urlencode, urlsplit
+
+from banco import TAMANHO_PAGINA
+from busca import palavras_sem_acento, verificar_cancelamento
+from repositorio import ADICIONADO, RECARREGADO, REMOVIDO, FilaEscrita
+
+# Quantos resultados a busca remota pede ao servidor (o limite dele é 500)
+LIMITE_BUSCA = 500
+TEMPO_LIMITE_S = 10
+
+
+class ErroServidor(Exception):
+    """Resposta de erro do servidor (status HTTP fora da faixa 2xx) ou que não é JSON."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class RepositorioRemoto:
+    """Repositório que usa o servidor HTTP (servidor.py) em vez do banco local.
+
+    Oferece a mesma interface que a janela usa do RepositorioClientes, mas não guarda
+    cópia em memória: páginas e buscas vêm do servidor a cada pedido. Cada thread usa
+    a própria conexão HTTP (keep-alive). Os eventos só refletem as mudanças feitas por
+    esta mesa; as das outras aparecem ao reabrir o histórico ou pesquisar de novo.
+    """
+
+    def __init__(self, url, tempo_limite=TEMPO_LIMITE_S):
+        partes = urlsplit(url if "://" in url else f"http://{url}")
+        self.host = partes.hostname
+        self.porta = partes.port or 80
+        self.tempo_limite = tempo_limite
+        self.carregado = False
+        self._local = threading.local()
+        self._ouvintes = []
+
+    def inscrever(self, ouvinte):
+        """Registra ouvinte(evento, cadastro) e retorna uma função que cancela a inscrição."""
+        self._ouvintes.append(ouvinte)
+        return lambda: self._ouvintes.remove(ouvinte)
+
+    def _emitir(self, evento, cadastro=None):
+        for ouvinte in list(self._ouvintes):
+            ouvinte(evento, cadastro)
+
+    def _requisitar(self, metodo, caminho, corpo=None):
+        """Faz uma requisição e retorna o JSON da resposta (None se vazia).
+
+        Levanta ErroServidor para respostas de erro ou inválidas e OSError ou
+        http.client.HTTPException se o servidor não responder. Só GET e DELETE são
+        repetidos numa conexão nova: um POST que falhou pode ter sido gravado.
+        """
+        dados = None if corpo is None else json.dumps(corpo).encode("utf-8")
+        cabecalhos = {"Content-Type": "application/json"} if dados is not None else {}
+        while True:
+            conexao = getattr(self._local, "conexao", None)
+            reaproveitada = conexao is not None
+            if not reaproveitada:
+                conexao = self._local.conexao = http.client.HTTPConnection(self.host, self.porta,
+                                                                            timeout=self.tempo_limite)
+            try:
+                conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+                resposta = conexao.getresponse()
+                conteudo = resposta.read()
+                break
+            except (http.client.HTTPException, OSError):
+                conexao.close()
+                self._local.conexao = None
+                # Uma conexão keep-alive antiga pode ter sido fechada pelo servidor: tenta com uma nova
+                if not reaproveitada or metodo == "POST":
+                    raise
+        try:
+            resultado = json.loads(conteudo) if conteudo else None
+        except ValueError:  # Ex.: página de erro de um proxy no caminho
+            mensagem = resposta.reason if resposta.status >= 300 else "Resposta inválida do servidor."
+            raise ErroServidor(resposta.status, mensagem) from None
+        if resposta.status >= 300:
+            raise ErroServidor(resposta.status, (resultado or {}).get("erro", resposta.reason))
+        return resultado
+
+    def carregar(self, forcar=False):
+        """Confere se o servidor responde (não há nada a carregar para a memória)."""
+        self._requisitar("GET", "/saude")
+        self.carregado = True
+        self._emitir(RECARREGADO)
+
+    def obter(self, cpf):
+        """Retorna o cadastro com o CPF informado, ou None."""
+        try:
+            return self._requisitar("GET", f"/clientes/{quote(cpf)}")
+        except ErroServidor as erro:
+            if erro.status == 404:
+                return None
+            raise
+
+    def buscar_textual(self, termo, cancelado=None):
+        """Busca no servidor; cancelado só é conferido antes e depois da requisição."""
+        verificar_cancelamento(cancelado)
+        resultado = self._requisitar("GET", "/clientes/busca?" + urlencode({"q": termo, "limite": LIMITE_BUSCA}))
+        verificar_cancelamento(cancelado)
+        return resultado["itens"]
+
+    buscar = buscar_textual
+
+    def corresponde(self, termo, cadastro):
+        """Aproximação local da busca do servidor: cada palavra do termo inicia uma palavra do cadastro."""
+        palavras = palavras_sem_acento(f"{cadastro['nome']} {cadastro['gmail']} {cadastro['telefone']}")
+        return all(any(p.startswith(t) for p in palavras) for t in palavras_sem_acento(termo))
+
+    def pagina(self, depois=None, limite=TAMANHO_PAGINA):
+        """Lê uma página da lista alfabética do servidor; retorna (cadastros, marcador da próxima)."""
+        parametros = {"limite": limite}
+        if depois is not None:
+            parametros.update(depois_nome=depois[0], depois_cpf=depois[1])
+        resultado = self._requisitar("GET", "/clientes?" + urlencode(parametros))
+        proximo = resultado["proximo"]
+        return resultado["itens"], (proximo["nome"], proximo["cpf"]) if proximo else None
+
+    def inserir(self, cadastro):
+        """Cria o cadastro no servidor. Levanta sqlite3.IntegrityError se o CPF já existir."""
+        try:
+            cadastro = self._requisitar("POST", "/clientes", cadastro)
+        except ErroServidor as erro:
+            if erro.status == 409:
+                # Mesmo erro do banco local, para a janela tratar os dois modos igual
+                raise sqlite3.IntegrityError(str(erro)) from erro
+            raise
+        self._emitir(ADICIONADO, cadastro)
+
+    def excluir(self, cpf):
+        """Exclui o cadastro no servidor (não faz nada se ele já não existir)."""
+        try:
+            self._requisitar("DELETE", f"/clientes/{quote(cpf)}")
+        except ErroServidor as erro:
+            if erro.status != 404:
+                raise
+            return
+        self._emitir(REMOVIDO, {"cpf": cpf})
+
+
+class FilaRemota(FilaEscrita):
+    """Fila de gravação do modo remoto: mesma interface e entrega de resultados da FilaEscrita,
+    mas cada comando vira uma requisição ao servidor (que faz o group commit do lado dele)."""
+
+    def _gravar(self, grupo):
+        for tipo, valor, ao_concluir in grupo:
+            try:
+                if tipo == self.INSERIR:
+                    self.repositorio.inserir(valor)
+                else:
+                    self.repositorio.excluir(valor)
+                erro = None
+            except Exception as falha:  # Qualquer falha vai para quem pediu; a thread continua
+                erro = falha
+            self._resultados.put((ao_concluir, erro))
@@ -0,0 +1,521 @@
+import gc
+import queue
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from banco import (iterar_clientes, inserir_cliente, atualizar_cliente, excluir_cliente, buscar_texto,
+                   montar_consulta_fts, pagina_clientes, gravar_grupo, ler_alteracoes, resumir_clientes,
+                   transacao_leitura,
+                   COMANDO_INSERIR, COMANDO_EXCLUIR, TAMANHO_PAGINA)
+from busca import (IndiceNomes, CacheBuscas, BuscaCancelada, normalizar, palavras_sem_acento, casa_nome,
+                   TAMANHO_NGRAMA)
+from cliente import Cliente, compactar_cpf
+from instantaneo import ler_instantaneo, serializar, gravar_instantaneo
+from metricas import medir
+
+# Eventos emitidos pelo repositório a cada mudança
+ADICIONADO = "adicionado"
+REMOVIDO = "removido"
+ATUALIZADO = "atualizado"
+RECARREGADO = "recarregado"  # Mudança em massa: quem observa deve reler o que exibe
+
+# Acima disso, incorporar() emite um único RECARREGADO em vez de um evento por cadastro
+LIMITE_EVENTOS_LOTE = 100
+
+# Tipos de busca guardados no cache: pelo início do nome (termos curtos) e por trecho dele,
+# ambas em memória, e textual (FTS5). Separá-los impede que o resultado de um prefixo seja
+# estreitado para um trecho: "ma" não contém "amaral", que casa com "mar".
+BUSCA_PREFIXO = "prefixo"
+BUSCA_NOME = "nome"
+BUSCA_TEXTO = "texto"
+
+
+@contextmanager
+def _sem_coleta():
+    """Desliga o coletor de lixo enquanto a carga cria os registros em massa.
+
+    Cada lote de objetos novos dispararia uma coleta que percorre todos os já criados
+    sem liberar nada; sem elas a criação dos registros fica umas três vezes mais rápida.
+    """
+    ligado = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if ligado:
+            gc.enable()
+
+
+def _retirar(cpfs, cpf):
+    try:
+        cpfs.remove(cpf)
+    except ValueError:
+        pass
+
+
+class VisaoAlfabetica:
+    """Todos os cadastros do repositório em ordem alfabética, como sequência somente leitura.
+
+    Não copia nada: cada acesso lê o índice atual, então a visão acompanha as mudanças
+    sozinha e abri-la não custa nada, com qualquer tamanho de cadastro. Outra thread
+    pode remover cadastros entre um len() e a leitura de uma posição; nesse caso a
+    posição levanta IndexError, como numa lista que encolheu.
+    """
+
+    def __init__(self, repositorio):
+        self._repositorio = repositorio
+
+    def __len__(self):
+        return len(self._repositorio.indice)
+
+    def __getitem__(self, posicao):
+        repositorio = self._repositorio
+        with repositorio.trava:
+            return repositorio._por_cpf[repositorio.indice.na_posicao(posicao)]
+
+
+class RepositorioClientes:
+    """Cópia em memória da tabela Cliente, carregada uma vez e atualizada a cada escrita.
+
+    O banco continua sendo a fonte da verdade: toda alteração é gravada primeiro no
+    SQLite e só depois aplicada à memória, então uma falha de escrita não deixa as
+    duas cópias divergentes. Os registros ficam como Cliente (compactos, mas lidos
+    como dicionários) e são indexados pela chave compacta do CPF.
+
+    Quem precisa acompanhar as mudanças se inscreve com inscrever() e recebe
+    ouvinte(evento, cadastro) para cada ADICIONADO, REMOVIDO ou ATUALIZADO (ou um
+    RECARREGADO com cadastro None). Os ouvintes podem ser chamados de threads de fundo.
+
+    Com caminho_instantaneo, a carga lê os cadastros e o índice prontos desse arquivo
+    quando ele reflete o banco (veja instantaneo.py) e salvar_instantaneo() o regrava.
+
+    As buscas passam por um cache LRU (self.cache, com contadores de acertos e faltas),
+    corrigido a cada mudança nos cadastros.
+    """
+
+    def __init__(self, gerenciador, caminho_instantaneo=None):
+        self.gerenciador = gerenciador
+        self.caminho_instantaneo = caminho_instantaneo
+        self._por_cpf = {}
+        self.indice = IndiceNomes()
+        self.carregado = False
+        self._durante_carga = None  # Mudanças (chave, cliente ou None) feitas enquanto carregar() lê o banco
+        # Identidade e contador de alterações do banco que a memória reflete (None se incerto);
+        # o contador é somado a cada mudança aplicada à memória
+        self._identidade = None
+        self._versao = None
+        self._versao_instantaneo = None  # Contador do último instantâneo lido ou gravado
+        self._trava_instantaneo = threading.Lock()
+        self.cache = CacheBuscas()
+        self._mudancas = 0  # Cresce a cada mudança na memória; invalida buscas que a atravessaram
+        # Protege a memória e o índice, que também são lidos pela thread de busca
+        self.trava = threading.RLock()
+        self._ouvintes = []
+
+    def inscrever(self, ouvinte):
+        """Registra ouvinte(evento, cadastro) e retorna uma função que cancela a inscrição."""
+        self._ouvintes.append(ouvinte)
+        return lambda: self._ouvintes.remove(ouvinte)
+
+    def _emitir(self, evento, cadastro=None):
+        for ouvinte in list(self._ouvintes):
+            ouvinte(evento, cadastro)
+
+    @medir("repositorio.carregar")
+    def carregar(self, forcar=False):
+        """Carrega os cadastros; chamadas seguintes não fazem nada (salvo se forcar=True).
+
+        Usa o instantâneo quando ele reflete o banco; senão lê a tabela inteira e, ao
+        terminar, grava um instantâneo novo numa thread de fundo.
+
+        Pode rodar numa thread de fundo enquanto o programa grava: as mudanças aplicadas
+        à memória durante a leitura são reaplicadas sobre o resultado antes da troca, já
+        que a leitura pode ter visto o banco de antes delas.
+        """
+        if self.carregado and not forcar:
+            return
+        with self.trava:
+            self._durante_carga = []
+        try:
+            with _sem_coleta():
+                por_cpf, indice, (identidade, contador), do_instantaneo = self._ler()
+        except BaseException:
+            with self.trava:
+                self._durante_carga = None
+            raise
+        with self.trava:
+            for chave, cliente in self._durante_carga:
+                if cliente is None:
+                    por_cpf.pop(chave, None)
+                    indice.remover(chave)
+                else:
+                    por_cpf[chave] = cliente
+                    indice.adicionar(chave, cliente.nome)
+            # Não dá para saber se a leitura já via as mudanças reaplicadas: versão incerta
+            self._identidade = identidade
+            self._versao = None if self._durante_carga else contador
+            self._versao_instantaneo = contador if do_instantaneo else None
+            self._durante_carga = None
+            self._por_cpf = por_cpf
+            self.indice = indice
+            self.cache.limpar()
+            self._mudancas += 1
+            self.carregado = True
+        self._emitir(RECARREGADO)
+        if not do_instantaneo and self.caminho_instantaneo:
+            threading.Thread(target=self.salvar_instantaneo, daemon=True).start()
+
+    def _ler(self):
+        """Lê os cadastros do instantâneo ou do banco e monta o índice de nomes.
+
+        Retorna (cadastros por chave, índice, (identidade, contador) do banco lido, se
+        veio do instantâneo). O contador e as linhas saem da mesma transação de leitura.
+        """
+        indice = IndiceNomes()
+        dados = None
+        with self.gerenciador.leitura() as conn, transacao_leitura(conn):
+            versao = ler_alteracoes(conn)
+            if self.caminho_instantaneo:
+                dados = ler_instantaneo(self.caminho_instantaneo, *versao, *resumir_clientes(conn))
+            if dados is None:
+                por_cpf, chaves = {}, {}
+                for bloco in iterar_clientes(conn, com_nome_busca=True):
+                    for *campos, nome_busca in bloco:
+                        cliente = Cliente(*campos)
+                        por_cpf[cliente.chave] = cliente
+                        chaves[cliente.chave] = nome_busca
+        if dados is None:
+            # nome_busca vem pronto do banco; só linhas gravadas por fora (sem ele) são normalizadas aqui
+            indice.construir(((cpf, chave if chave is not None else normalizar(por_cpf[cpf].nome))
+                              for cpf, chave in chaves.items()), normalizados=True)
+        else:
+            cpfs = dados["cpfs"]
+            por_cpf = dict(zip(cpfs, map(Cliente, cpfs, dados["nomes"], dados["telefones"], dados["gmails"],
+                                         dados["datas"])))
+            indice.restaurar(dados["chaves"], cpfs, dados["ngramas"])
+        return por_cpf, indice, versao, dados is not None
+
+    def salvar_instantaneo(self):
+        """Grava o instantâneo dos cadastros em memória, se eles mudaram desde o último.
+
+        Só grava se a memória refletir exatamente o banco: o contador de alterações lido
+        agora tem de ser o da carga somado às mudanças aplicadas à memória desde então, e
+        o banco tem de ter tantas linhas quanto a memória tem cadastros. Uma gravação de
+        outro programa, ou ainda não aplicada à memória, desfaz a igualdade.
+        Retorna True se gravou; uma falha só faz o próximo início carregar do banco.
+        """
+        if not self.caminho_instantaneo or not self.carregado:
+            return False
+        with self._trava_instantaneo:
+            try:
+                with self.gerenciador.leitura() as conn, transacao_leitura(conn):
+                    identidade, contador = ler_alteracoes(conn)
+                    quantidade, maior_rowid = resumir_clientes(conn)
+                with self.trava:
+                    if (identidade, contador) != (self._identidade, self._versao):
+                        return False
+                    if contador == self._versao_instantaneo or quantidade != len(self._por_cpf):
+                        return False
+                    secoes = serializar(self._por_cpf, self.indice)
+                gravar_instantaneo(self.caminho_instantaneo, identidade, contador, quantidade, maior_rowid, secoes)
+            except (ValueError, OSError, sqlite3.Error):
+                return False
+            self._versao_instantaneo = contador
+        return True
+
+    def _contar_mudancas(self, quantidade):
+        """Soma à versão da memória as linhas alteradas no banco (chame com a trava)."""
+        if self._versao is not None:
+            self._versao += quantidade
+
+    def todos(self):
+        """Retorna uma visão (sem cópia) de todos os cadastros em memória."""
+        return self._por_cpf.values()
+
+    def obter(self, cpf):
+        """Retorna o cadastro com o CPF informado, ou None."""
+        return self._por_cpf.get(compactar_cpf(cpf))
+
+    def em_ordem(self):
+        """Retorna uma VisaoAlfabetica de todos os cadastros (sem cópia, sempre em dia)."""
+        return VisaoAlfabetica(self)
+
+    @medir("repositorio.buscar")
+    def buscar(self, termo, cancelado=None):
+        """Retorna, em ordem alfabética, os cadastros cujo nome atende ao termo.
+
+        Termos com menos de TAMANHO_NGRAMA letras casam com o início do nome; os demais,
+        com qualquer trecho (veja busca.casa_nome). Pode ser chamado de uma thread de
+        fundo; veja IndiceNomes.buscar sobre cancelado.
+        """
+        chave = normalizar(termo)
+        with self.trava:
+            if not chave:
+                return [self._por_cpf[cpf] for cpf in self.indice.buscar(chave, cancelado)]
+            # Quem contém "mari" também contém "mar": um prefixo guardado só precisa ser filtrado
+            tipo = BUSCA_PREFIXO if len(chave) < TAMANHO_NGRAMA else BUSCA_NOME
+            cpfs, usada = self.cache.consultar((tipo, chave), estreitar=True)
+            if usada != (tipo, chave):
+                if cpfs is None:
+                    cpfs = self.indice.buscar(chave, cancelado)
+                else:
+                    cpfs = self.indice.filtrar(cpfs, chave, cancelado)
+                self.cache.guardar((tipo, chave), cpfs)
+            return [self._por_cpf[cpf] for cpf in cpfs]
+
+    def corresponde(self, termo, cadastro):
+        """Diz se um cadastro apareceria no resultado de buscar_textual(termo), sem consultar o banco."""
+        if not self.gerenciador.busca_textual or montar_consulta_fts(termo) is None:
+            return casa_nome(normalizar(termo), normalizar(cadastro['nome']))
+        palavras = palavras_sem_acento(f"{cadastro['nome']} {cadastro['gmail']} {cadastro['telefone']}")
+        return all(any(p.startswith(t) for p in palavras) for t in palavras_sem_acento(termo))
+
+    @medir("repositorio.buscar_textual")
+    def buscar_textual(self, termo, cancelado=None):
+        """Busca pelo índice FTS5 do banco: várias palavras, por prefixo, em ordem de relevância.
+
+        Cai para a busca em memória (buscar) quando o FTS5 não está disponível ou o
+        termo não tem palavras (ex.: vazio). Só termos repetidos vêm do cache: filtrar o
+        resultado de um prefixo custaria mais que a consulta e perderia a ordem do bm25.
+
+        Um resultado vindo do cache tem sempre os cadastros certos, mas na ordem de
+        relevância de quando foi consultado: o bm25 depende de todo o cadastro (quantos
+        há, o tamanho médio dos textos), e corrigir a ordem a cada gravação custaria
+        refazer a consulta. Só o conjunto, e não a ordem, é garantido igual ao de uma
+        consulta nova.
+        """
+        if not self.gerenciador.busca_textual or montar_consulta_fts(termo) is None:
+            return self.buscar(termo, cancelado)
+        chave = (BUSCA_TEXTO, " ".join(palavras_sem_acento(termo)))
+        with self.trava:
+            cpfs, _ = self.cache.consultar(chave)
+            if cpfs is not None:
+                return [self._por_cpf[cpf] for cpf in cpfs]
+            mudancas = self._mudancas
+        with self.gerenciador.leitura() as conn:
+            try:
+                cpfs = buscar_texto(conn, termo, cancelado)
+            except sqlite3.OperationalError:
+                if cancelado is not None and cancelado():
+                    raise BuscaCancelada()
+                raise
+        with self.trava:
+            cpfs = [cpf for cpf in map(compactar_cpf, cpfs) if cpf in self._por_cpf]
+            # Uma mudança no meio da consulta pode não estar no resultado: esse não é guardado
+            if self._mudancas == mudancas:
+                self.cache.guardar(chave, cpfs)
+            return [self._por_cpf[cpf] for cpf in cpfs]
+
+    def estatisticas_cache(self):
+        """Contadores do cache de buscas, para ajuste (veja CacheBuscas.estatisticas)."""
+        with self.trava:
+            return self.cache.estatisticas()
+
+    def _ajustar_cache(self, antigo, novo):
+        """Corrige as buscas guardadas depois que um cadastro entrou, saiu ou mudou (chame com a trava).
+
+        Nas buscas por nome o CPF sai da lista ou entra na posição certa da ordem
+        alfabética. Nas textuais, em ordem de relevância, uma exclusão só retira o CPF
+        (a ordem dos demais fica a de antes; veja buscar_textual), mas uma inclusão
+        descarta a busca. Só as buscas cujo termo o cadastro atende
+        são tocadas.
+        """
+        self._mudancas += 1
+        chave_antiga = normalizar(antigo['nome']) if antigo is not None else None
+        chave_nova = self.indice.chave(novo.chave) if novo is not None else None
+        for chave, cpfs in self.cache.itens():
+            tipo, termo = chave
+            if tipo != BUSCA_TEXTO:
+                if chave_antiga is not None and casa_nome(termo, chave_antiga):
+                    _retirar(cpfs, antigo.chave)
+                if chave_nova is not None and casa_nome(termo, chave_nova):
+                    posicao = bisect_left(cpfs, (chave_nova, novo.chave),
+                                          key=lambda cpf: (self.indice.chave(cpf) or "", cpf))
+                    if posicao == len(cpfs) or cpfs[posicao] != novo.chave:
+                        cpfs.insert(posicao, novo.chave)
+            elif novo is not None and self.corresponde(termo, novo):
+                self.cache.descartar(chave)
+            elif antigo is not None and self.corresponde(termo, antigo):
+                _retirar(cpfs, antigo.chave)
+
+    def pagina(self, depois=None, limite=TAMANHO_PAGINA):
+        """Lê uma página da lista alfabética direto do banco (veja banco.pagina_clientes).
+
+        Os cadastros já em memória são devolvidos no lugar das linhas lidas, para quem
+        guarda a página não manter uma segunda cópia deles.
+        """
+        with self.gerenciador.leitura() as conn:
+            pagina, proxima = pagina_clientes(conn, depois, limite)
+        return [self.obter(c['cpf']) or c for c in pagina], proxima
+
+    def inserir(self, cadastro):
+        """Grava o cadastro no banco e o adiciona à memória.
+
+        Levanta sqlite3.IntegrityError se o CPF já existir.
+        """
+        inserir_cliente(self.gerenciador, cadastro)
+        self._memorizar(cadastro)
+
+    def atualizar(self, cadastro):
+        """Grava novos dados para um cadastro existente e os aplica à memória."""
+        atualizar_cliente(self.gerenciador, cadastro)
+        self._memorizar(cadastro)
+
+    def _memorizar(self, cadastro):
+        """Aplica à memória um cadastro que já está gravado no banco."""
+        cliente = Cliente.de_cadastro(cadastro)
+        with self.trava:
+            antigo = self._por_cpf.get(cliente.chave)
+            existia = antigo is not None
+            self._por_cpf[cliente.chave] = cliente
+            self.indice.adicionar(cliente.chave, cliente.nome)
+            self._ajustar_cache(antigo, cliente)
+            self._contar_mudancas(1)
+            if self._durante_carga is not None:
+                self._durante_carga.append((cliente.chave, cliente))
+        self._emitir(ATUALIZADO if existia else ADICIONADO, cliente)
+
+    def incorporar(self, cadastros):
+        """Adiciona à memória cadastros que já foram gravados no banco (ex.: pela importação)."""
+        clientes = [Cliente.de_cadastro(c) for c in cadastros]
+        with self.trava:
+            antigos = [self._por_cpf.get(c.chave) for c in clientes]
+            for cliente in clientes:
+                self._por_cpf[cliente.chave] = cliente
+            self.indice.adicionar_varios((c.chave, c.nome) for c in clientes)
+            if len(clientes) > LIMITE_EVENTOS_LOTE:
+                self.cache.limpar()
+                self._mudancas += 1
+            else:
+                for antigo, cliente in zip(antigos, clientes):
+                    self._ajustar_cache(antigo, cliente)
+            self._contar_mudancas(len(clientes))
+            if self._durante_carga is not None:
+                self._durante_carga.extend((c.chave, c) for c in clientes)
+        if len(clientes) > LIMITE_EVENTOS_LOTE:
+            self._emitir(RECARREGADO)
+        else:
+            for cliente in clientes:
+                self._emitir(ADICIONADO, cliente)
+
+    def excluir(self, cpf):
+        """Remove o cadastro do banco e da memória."""
+        excluir_cliente(self.gerenciador, cpf)
+        self._esquecer(cpf)
+
+    def _esquecer(self, cpf):
+        """Aplica à memória uma exclusão que já foi gravada no banco."""
+        chave = compactar_cpf(cpf)
+        with self.trava:
+            cadastro = self._por_cpf.pop(chave, None)
+            self.indice.remover(chave)
+            if cadastro is not None:
+                self._ajustar_cache(cadastro, None)
+                self._contar_mudancas(1)
+            if self._durante_carga is not None:
+                self._durante_carga.append((chave, None))
+        if cadastro is not None:
+            self._emitir(REMOVIDO, cadastro)
+
+    def __len__(self):
+        return len(self._por_cpf)
+
+    def __contains__(self, cpf):
+        return compactar_cpf(cpf) in self._por_cpf
+
+
+class FilaEscrita:
+    """Grava inclusões e exclusões numa thread de fundo, em grupos com um único commit.
+
+    Os comandos são atendidos na ordem de chegada por uma só thread, então operações
+    sobre o mesmo CPF nunca trocam de ordem. Cada comando do grupo roda dentro de um
+    SAVEPOINT: um CPF duplicado desfaz só o próprio comando, não o grupo inteiro. A
+    memória do repositório é atualizada depois do commit e o resultado de cada comando
+    volta à thread do Tk por sondagem com root.after, chamando ao_concluir(erro), com
+    erro None em caso de sucesso ou a exceção do SQLite (ex.: sqlite3.IntegrityError).
+    """
+
+    INSERIR = COMANDO_INSERIR
+    EXCLUIR = COMANDO_EXCLUIR
+
+    def __init__(self, repositorio, root, tamanho_grupo=64, espera_grupo=0.002, intervalo_ms=20):
+        self.repositorio = repositorio
+        self.root = root
+        self.tamanho_grupo = tamanho_grupo
+        self.espera_grupo = espera_grupo  # Quanto esperar por mais comandos antes do commit
+        self.intervalo_ms = intervalo_ms
+        self._comandos = queue.Queue()
+        self._resultados = queue.Queue()
+        self._pendentes = 0  # Só é alterado na thread do Tk
+        self._sondagem = None
+        self._thread = threading.Thread(target=self._trabalhar, daemon=True)
+        self._thread.start()
+
+    def inserir(self, cadastro, ao_concluir=None):
+        """Enfileira a inclusão de um cadastro."""
+        self._enviar((self.INSERIR, cadastro, ao_concluir))
+
+    def excluir(self, cpf, ao_concluir=None):
+        """Enfileira a exclusão de um cadastro pelo CPF."""
+        self._enviar((self.EXCLUIR, cpf, ao_concluir))
+
+    def encerrar(self):
+        """Grava o que estiver na fila e finaliza a thread de fundo."""
+        self._comandos.put(None)
+        self._thread.join()
+
+    def _enviar(self, comando):
+        self._pendentes += 1
+        self._comandos.put(comando)
+        if self._sondagem is None:
+            self._sondagem = self.root.after(self.intervalo_ms, self._sondar)
+
+    def _trabalhar(self):
+        """Laço da thread de fundo: junta os comandos que chegaram juntos e grava o grupo."""
+        while True:
+            comando = self._comandos.get()
+            if comando is None:
+                return
+            grupo = [comando]
+            encerrar = False
+            prazo = time.monotonic() + self.espera_grupo
+            while len(grupo) < self.tamanho_grupo:
+                try:
+                    proximo = self._comandos.get(timeout=max(prazo - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if proximo is None:
+                    encerrar = True
+                    break
+                grupo.append(proximo)
+            self._gravar(grupo)
+            if encerrar:
+                return
+
+    def _gravar(self, grupo):
+        """Grava um grupo de comandos numa transação e publica o resultado de cada um."""
+        resultados = gravar_grupo(self.repositorio.gerenciador, [(tipo, valor) for tipo, valor, _ in grupo])
+        for (tipo, valor, ao_concluir), (erro, _) in zip(grupo, resultados):
+            if erro is None:
+                if tipo == self.INSERIR:
+                    self.repositorio._memorizar(valor)
+                else:
+                    self.repositorio._esquecer(valor)
+            self._resultados.put((ao_concluir, erro))
+
+    def _sondar(self):
+        """Entrega à thread do Tk os resultados já gravados."""
+        self._sondagem = None
+        while True:
+            try:
+                ao_concluir, erro = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            self._pendentes -= 1
+            if ao_concluir:
+                ao_concluir(erro)
+        if self._pendentes:
+            self._sondagem = self.root.after(self.intervalo_ms, self._sondar)
@@ -0,0 +1,327 @@
+import argparse
+import asyncio
+import json
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from banco import (DB_NAME, COMANDO_EXCLUIR, COMANDO_INSERIR, TAMANHO_PAGINA, GerenciadorConexoes, aniversariantes,
+                   buscar_nome, buscar_texto, clientes_por_cpf, clientes_por_periodo, contar_clientes, gravar_grupo,
+                   montar_consulta_fts, obter_cliente, pagina_clientes)
+from importacao import preparar_cadastro
+from validacao import converter_data, somente_digitos
+
+HOST_PADRAO = "127.0.0.1"
+PORTA_PADRAO = 8765
+
+# Conexões de leitura (e threads que as usam); a escrita tem sempre uma só
+LEITORES_PADRAO = 4
+
+# Comandos de escrita gravados num mesmo commit, no máximo
+TAMANHO_GRUPO = 64
+
+LIMITE_PAGINA = 500  # Maior "limite" aceito na listagem e na busca
+TAMANHO_MAXIMO_CORPO = 64 * 1024
+TEMPO_OCIOSO_S = 30  # Conexões keep-alive paradas há mais tempo são fechadas
+
+MOTIVOS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErroHttp(Exception):
+    """Encerra o atendimento de uma requisição com o status e a mensagem informados."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _inteiro(parametros, nome, padrao, maximo):
+    """Lê um parâmetro inteiro da query string, limitado a [1, maximo]."""
+    try:
+        valor = int(parametros.get(nome, [padrao])[0])
+    except ValueError:
+        raise ErroHttp(400, f"Parâmetro '{nome}' inválido.")
+    return max(1, min(valor, maximo))
+
+
+def _numero(parametros, nome, minimo, maximo, obrigatorio=True):
+    """Lê um parâmetro inteiro da query string que precisa estar em [minimo, maximo] (None se faltar)."""
+    if nome not in parametros and not obrigatorio:
+        return None
+    try:
+        valor = int(parametros.get(nome, [""])[0])
+    except ValueError:
+        valor = None
+    if valor is None or not minimo <= valor <= maximo:
+        raise ErroHttp(400, f"Parâmetro '{nome}' inválido.")
+    return valor
+
+
+def _data(parametros, nome):
+    """Lê um parâmetro de data dd/mm/aaaa da query string como datetime.date."""
+    data = converter_data(parametros.get(nome, [""])[0])
+    if data is None:
+        raise ErroHttp(400, f"Parâmetro '{nome}' inválido.")
+    return data
+
+
+def _buscar(conn, termo, limite, textual):
+    """Busca pelo FTS5 (por relevância) ou, sem ele, pelo nome (veja buscar_nome); devolve os cadastros."""
+    if textual and montar_consulta_fts(termo) is not None:
+        cpfs = buscar_texto(conn, termo, limite=limite)
+    else:
+        cpfs = buscar_nome(conn, termo, limite)
+    return clientes_por_cpf(conn, cpfs)
+
+
+class ServidorClientes:
+    """Serviço HTTP/JSON sobre a tabela Cliente, para várias mesas usarem o mesmo cadastro.
+
+    O protocolo é atendido com asyncio; as consultas vão para um pool de threads do
+    tamanho do pool de leitores do GerenciadorConexoes, então leituras correm em
+    paralelo (WAL) e nunca esperam por gravações. As gravações passam por uma fila e
+    uma única thread, que grava juntos (num só commit) os comandos que chegaram
+    enquanto o commit anterior acontecia.
+
+    Rotas:
+        GET    /saude                           -> {"status": "ok", "clientes": n}
+        GET    /clientes?limite=&depois_nome=&depois_cpf=
+                                                -> {"itens": [...], "proximo": {"nome", "cpf"} ou null}
+        GET    /clientes/busca?q=&limite=       -> {"itens": [...]}
+        GET    /clientes/nascidos?de=&ate=      -> {"itens": [...]}, do mais velho ao mais novo
+        GET    /clientes/aniversariantes?mes=&dia=
+                                                -> {"itens": [...]}, dia opcional
+        GET    /clientes/<cpf>                  -> cadastro, ou 404
+        POST   /clientes      (cadastro em JSON) -> 201 com o cadastro, 400 inválido, 409 CPF repetido
+        DELETE /clientes/<cpf>                  -> 204, ou 404
+    """
+
+    def __init__(self, gerenciador, leitores=LEITORES_PADRAO, tamanho_grupo=TAMANHO_GRUPO):
+        self.gerenciador = gerenciador
+        self.tamanho_grupo = tamanho_grupo
+        self._leitura = ThreadPoolExecutor(max_workers=leitores, thread_name_prefix="leitor")
+        self._escrita = ThreadPoolExecutor(max_workers=1, thread_name_prefix="escritor")
+        self._comandos = None  # asyncio.Queue, criada dentro do laço de eventos
+        self._gravador = None
+        self._rotas = (
+            ("GET", re.compile(r"/saude"), self._saude),
+            ("GET", re.compile(r"/clientes"), self._listar),
+            ("POST", re.compile(r"/clientes"), self._criar),
+            ("GET", re.compile(r"/clientes/busca"), self._pesquisar),
+            ("GET", re.compile(r"/clientes/nascidos"), self._nascidos),
+            ("GET", re.compile(r"/clientes/aniversariantes"), self._aniversariantes),
+            ("GET", re.compile(r"/clientes/([^/]+)"), self._obter),
+            ("DELETE", re.compile(r"/clientes/([^/]+)"), self._excluir),
+        )
+
+    async def iniciar(self, host=HOST_PADRAO, porta=PORTA_PADRAO):
+        """Começa a aceitar conexões e retorna o asyncio.Server."""
+        self._comandos = asyncio.Queue()
+        self._gravador = asyncio.create_task(self._gravar_em_grupos())
+        return await asyncio.start_server(self._atender, host, porta)
+
+    def encerrar(self):
+        """Para a thread de gravação e as de leitura (depois de fechar o servidor)."""
+        if self._gravador is not None:
+            self._gravador.cancel()
+        self._escrita.shutdown(wait=True)
+        self._leitura.shutdown(wait=True)
+
+    # ---- Acesso ao banco ----
+
+    def _com_leitor(self, funcao, args):
+        with self.gerenciador.leitura() as conn:
+            return funcao(conn, *args)
+
+    async def _ler(self, funcao, *args):
+        """Roda funcao(conn, *args) numa thread de leitura com uma conexão do pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._leitura, self._com_leitor, funcao, args)
+
+    async def _gravar(self, tipo, valor):
+        """Enfileira um comando de escrita e espera o commit; retorna (erro, linhas alteradas)."""
+        futuro = asyncio.get_running_loop().create_future()
+        await self._comandos.put((tipo, valor, futuro))
+        return await futuro
+
+    async def _gravar_em_grupos(self):
+        """Laço da escrita: cada grupo leva os comandos que chegaram durante o commit anterior."""
+        laco = asyncio.get_running_loop()
+        while True:
+            grupo = [await self._comandos.get()]
+            while len(grupo) < self.tamanho_grupo and not self._comandos.empty():
+                grupo.append(self._comandos.get_nowait())
+            comandos = [(tipo, valor) for tipo, valor, _ in grupo]
+            resultados = await laco.run_in_executor(self._escrita, gravar_grupo, self.gerenciador, comandos)
+            for (_, _, futuro), resultado in zip(grupo, resultados):
+                if not futuro.done():
+                    futuro.set_result(resultado)
+
+    # ---- Rotas ----
+
+    async def _saude(self, parametros, corpo):
+        return 200, {"status": "ok", "clientes": await self._ler(contar_clientes)}
+
+    async def _listar(self, parametros, corpo):
+        limite = _inteiro(parametros, "limite", TAMANHO_PAGINA, LIMITE_PAGINA)
+        depois = None
+        if "depois_cpf" in parametros:
+            depois = (parametros.get("depois_nome", [""])[0], parametros["depois_cpf"][0])
+        itens, proximo = await self._ler(pagina_clientes, depois, limite)
+        return 200, {"itens": itens, "proximo": {"nome": proximo[0], "cpf": proximo[1]} if proximo else None}
+
+    async def _pesquisar(self, parametros, corpo):
+        termo = parametros.get("q", [""])[0]
+        limite = _inteiro(parametros, "limite", TAMANHO_PAGINA, LIMITE_PAGINA)
+        itens = await self._ler(_buscar, termo, limite, self.gerenciador.busca_textual)
+        return 200, {"itens": itens}
+
+    async def _nascidos(self, parametros, corpo):
+        inicio, fim = _data(parametros, "de"), _data(parametros, "ate")
+        return 200, {"itens": await self._ler(clientes_por_periodo, inicio, fim)}
+
+    async def _aniversariantes(self, parametros, corpo):
+        mes = _numero(parametros, "mes", 1, 12)
+        dia = _numero(parametros, "dia", 1, 31, obrigatorio=False)
+        return 200, {"itens": await self._ler(aniversariantes, mes, dia)}
+
+    async def _obter(self, parametros, corpo, cpf):
+        cadastro = await self._ler(obter_cliente, somente_digitos(cpf))
+        if cadastro is None:
+            raise ErroHttp(404, "Cliente não encontrado.")
+        return 200, cadastro
+
+    async def _criar(self, parametros, corpo):
+        try:
+            bruto = json.loads(corpo or b"null")
+        except ValueError:
+            raise ErroHttp(400, "Corpo não é um JSON válido.")
+        cadastro, erro = preparar_cadastro(bruto)
+        if erro:
+            raise ErroHttp(400, erro)
+        erro, _ = await self._gravar(COMANDO_INSERIR, cadastro)
+        if isinstance(erro, sqlite3.IntegrityError):
+            raise ErroHttp(409, "CPF já cadastrado.")
+        if erro is not None:
+            raise erro
+        return 201, cadastro
+
+    async def _excluir(self, parametros, corpo, cpf):
+        erro, linhas = await self._gravar(COMANDO_EXCLUIR, somente_digitos(cpf))
+        if erro is not None:
+            raise erro
+        if not linhas:
+            raise ErroHttp(404, "Cliente não encontrado.")
+        return 204, None
+
+    # ---- Protocolo HTTP ----
+
+    async def _despachar(self, metodo, alvo, corpo):
+        """Encontra a rota da requisição e a executa; retorna (status, corpo da resposta)."""
+        partes = urlsplit(alvo)
+        parametros = parse_qs(partes.query)
+        caminho_existe = False
+        for metodo_rota, padrao, tratar in self._rotas:
+            encontrado = padrao.fullmatch(partes.path.rstrip("/") or "/")
+            if not encontrado:
+                continue
+            caminho_existe = True
+            if metodo_rota != metodo:
+                continue
+            try:
+                return await tratar(parametros, corpo, *encontrado.groups())
+            except ErroHttp as erro:
+                return erro.status, {"erro": str(erro)}
+            except sqlite3.Error as erro:
+                return 500, {"erro": f"Erro no banco de dados: {erro}"}
+            except Exception as erro:  # Uma falha numa requisição não derruba a conexão
+                return 500, {"erro": f"Erro interno: {erro}"}
+        if caminho_existe:
+            return 405, {"erro": "Método não permitido."}
+        return 404, {"erro": "Rota não encontrada."}
+
+    async def _atender(self, leitor, escritor):
+        """Atende as requisições de uma conexão (HTTP/1.1 com keep-alive)."""
+        try:
+            while True:
+                try:
+                    linha = await asyncio.wait_for(leitor.readline(), TEMPO_OCIOSO_S)
+                except asyncio.TimeoutError:
+                    break
+                if not linha.strip():
+                    break
+                try:
+                    metodo, alvo, versao = linha.decode("latin-1").split()
+                except ValueError:
+                    escritor.write(_resposta(400, {"erro": "Requisição inválida."}, False))
+                    break
+
+                cabecalhos = {}
+                while (linha := await leitor.readline()) not in (b"\r\n", b"\n", b""):
+                    nome, _, valor = linha.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                try:
+                    tamanho = int(cabecalhos.get("content-length") or 0)
+                except ValueError:
+                    tamanho = -1
+                if not 0 <= tamanho <= TAMANHO_MAXIMO_CORPO:
+                    escritor.write(_resposta(413, {"erro": "Corpo grande demais."}, False))
+                    break
+                corpo = await leitor.readexactly(tamanho) if tamanho else b""
+
+                status, resposta = await self._despachar(metodo.upper(), alvo, corpo)
+                manter = versao == "HTTP/1.1" and cabecalhos.get("connection", "").lower() != "close"
+                escritor.write(_resposta(status, resposta, manter))
+                await escritor.drain()
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            escritor.close()
+
+
+def _resposta(status, corpo, manter):
+    """Monta os bytes de uma resposta HTTP com corpo JSON."""
+    dados = b"" if corpo is None else json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+    cabecalho = (f"HTTP/1.1 {status} {MOTIVOS[status]}\r\n"
+                 f"Content-Type: application/json; charset=utf-8\r\n"
+                 f"Content-Length: {len(dados)}\r\n"
+                 f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n")
+    return cabecalho.encode("latin-1") + dados
+
+
+async def servir(gerenciador, host=HOST_PADRAO, porta=PORTA_PADRAO, leitores=LEITORES_PADRAO, ao_iniciar=None):
+    """Roda o servidor até ser cancelado; ao_iniciar(porta) é chamado quando ele já aceita conexões."""
+    servidor = ServidorClientes(gerenciador, leitores)
+    tcp = await servidor.iniciar(host, porta)
+    if ao_iniciar:
+        ao_iniciar(tcp.sockets[0].getsockname()[1])
+    try:
+        async with tcp:
+            await tcp.serve_forever()
+    finally:
+        servidor.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve o cadastro de clientes por HTTP/JSON para várias mesas.")
+    parser.add_argument("--banco", default=DB_NAME, help="Banco SQLite servido")
+    parser.add_argument("--host", default=HOST_PADRAO, help="Endereço de escuta (padrão: só esta máquina)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO, help="Porta TCP")
+    parser.add_argument("--leitores", type=int, default=LEITORES_PADRAO, help="Conexões de leitura no pool")
+    args = parser.parse_args()
+
+    gerenciador = GerenciadorConexoes(args.banco, leitores=args.leitores)
+    try:
+        asyncio.run(servir(gerenciador, args.host, args.porta, args.leitores,
+                           ao_iniciar=lambda porta: print(f"Servindo {args.banco} em http://{args.host}:{porta}")))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gerenciador.fechar()
+
+
+if __name__ == "__main__":
+    main()
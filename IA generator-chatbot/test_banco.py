@@ -0,0 +1,222 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+import banco
+from banco import (COMANDO_EXCLUIR, COMANDO_INSERIR, GerenciadorConexoes, SQL_CRIAR_TABELA, SQL_INSERIR,
+                   SQL_PROXIMA_PAGINA, VERSAO_ESQUEMA, aniversariantes, buscar_texto, clientes_por_periodo,
+                   gravar_grupo, inclusao_em_massa, inserir_cliente, ler_alteracoes, linha_cliente, pagina_clientes)
+
+
+def cadastro(cpf, nome, data):
+    return {"cpf": cpf, "nome": nome, "telefone": "11999990000", "gmail": "", "data": data}
+
+
+def cpfs(cadastros):
+    return [c['cpf'] for c in cadastros]
+
+
+@pytest.fixture
+def gerenciador(tmp_path):
+    gerenciador = GerenciadorConexoes(str(tmp_path / "clientes.db"))
+    yield gerenciador
+    gerenciador.fechar()
+
+
+def paginar(conn, limite):
+    """Percorre a lista alfabética inteira, página a página; retorna os CPFs e quantas páginas foram lidas."""
+    lidos, paginas, depois = [], 0, None
+    while True:
+        pagina, depois = pagina_clientes(conn, depois, limite)
+        lidos.extend(cpfs(pagina))
+        paginas += 1
+        if depois is None:
+            return lidos, paginas
+
+
+# ---- Migrações ----
+
+def test_migracao_de_banco_sem_versao(tmp_path, monkeypatch):
+    monkeypatch.setattr(banco, "TAMANHO_LOTE_MIGRACAO", 2)  # Vários lotes com poucas linhas
+    caminho = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(caminho)
+    conn.execute(SQL_CRIAR_TABELA)
+    conn.executemany("INSERT INTO Cliente VALUES (?, ?, '', '', ?)",
+                     [("1", "José Araújo", "29/02/2000"), ("2", "Ana", "31/02/2000"), ("3", "Bia", "05/10/1990"),
+                      ("4", "Conceição", "")])
+    conn.commit()
+    conn.close()
+
+    gerenciador = GerenciadorConexoes(caminho)
+    try:
+        with gerenciador.leitura() as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == VERSAO_ESQUEMA
+            linhas = conn.execute("SELECT cpf, data_iso, aniversario, nome_busca FROM Cliente ORDER BY cpf").fetchall()
+            assert linhas == [("1", "2000-02-29", 229, "jose araujo"), ("2", None, None, "ana"),
+                              ("3", "1990-10-05", 1005, "bia"), ("4", None, None, "conceicao")]
+            assert buscar_texto(conn, "arau") == ["1"]
+    finally:
+        gerenciador.fechar()
+
+
+def test_migracao_v4_troca_o_gatilho_de_update(gerenciador):
+    # Banco na versão 3, com o gatilho antigo (disparava em qualquer coluna)
+    with gerenciador.escrita() as conn:
+        conn.execute("DROP TRIGGER ClienteBusca_au")
+        conn.execute("CREATE TRIGGER ClienteBusca_au AFTER UPDATE ON Cliente BEGIN "
+                     "INSERT INTO ClienteBusca(ClienteBusca, rowid, nome, gmail, telefone) "
+                     "VALUES ('delete', old.rowid, old.nome, old.gmail, old.telefone); "
+                     "INSERT INTO ClienteBusca(rowid, nome, gmail, telefone) "
+                     "VALUES (new.rowid, new.nome, new.gmail, new.telefone); END")
+        conn.execute("PRAGMA user_version=3")
+    inserir_cliente(gerenciador, cadastro("1", "Ana", "01/01/1990"))
+
+    banco.migrar_esquema(gerenciador)
+    banco.migrar_esquema(gerenciador)  # Já na versão 4: não faz nada
+    with gerenciador.leitura() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 4
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name='ClienteBusca_au'").fetchone()[0]
+        assert "UPDATE OF nome, gmail, telefone" in sql
+        assert buscar_texto(conn, "ana") == ["1"]
+
+
+# ---- Datas de nascimento ----
+
+@pytest.fixture
+def nascidos(gerenciador):
+    for dados in (cadastro("1", "Ana", "29/02/2000"), cadastro("2", "Bia", "28/02/1990"),
+                  cadastro("3", "Caio", "01/03/1985"), cadastro("4", "Davi", "29/02/1996"),
+                  cadastro("5", "Eva", "31/12/1999"), cadastro("6", "Fábio", "30/02/1990")):
+        inserir_cliente(gerenciador, dados)
+    return gerenciador
+
+
+def test_clientes_por_periodo(nascidos):
+    with nascidos.leitura() as conn:
+        assert cpfs(clientes_por_periodo(conn, date(1990, 2, 28), date(2000, 2, 29))) == ["2", "4", "5", "1"]
+        assert cpfs(clientes_por_periodo(conn, date(1990, 3, 1), date(1996, 2, 28))) == []
+        assert cpfs(clientes_por_periodo(conn, date(2000, 1, 1), date(1990, 1, 1))) == []
+
+
+def test_aniversariantes_do_mes_e_do_dia(nascidos):
+    with nascidos.leitura() as conn:
+        # Em ordem de dia e depois de nome; a data inexistente (30/02) fica de fora
+        assert cpfs(aniversariantes(conn, 2)) == ["2", "1", "4"]
+        assert cpfs(aniversariantes(conn, 2, 29)) == ["1", "4"]
+        assert cpfs(aniversariantes(conn, 2, 28)) == ["2"]
+        assert cpfs(aniversariantes(conn, 12, 31)) == ["5"]
+        assert cpfs(aniversariantes(conn, 4)) == []
+
+
+# ---- Inclusão em massa ----
+
+def gatilhos(conn):
+    return dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger'").fetchall())
+
+
+def test_inclusao_em_massa_indexa_e_conta_as_linhas_novas(gerenciador):
+    inserir_cliente(gerenciador, cadastro("1", "Ana Lima", "01/01/1990"))
+    with gerenciador.leitura() as conn:
+        antes, (_, contador) = gatilhos(conn), ler_alteracoes(conn)
+
+    with gerenciador.escrita() as conn, inclusao_em_massa(conn):
+        assert "ClienteBusca_ai" not in gatilhos(conn) and "Alteracoes_ai" not in gatilhos(conn)
+        with gerenciador.leitura() as leitor:
+            assert gatilhos(leitor) == antes  # Outras conexões não veem a tabela sem os gatilhos
+        conn.executemany(SQL_INSERIR, [linha_cliente(cadastro(str(i), f"Bia Souza {i}", "")) for i in range(2, 6)])
+
+    with gerenciador.leitura() as conn:
+        assert gatilhos(conn) == antes
+        assert ler_alteracoes(conn)[1] == contador + 4
+        assert sorted(buscar_texto(conn, "souza")) == ["2", "3", "4", "5"]
+    inserir_cliente(gerenciador, cadastro("6", "Caio Souza", ""))  # Gatilhos de volta: a inclusão comum indexa
+    with gerenciador.leitura() as conn:
+        assert "6" in buscar_texto(conn, "souza") and ler_alteracoes(conn)[1] == contador + 5
+
+
+def test_inclusao_em_massa_desfeita_devolve_os_gatilhos(gerenciador):
+    with gerenciador.leitura() as conn:
+        antes, versao = gatilhos(conn), ler_alteracoes(conn)
+    with pytest.raises(sqlite3.IntegrityError):
+        with gerenciador.escrita() as conn, inclusao_em_massa(conn):
+            conn.executemany(SQL_INSERIR, [linha_cliente(cadastro("1", "Ana", "")) for _ in range(2)])
+    with gerenciador.leitura() as conn:
+        assert gatilhos(conn) == antes and ler_alteracoes(conn) == versao
+        assert conn.execute("SELECT COUNT(*) FROM Cliente").fetchone()[0] == 0
+
+
+# ---- Gravação em grupo ----
+
+def test_comando_que_falha_nao_desfaz_o_grupo(gerenciador):
+    inserir_cliente(gerenciador, cadastro("1", "Ana", ""))
+    comandos = [(COMANDO_INSERIR, cadastro("2", "Bia", "")),
+                (COMANDO_INSERIR, cadastro("1", "Ana de novo", "")),  # CPF repetido
+                (COMANDO_EXCLUIR, "1"),
+                (COMANDO_INSERIR, cadastro("3", "Caio", "")),
+                (COMANDO_INSERIR, cadastro("3", "Caio de novo", "")),  # Repetido dentro do grupo
+                (COMANDO_EXCLUIR, "9")]  # Inexistente: não é erro, só não altera linhas
+    resultados = gravar_grupo(gerenciador, comandos)
+
+    assert [type(erro) for erro, _ in resultados] == [type(None), sqlite3.IntegrityError, type(None),
+                                                      type(None), sqlite3.IntegrityError, type(None)]
+    assert [linhas for _, linhas in resultados] == [1, 0, 1, 1, 0, 0]
+    with gerenciador.leitura() as conn:
+        assert conn.execute("SELECT cpf, nome FROM Cliente ORDER BY cpf").fetchall() == [("2", "Bia"), ("3", "Caio")]
+        assert sorted(buscar_texto(conn, "caio")) == ["3"]  # O FTS5 também não guarda o comando desfeito
+
+
+def test_grupo_inteiro_falha_se_o_commit_falhar(gerenciador, monkeypatch):
+    class Escrita:
+        """Conexão de escrita cujo commit falha, como num disco cheio."""
+
+        def __init__(self, conn):
+            self._conn = conn
+
+        def __getattr__(self, nome):
+            return getattr(self._conn, nome)
+
+        def commit(self):
+            raise sqlite3.OperationalError("disco cheio")
+
+    monkeypatch.setattr(gerenciador, "_escritor", Escrita(gerenciador._escritor))
+    resultados = gravar_grupo(gerenciador, [(COMANDO_INSERIR, cadastro("1", "Ana", "")),
+                                            (COMANDO_INSERIR, cadastro("2", "Bia", ""))])
+    assert all(isinstance(erro, sqlite3.OperationalError) and linhas == 0 for erro, linhas in resultados)
+    monkeypatch.undo()
+    with gerenciador.leitura() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM Cliente").fetchone()[0] == 0
+
+
+# ---- Paginação por marcador ----
+
+@pytest.mark.parametrize("limite", [1, 2, 3, 7, 100])
+def test_paginas_percorrem_a_lista_sem_repetir_nem_pular(gerenciador, limite):
+    # Nomes repetidos e só com maiúsculas diferentes: o desempate é o CPF
+    nomes = ["ana", "Ana", "ANA", "bia", "Bia", "Caio", "ana", "davi", "Bia", "Eva", "eva", "Ana Lima"]
+    for i, nome in enumerate(nomes):
+        inserir_cliente(gerenciador, cadastro(f"{(i * 7) % 12:02d}", nome, ""))
+    esperado = [cpf for _, cpf in sorted((nome.lower(), f"{(i * 7) % 12:02d}") for i, nome in enumerate(nomes))]
+    with gerenciador.leitura() as conn:
+        lidos, paginas = paginar(conn, limite)
+    assert lidos == esperado
+    assert paginas == len(nomes) // limite + 1
+
+
+def test_pagina_seguinte_ve_as_mudancas_depois_do_marcador(gerenciador):
+    for i, nome in enumerate(["Ana", "Bia", "Caio", "Davi"]):
+        inserir_cliente(gerenciador, cadastro(str(i), nome, ""))
+    with gerenciador.leitura() as conn:
+        pagina, depois = pagina_clientes(conn, None, 2)
+    assert cpfs(pagina) == ["0", "1"]
+    inserir_cliente(gerenciador, cadastro("8", "Amanda", ""))  # Antes do marcador: fica de fora
+    inserir_cliente(gerenciador, cadastro("9", "Bruno", ""))  # Depois dele: aparece
+    with gerenciador.leitura() as conn:
+        assert cpfs(pagina_clientes(conn, depois, 10)[0]) == ["9", "2", "3"]
+
+
+def test_pagina_seguinte_procura_pelo_indice(gerenciador):
+    with gerenciador.leitura() as conn:
+        plano = " ".join(linha[-1] for linha in conn.execute("EXPLAIN QUERY PLAN " + SQL_PROXIMA_PAGINA,
+                                                             ("bia", "bia", "1", 10)))
+    assert "idx_cliente_nome" in plano and "TEMP B-TREE" not in plano
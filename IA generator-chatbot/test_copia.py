@@ -0,0 +1,39 @@
+import os
+
+import copia
+from banco import GerenciadorConexoes, inserir_cliente
+from copia import CopiasPeriodicas, fazer_copia
+
+
+def banco_com_clientes(caminho, quantidade):
+    gerenciador = GerenciadorConexoes(caminho)
+    with gerenciador.escrita():
+        for i in range(quantidade):
+            inserir_cliente(gerenciador, {"cpf": f"{i:011d}", "nome": f"Cliente {i}", "telefone": "11999990000",
+                                          "gmail": f"cliente{i}@gmail.com", "data": "01/01/1990"})
+    gerenciador.fechar()
+
+
+def test_compactar_informa_progresso_durante_a_copia(tmp_path, monkeypatch):
+    monkeypatch.setattr(copia, "PASSO_PROGRESSO_VACUUM", 1000)
+    origem = str(tmp_path / "clientes.db")
+    banco_com_clientes(origem, 2000)
+    avisos = []
+    fazer_copia(origem, str(tmp_path / "copia.db"), compactar=True, ao_progresso=lambda *aviso: avisos.append(aviso))
+    assert len(avisos) > 1
+    *durante, (copiadas, total) = avisos
+    assert all(c < t for c, t in durante) and copiadas == total > 0
+
+
+def test_copias_periodicas_mantem_as_mais_recentes(tmp_path, monkeypatch):
+    origem = str(tmp_path / "clientes.db")
+    banco_com_clientes(origem, 10)
+    pasta = str(tmp_path / "copias")
+    os.makedirs(pasta)
+    copias = CopiasPeriodicas(origem, pasta, manter=2)
+    horarios = iter(range(4))
+    monkeypatch.setattr(copia, "nome_da_copia",
+                        lambda pasta, origem: os.path.join(pasta, f"clientes-{next(horarios)}.db"))
+    for _ in range(4):
+        copias.copiar_agora()
+    assert sorted(os.listdir(pasta)) == ["clientes-2.db", "clientes-3.db"]
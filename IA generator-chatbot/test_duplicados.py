@@ -0,0 +1,21 @@
+import duplicados
+from duplicados import encontrar_duplicados
+
+
+def test_bloco_de_cpf_grande_nao_e_ignorado(monkeypatch):
+    monkeypatch.setattr(duplicados, "LIMITE_BLOCO", 3)
+    cadastros = [{"cpf": "52998224725", "nome": f"Pessoa {i}", "telefone": f"1190000{i:04d}"} for i in range(5)]
+    cadastros += [{"cpf": f"{i:011d}", "nome": "Ana Lima"} for i in range(5)]  # Bloco de nome, acima do limite
+    candidatos = encontrar_duplicados(cadastros)
+    assert sorted(c["indices"] for c in candidatos) == [(i, j) for i in range(5) for j in range(i + 1, 5)]
+
+
+def test_par_em_varios_blocos_e_pontuado_uma_vez(monkeypatch):
+    pontuar, chamadas = duplicados.pontuar, []
+    monkeypatch.setattr(duplicados, "pontuar", lambda a, b: chamadas.append((a, b)) or pontuar(a, b))
+    mesmo = {"nome": "Ana Lima", "telefone": "11999990000", "gmail": "ana.lima@gmail.com"}
+    parecido = {"nome": "Anna Lima", "telefone": "11999990000", "gmail": "analima@gmail.com", "cpf": "1"}
+    diferente = {"nome": "Ana Lima", "telefone": "21999990000", "gmail": "ana.lima@gmail.com", "data": "x"}
+    candidatos = encontrar_duplicados([dict(mesmo, cpf="2"), parecido, diferente], limiar=0.99)
+    assert len(chamadas) == 3  # Cada par uma vez, embora dividam até três blocos
+    assert candidatos == []
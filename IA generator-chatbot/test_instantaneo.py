@@ -0,0 +1,94 @@
+import pytest
+
+from banco import GerenciadorConexoes, ler_alteracoes, resumir_clientes
+from copia import fazer_copia, restaurar_copia
+from instantaneo import caminho_instantaneo, ler_instantaneo
+from repositorio import RepositorioClientes
+
+
+def cadastro(i):
+    return {"nome": f"Cliente {i}", "cpf": f"{i:011d}", "telefone": "11999990000",
+            "gmail": f"cliente{i}@gmail.com", "data": "01/01/1990"}
+
+
+@pytest.fixture
+def banco(tmp_path):
+    """Banco com 100 clientes e o caminho do instantâneo dele (ainda não gravado)."""
+    caminho = str(tmp_path / "clientes.db")
+    gerenciador = GerenciadorConexoes(caminho)
+    repositorio = RepositorioClientes(gerenciador)
+    repositorio.carregar()
+    for i in range(100):
+        repositorio.inserir(cadastro(i))
+    gerenciador.fechar()
+    return caminho, caminho_instantaneo(caminho)
+
+
+def estado(gerenciador):
+    with gerenciador.leitura() as conn:
+        return (*ler_alteracoes(conn), *resumir_clientes(conn))
+
+
+@pytest.mark.parametrize("compactar", [False, True])
+def test_copia_recebe_identidade_nova(banco, tmp_path, compactar):
+    caminho, _ = banco
+    copia = str(tmp_path / "copia.db")
+    fazer_copia(caminho, copia, compactar=compactar)
+    original, copiado = GerenciadorConexoes(caminho), GerenciadorConexoes(copia)
+    try:
+        (identidade, *resto), (identidade_copia, *resto_copia) = estado(original), estado(copiado)
+    finally:
+        original.fechar()
+        copiado.fechar()
+    assert identidade != identidade_copia
+    assert resto[:2] == resto_copia[:2]  # Mesmo contador e mesma quantidade de clientes
+
+
+def test_instantaneo_velho_rejeitado_apos_restaurar_copia(banco, tmp_path):
+    caminho, instantaneo = banco
+    copia = str(tmp_path / "copia.db")
+    fazer_copia(caminho, copia)
+
+    # Depois da cópia: 5 inclusões e o instantâneo dos 105 clientes
+    gerenciador = GerenciadorConexoes(caminho)
+    repositorio = RepositorioClientes(gerenciador)
+    repositorio.carregar()
+    for i in range(100, 105):
+        repositorio.inserir(cadastro(i))
+    repositorio.caminho_instantaneo = instantaneo
+    assert repositorio.salvar_instantaneo()
+    gerenciador.fechar()
+
+    # A cópia (100 clientes) volta e recebe o mesmo número de gravações: o contador empata
+    restaurar_copia(copia, caminho)
+    gerenciador = GerenciadorConexoes(caminho)
+    try:
+        with gerenciador.escrita() as conn:
+            conn.executemany("DELETE FROM Cliente WHERE cpf = ?", [(f"{i:011d}",) for i in range(5)])
+        assert ler_instantaneo(instantaneo, *estado(gerenciador)) is None
+
+        repositorio = RepositorioClientes(gerenciador, instantaneo)
+        repositorio.carregar()
+        assert len(repositorio) == 95
+        assert repositorio.obter(f"{0:011d}") is None
+        assert repositorio.obter(f"{104:011d}") is None
+    finally:
+        gerenciador.fechar()
+
+
+def test_instantaneo_confere_as_linhas_do_banco(banco):
+    caminho, instantaneo = banco
+    gerenciador = GerenciadorConexoes(caminho)
+    try:
+        repositorio = RepositorioClientes(gerenciador)
+        repositorio.carregar()
+        repositorio.caminho_instantaneo = instantaneo
+        assert repositorio.salvar_instantaneo()
+        identidade, contador, quantidade, maior_rowid = estado(gerenciador)
+        assert ler_instantaneo(instantaneo, identidade, contador, quantidade, maior_rowid) is not None
+
+        # Mesmo (identidade, contador), mas outras linhas: o resumo do banco não bate
+        assert ler_instantaneo(instantaneo, identidade, contador, quantidade - 1, maior_rowid) is None
+        assert ler_instantaneo(instantaneo, identidade, contador, quantidade, maior_rowid + 1) is None
+    finally:
+        gerenciador.fechar()
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from banco import GerenciadorConexoes, buscar_nome
+from repositorio import RepositorioClientes
+
+NOMES = ["João", "Maria", "José", "Ana", "Antônio", "Márcia", "Luís", "Conceição"]
+SOBRENOMES = ["Silva", "Santos", "Souza", "Oliveira", "Pereira", "Lima", "Gonçalves", "Araújo"]
+SEPARADORES = ["_", ".", "-", ""]
+TERMOS = ["silva", "jo", "mar", "sou", "ana lima", "joao_silva", "gon", "araujo", "11", "conc pere", "ze", "a"]
+
+
+def gerar(aleatorio, i):
+    nome, sobrenome = aleatorio.choice(NOMES), aleatorio.choice(SOBRENOMES)
+    gmail = f"{nome}{aleatorio.choice(SEPARADORES)}{sobrenome}{aleatorio.randint(1, 99)}@gmail.com".lower()
+    return {"nome": f"{nome} {sobrenome}", "cpf": f"{i:011d}", "telefone": f"11{aleatorio.randint(10 ** 8, 10 ** 9)}",
+            "gmail": gmail, "data": "01/01/1990"}
+
+
+@pytest.fixture
+def repositorio(tmp_path):
+    gerenciador = GerenciadorConexoes(str(tmp_path / "clientes.db"))
+    repositorio = RepositorioClientes(gerenciador)
+    repositorio.carregar()
+    yield repositorio
+    gerenciador.fechar()
+
+
+def resultados(repositorio):
+    """Resultado de cada termo nas duas buscas.
+
+    A textual é comparada como conjunto: do cache ela vem na ordem do bm25 de quando foi
+    consultada, e exclusões mudam o bm25 dos que ficam (veja buscar_textual).
+    """
+    return {termo: ([c['cpf'] for c in repositorio.buscar(termo)],
+                    sorted(c['cpf'] for c in repositorio.buscar_textual(termo))) for termo in TERMOS}
+
+
+@pytest.mark.parametrize("semente", range(3))
+def test_cache_igual_a_busca_nova_depois_de_gravacoes(repositorio, semente):
+    assert repositorio.gerenciador.busca_textual, "SQLite sem FTS5"
+    aleatorio = random.Random(semente)
+    for i in range(300):
+        repositorio.inserir(gerar(aleatorio, i))
+    proximo = 300
+
+    for _ in range(5):
+        resultados(repositorio)  # Enche o cache, que passa a ser corrigido a cada gravação
+        for _ in range(40):
+            cpfs = [c['cpf'] for c in repositorio.todos()]
+            sorteio = aleatorio.random()
+            if sorteio < 0.4:
+                repositorio.inserir(gerar(aleatorio, proximo))
+                proximo += 1
+            elif sorteio < 0.7:
+                repositorio.excluir(aleatorio.choice(cpfs))
+            elif sorteio < 0.9:
+                repositorio.atualizar(gerar(aleatorio, int(aleatorio.choice(cpfs))))
+            else:
+                repositorio.incorporar([gerar(aleatorio, proximo + k) for k in range(3)])
+                proximo += 3
+        cacheados = resultados(repositorio)
+        repositorio.cache.limpar()
+        assert cacheados == resultados(repositorio)
+
+
+def test_cpfs_fora_do_padrao_com_o_mesmo_nome(repositorio):
+    # Chaves int (11 dígitos) e texto (linhas antigas) empatam no nome: a ordem ainda é total
+    cpfs = ["52998224725", "529.982.247-25", "123", "11144477735", "abc"]
+    for cpf in cpfs:
+        repositorio.inserir({"nome": "Ana Lima", "cpf": cpf, "telefone": "", "gmail": "", "data": ""})
+    esperado = [c['cpf'] for c in repositorio.buscar("ana")]
+    assert sorted(esperado) == sorted(cpfs)
+
+    repositorio.carregar(forcar=True)  # Índice montado de uma vez, a partir do banco
+    assert [c['cpf'] for c in repositorio.buscar("ana")] == esperado
+    assert [c['cpf'] for c in repositorio.em_ordem()] == esperado
+    repositorio.excluir("123")
+    repositorio.atualizar({"nome": "Ana Lima", "cpf": "abc", "telefone": "1", "gmail": "", "data": ""})
+    assert [c['cpf'] for c in repositorio.buscar("lima")] == [c for c in esperado if c != "123"]
+
+
+def test_termos_curtos_casam_com_o_inicio_do_nome(repositorio):
+    for i, nome in enumerate(["Mário Souza", "Ana Amaral", "Marta Lima", "Omar Ma", "mãe"]):
+        repositorio.inserir({"nome": nome, "cpf": f"{i:011d}", "telefone": "", "gmail": "", "data": ""})
+
+    def nomes(termo):
+        return [c['nome'] for c in repositorio.buscar(termo)]
+
+    assert nomes("ma") == ["mãe", "Mário Souza", "Marta Lima"]
+    # O resultado guardado de "ma" (prefixo) não serve para estreitar "mar" (trecho)
+    assert nomes("mar") == ["Ana Amaral", "Mário Souza", "Marta Lima", "Omar Ma"]
+    assert nomes("m") == ["mãe", "Mário Souza", "Marta Lima"]
+    with repositorio.gerenciador.leitura() as conn:
+        for termo in ("ma", "mar", "m", ""):
+            assert [repositorio.obter(cpf)['nome'] for cpf in buscar_nome(conn, termo)] == nomes(termo)
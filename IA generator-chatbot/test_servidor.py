@@ -0,0 +1,118 @@
+import asyncio
+import http.client
+import json
+import threading
+from urllib.parse import quote
+
+import pytest
+
+from banco import GerenciadorConexoes, inserir_cliente
+from servidor import TAMANHO_MAXIMO_CORPO, servir
+
+
+def cadastro(cpf, nome):
+    return {"cpf": cpf, "nome": nome, "telefone": "(11) 99999-0000", "gmail": f"{nome.lower()}@gmail.com",
+            "data": "01/01/1990"}
+
+
+@pytest.fixture
+def servidor(tmp_path):
+    """Servidor rodando numa thread; devolve requisitar(metodo, caminho, corpo) -> (status, resposta).
+
+    corpo é convertido em JSON; bruto, se informado, vai como está.
+    """
+    gerenciador = GerenciadorConexoes(str(tmp_path / "clientes.db"))
+    pronto, estado = threading.Event(), {}
+
+    async def principal():
+        estado["laco"], estado["tarefa"] = asyncio.get_running_loop(), asyncio.current_task()
+        await servir(gerenciador, porta=0, ao_iniciar=lambda porta: (estado.update(porta=porta), pronto.set()))
+
+    def rodar():
+        try:
+            asyncio.run(principal())
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=rodar, daemon=True)
+    thread.start()
+    assert pronto.wait(5), "o servidor não iniciou"
+
+    def requisitar(metodo, caminho, corpo=None, bruto=None):
+        conexao = http.client.HTTPConnection("127.0.0.1", estado["porta"], timeout=5)
+        try:
+            dados = bruto if corpo is None else json.dumps(corpo).encode("utf-8")
+            conexao.request(metodo, caminho, body=dados, headers={"Content-Type": "application/json"})
+            resposta = conexao.getresponse()
+            texto = resposta.read()
+            return resposta.status, json.loads(texto) if texto else None
+        finally:
+            conexao.close()
+
+    requisitar.gerenciador = gerenciador
+    yield requisitar
+    estado["laco"].call_soon_threadsafe(estado["tarefa"].cancel)
+    thread.join(5)
+    gerenciador.fechar()
+
+
+def test_nascidos_e_aniversariantes(servidor):
+    for cpf, nome, data in (("1", "Ana", "29/02/2000"), ("2", "Bia", "28/02/1990"), ("3", "Caio", "01/03/1985")):
+        inserir_cliente(servidor.gerenciador, {"cpf": cpf, "nome": nome, "telefone": "", "gmail": "", "data": data})
+
+    status, resposta = servidor("GET", "/clientes/nascidos?de=01/01/1985&ate=31/12/1990")
+    assert status == 200 and [c['cpf'] for c in resposta["itens"]] == ["3", "2"]
+    status, resposta = servidor("GET", "/clientes/aniversariantes?mes=2")
+    assert status == 200 and [c['cpf'] for c in resposta["itens"]] == ["2", "1"]
+    status, resposta = servidor("GET", "/clientes/aniversariantes?mes=2&dia=29")
+    assert status == 200 and [c['cpf'] for c in resposta["itens"]] == ["1"]
+
+    for caminho in ("/clientes/nascidos?de=31/02/1990&ate=01/01/2000", "/clientes/nascidos?de=01/01/1990",
+                    "/clientes/aniversariantes?mes=13", "/clientes/aniversariantes?mes=2&dia=0",
+                    "/clientes/aniversariantes"):
+        assert servidor("GET", caminho)[0] == 400
+
+
+def test_incluir_obter_e_excluir(servidor):
+    status, resposta = servidor("POST", "/clientes", cadastro("529.982.247-25", "Ana"))
+    assert status == 201 and resposta["cpf"] == "52998224725" and resposta["telefone"] == "11999990000"
+    assert servidor("POST", "/clientes", cadastro("52998224725", "Outra Ana"))[0] == 409
+
+    status, resposta = servidor("GET", "/clientes/529.982.247-25")
+    assert status == 200 and resposta["nome"] == "Ana"
+    assert servidor("GET", "/saude") == (200, {"status": "ok", "clientes": 1})
+
+    assert servidor("DELETE", "/clientes/52998224725") == (204, None)
+    assert servidor("DELETE", "/clientes/52998224725")[0] == 404
+    assert servidor("GET", "/clientes/52998224725")[0] == 404
+
+
+def test_cadastros_invalidos(servidor):
+    assert servidor("POST", "/clientes", cadastro("12345678900", "Ana"))[0] == 400  # Dígitos verificadores
+    assert servidor("POST", "/clientes", [1, 2])[0] == 400
+    assert servidor("POST", "/clientes", bruto=b"{nao e json")[0] == 400
+    assert servidor("GET", "/saude")[1]["clientes"] == 0
+
+
+def test_listar_em_paginas_e_buscar(servidor):
+    for cpf, nome in (("52998224725", "Bia Souza"), ("11144477735", "Ana Souza"), ("39053344705", "Caio Lima")):
+        assert servidor("POST", "/clientes", cadastro(cpf, nome))[0] == 201
+
+    status, resposta = servidor("GET", "/clientes?limite=2")
+    assert status == 200 and [c["nome"] for c in resposta["itens"]] == ["Ana Souza", "Bia Souza"]
+    proximo = resposta["proximo"]
+    status, resposta = servidor("GET", f"/clientes?limite=2&depois_nome={quote(proximo['nome'])}"
+                                       f"&depois_cpf={proximo['cpf']}")
+    assert status == 200 and [c["nome"] for c in resposta["itens"]] == ["Caio Lima"]
+    assert resposta["proximo"] is None
+    assert servidor("GET", "/clientes?limite=dois")[0] == 400
+
+    status, resposta = servidor("GET", "/clientes/busca?q=souza")
+    assert status == 200 and sorted(c["nome"] for c in resposta["itens"]) == ["Ana Souza", "Bia Souza"]
+
+
+def test_rotas_e_metodos_desconhecidos(servidor):
+    assert servidor("GET", "/nada")[0] == 404
+    assert servidor("PUT", "/clientes")[0] == 405
+    assert servidor("DELETE", "/saude")[0] == 405
+    assert servidor("POST", "/clientes", bruto=b"x" * (TAMANHO_MAXIMO_CORPO + 1))[0] == 413
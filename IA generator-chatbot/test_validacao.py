@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+import validacao
+from benchmark import gerar_cpf
+from validacao import motivo_cpf, validar_cpf_checksum, validar_cpfs_em_lote
+
+# Caracteres que aparecem em volta ou no meio de um CPF digitado ou importado
+SUJEIRA = ".-/ ()\t\x00a²٣１"
+
+
+def formatado(cpf):
+    return f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
+
+
+def sortear_cpf(aleatorio):
+    """Um CPF válido, quase válido, formatado, sujo ou de tamanho errado."""
+    cpf = gerar_cpf(aleatorio)
+    sorteio = aleatorio.randrange(8)
+    if sorteio == 0:
+        return cpf
+    if sorteio == 1:
+        return formatado(cpf)
+    if sorteio == 2:  # Um dígito trocado (às vezes um verificador)
+        i = aleatorio.randrange(11)
+        return cpf[:i] + str((int(cpf[i]) + aleatorio.randint(1, 9)) % 10) + cpf[i + 1:]
+    if sorteio == 3:
+        return str(aleatorio.randrange(10)) * aleatorio.choice((10, 11, 12))
+    if sorteio == 4:  # Dígitos a mais ou a menos
+        extras = "".join(str(aleatorio.randrange(10)) for _ in range(aleatorio.randrange(3)))
+        return cpf[:aleatorio.randrange(12)] + extras
+    texto = list(formatado(cpf) if sorteio == 5 else cpf)
+    for _ in range(aleatorio.randint(1, 4)):
+        texto.insert(aleatorio.randrange(len(texto) + 1), aleatorio.choice(SUJEIRA))
+    return "".join(texto)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def modo(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(validacao, "np", None)
+    return request.param
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_lote_igual_a_validacao_escalar(modo, semente):
+    aleatorio = random.Random(semente)
+    cpfs = [sortear_cpf(aleatorio) for _ in range(2000)] + ["", "0", formatado("52998224725")]
+    mascara, codigos = validar_cpfs_em_lote(cpfs)
+    assert [bool(v) for v in mascara] == [validar_cpf_checksum(cpf) for cpf in cpfs]
+    assert [int(c) for c in codigos] == [motivo_cpf(cpf) for cpf in cpfs]
+
+
+def test_lote_vazio(modo):
+    mascara, codigos = validar_cpfs_em_lote([])
+    assert len(mascara) == len(codigos) == 0
@@ -0,0 +1,169 @@
+import re
+from datetime import date
+
+from metricas import medir
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele a validação em lote usa o laço em Python
+    np = None
+
+# Expressões usadas na validação (compiladas uma única vez)
+_RE_NAO_DIGITO = re.compile(r'[^0-9]')
+_RE_TELEFONE = re.compile(r"\(?\d{2}\)?\s?\d{4,5}-?\d{4}")
+_RE_GMAIL = re.compile(r"[^@]+@[^@]+\.[^@]+")
+_RE_DATA = re.compile(r"(\d{2})/(\d{2})/(\d{4})")
+
+
+def somente_digitos(texto):
+    """Remove tudo o que não for dígito (pontos, traços, parênteses...)."""
+    return _RE_NAO_DIGITO.sub('', texto)
+
+
+def converter_data(texto):
+    """Converte uma data dd/mm/aaaa em datetime.date; retorna None se ela não existir no calendário."""
+    encontrado = _RE_DATA.match(texto or "")
+    if not encontrado:
+        return None
+    dia, mes, ano = (int(parte) for parte in encontrado.groups())
+    try:
+        return date(ano, mes, dia)
+    except ValueError:
+        return None
+
+
+def validar_cpf_checksum(cpf):
+    """Verifica se o CPF é estruturalmente válido usando o algoritmo de checksum."""
+    cpf = somente_digitos(cpf)
+
+    if len(cpf) != 11 or len(set(cpf)) == 1:
+        return False
+
+    # Valida o primeiro dígito verificador
+    soma = 0
+    for i in range(9):
+        soma += int(cpf[i]) * (10 - i)
+    resto = soma % 11
+    digito1 = 0 if resto < 2 else 11 - resto
+
+    if int(cpf[9]) != digito1:
+        return False
+
+    # Valida o segundo dígito verificador
+    soma = 0
+    for i in range(10):
+        soma += int(cpf[i]) * (11 - i)
+    resto = soma % 11
+    digito2 = 0 if resto < 2 else 11 - resto
+
+    if int(cpf[10]) != digito2:
+        return False
+
+    return True
+
+
+# Códigos de falha da validação de CPF em lote
+CPF_VALIDO = 0
+CPF_TAMANHO = 1
+CPF_REPETIDO = 2
+CPF_DIGITO1 = 3
+CPF_DIGITO2 = 4
+
+MOTIVOS_CPF = {
+    CPF_VALIDO: None,
+    CPF_TAMANHO: "CPF deve ter 11 dígitos.",
+    CPF_REPETIDO: "CPF com todos os dígitos iguais.",
+    CPF_DIGITO1: "Primeiro dígito verificador inválido.",
+    CPF_DIGITO2: "Segundo dígito verificador inválido.",
+}
+
+
+def motivo_cpf(cpf):
+    """Versão escalar da validação em lote: retorna o código de falha de um CPF (CPF_VALIDO se ok)."""
+    cpf = somente_digitos(cpf)
+    if len(cpf) != 11:
+        return CPF_TAMANHO
+    if len(set(cpf)) == 1:
+        return CPF_REPETIDO
+    digitos = [int(ch) for ch in cpf]
+    resto = sum(d * p for d, p in zip(digitos, range(10, 1, -1))) % 11
+    if digitos[9] != (0 if resto < 2 else 11 - resto):
+        return CPF_DIGITO1
+    resto = sum(d * p for d, p in zip(digitos, range(11, 1, -1))) % 11
+    if digitos[10] != (0 if resto < 2 else 11 - resto):
+        return CPF_DIGITO2
+    return CPF_VALIDO
+
+
+@medir("validacao.validar_cpfs_em_lote")
+def validar_cpfs_em_lote(cpfs):
+    """Valida muitos CPFs de uma vez, com o mesmo resultado de validar_cpf_checksum.
+
+    Com NumPy, as strings viram uma matriz de códigos Unicode; os dígitos de cada
+    linha são compactados à esquerda, formando uma matriz N×11, e os dois dígitos
+    verificadores saem de produtos escalares com os pesos e de um módulo 11.
+
+    Retorna (mascara, codigos): mascara[i] indica se o CPF i é válido e codigos[i]
+    é a constante CPF_* da falha (veja MOTIVOS_CPF). São arrays NumPy quando ele
+    está instalado e listas comuns caso contrário.
+    """
+    if np is None:
+        codigos = [motivo_cpf(cpf) for cpf in cpfs]
+        return [c == CPF_VALIDO for c in codigos], codigos
+
+    texto = np.array(cpfs, dtype=str)
+    n = len(texto)
+    if n == 0:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int8)
+    largura = texto.dtype.itemsize // 4
+    pontos = texto.view(np.uint32).reshape(n, largura)
+    if largura < 11:
+        pontos = np.pad(pontos, ((0, 0), (0, 11 - largura)))
+
+    # Só os dígitos ASCII contam, como em somente_digitos
+    eh_digito = (pontos >= 48) & (pontos <= 57)
+    quantidade = eh_digito.sum(axis=1)
+    ordem = np.argsort(~eh_digito, axis=1, kind="stable")
+    digitos = (np.take_along_axis(pontos, ordem[:, :11], axis=1).astype(np.int64) - 48)
+
+    repetidos = (digitos == digitos[:, :1]).all(axis=1)
+    resto1 = (digitos[:, :9] @ np.arange(10, 1, -1)) % 11
+    resto2 = (digitos[:, :10] @ np.arange(11, 1, -1)) % 11
+    dv1 = np.where(resto1 < 2, 0, 11 - resto1)
+    dv2 = np.where(resto2 < 2, 0, 11 - resto2)
+
+    codigos = np.select(
+        [quantidade != 11, repetidos, digitos[:, 9] != dv1, digitos[:, 10] != dv2],
+        [CPF_TAMANHO, CPF_REPETIDO, CPF_DIGITO1, CPF_DIGITO2],
+        CPF_VALIDO,
+    ).astype(np.int8)
+    return codigos == CPF_VALIDO, codigos
+
+
+@medir("validacao.validar_cadastro")
+def validar_cadastro(cpf, nome, telefone, gmail, data, cpf_valido=None):
+    """Aplica as regras de validação e retorna a mensagem de erro, ou None se estiver tudo certo.
+
+    cpf_valido permite informar o resultado já calculado por validar_cpfs_em_lote.
+    """
+    if not nome:
+        return "O campo 'Nome' é obrigatório."
+
+    if cpf_valido is None:
+        cpf_valido = validar_cpf_checksum(cpf)
+    if not cpf_valido:
+        return "CPF inválido. Verifique o número digitado."
+
+    if not _RE_TELEFONE.match(telefone):
+        return "Telefone inválido. Formato esperado: (99) 99999-9999."
+
+    if not _RE_GMAIL.match(gmail):
+        return "Gmail inválido."
+
+    if not _RE_DATA.match(data):
+        return "Data inválida. Use o formato dd/mm/aaaa."
+
+    if converter_data(data) is None:
+        return "Data inválida. Verifique o dia e o mês."
+
+    return None